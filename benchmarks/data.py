@@ -0,0 +1,100 @@
+"""Deterministic synthetic data for the benchmarks."""
+
+import csv
+import itertools
+import random
+from pathlib import Path
+
+from ota.column import Column
+from ota.row_batch import RowBatch
+from ota.schema import DataType, Schema
+
+
+def uniform_ints(num_rows: int, num_values: int, seed: int = 0) -> list[int]:
+    """Generates integers drawn uniformly from 1 to num_values.
+
+    Args:
+        num_rows: The number of integers.
+        num_values: The number of distinct values.
+        seed: The seed of the random number generator.
+    Returns:
+        The integers.
+    """
+    rng = random.Random(seed)
+    return [rng.randint(1, num_values) for _ in range(num_rows)]
+
+
+def zipf_ints(
+    num_rows: int, num_values: int, exponent: float = 1.1, seed: int = 0
+) -> list[int]:
+    """Generates integers from 1 to num_values with a Zipf distribution.
+
+    The probability of value k is proportional to 1 / k ** exponent, so small
+    values are much more frequent than large ones.
+
+    Args:
+        num_rows: The number of integers.
+        num_values: The number of distinct values.
+        exponent: The skew of the distribution.
+        seed: The seed of the random number generator.
+    Returns:
+        The integers.
+    """
+    rng = random.Random(seed)
+    cum_weights = list(
+        itertools.accumulate(1 / k**exponent for k in range(1, num_values + 1))
+    )
+    return rng.choices(
+        range(1, num_values + 1), cum_weights=cum_weights, k=num_rows
+    )
+
+
+def sorted_ints(num_rows: int, num_values: int, seed: int = 0) -> list[int]:
+    """Generates uniformly drawn integers in ascending order.
+
+    Args:
+        num_rows: The number of integers.
+        num_values: The number of distinct values.
+        seed: The seed of the random number generator.
+    Returns:
+        The integers.
+    """
+    return sorted(uniform_ints(num_rows, num_values, seed))
+
+
+def to_row_batches(
+    columns: dict[str, list[int]], batch_size: int
+) -> list[RowBatch]:
+    """Splits Int columns into batches.
+
+    Args:
+        columns: The values of the columns, by name.
+        batch_size: The maximum number of rows in a batch.
+    Returns:
+        The batches.
+    """
+    schema = Schema({name: DataType.Int for name in columns})
+    num_rows = len(next(iter(columns.values())))
+    return [
+        RowBatch(
+            schema,
+            [
+                Column(DataType.Int, values[start : start + batch_size])
+                for values in columns.values()
+            ],
+        )
+        for start in range(0, num_rows, batch_size)
+    ]
+
+
+def write_csv(path: Path, columns: dict[str, list[int]]) -> None:
+    """Writes Int columns into a CSV file with a header line.
+
+    Args:
+        path: The path of the file.
+        columns: The values of the columns, by name.
+    """
+    with open(path, "w", newline="") as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(columns)
+        csv_writer.writerows(zip(*columns.values()))
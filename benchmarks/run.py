@@ -0,0 +1,402 @@
+"""Micro-benchmarks of scans, expression kernels and operators.
+
+Run with ``python -m benchmarks.run``. The results are written as JSON, one
+record per benchmark with its throughput in rows per second and the peak
+memory allocated while it ran, so that runs can be compared by a script.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Generator
+
+from ota.column_cache import get_column_cache
+from ota.data_loader import CsvLoader
+from ota.physical.expr.abc import PhysicalExpr
+from ota.physical.expr.compiler import compile_expr
+from ota.physical.expr.impls import (
+    PhysicalAggregateExprCount,
+    PhysicalAggregateExprSum,
+    PhysicalBooleanExprAnd,
+    PhysicalBooleanExprEq,
+    PhysicalBooleanExprGt,
+    PhysicalBooleanExprGtEq,
+    PhysicalBooleanExprLt,
+    PhysicalBooleanExprLtEq,
+    PhysicalBooleanExprNeq,
+    PhysicalBooleanExprOr,
+    PhysicalColumnExpr,
+    PhysicalLiteralIntExpr,
+    PhysicalMathExprAdd,
+    PhysicalMathExprDivide,
+    PhysicalMathExprModulo,
+    PhysicalMathExprMultiply,
+    PhysicalMathExprSubtract,
+)
+from ota.physical.expr.vectorized import ENABLED as NUMPY_ENABLED
+from ota.physical.plan.abc import PhysicalPlan
+from ota.physical.plan.impls import (
+    PhysicalAggregate,
+    PhysicalScan,
+    PhysicalSelection,
+)
+from ota.row_batch import RowBatch
+from ota.schema import DataType, Schema
+
+from .data import (
+    sorted_ints,
+    to_row_batches,
+    uniform_ints,
+    write_csv,
+    zipf_ints,
+)
+
+MATH_KERNELS = [
+    PhysicalMathExprAdd,
+    PhysicalMathExprSubtract,
+    PhysicalMathExprMultiply,
+    PhysicalMathExprDivide,
+    PhysicalMathExprModulo,
+]
+COMPARISON_KERNELS = [
+    PhysicalBooleanExprEq,
+    PhysicalBooleanExprNeq,
+    PhysicalBooleanExprGt,
+    PhysicalBooleanExprGtEq,
+    PhysicalBooleanExprLt,
+    PhysicalBooleanExprLtEq,
+]
+LOGICAL_KERNELS = [PhysicalBooleanExprAnd, PhysicalBooleanExprOr]
+SELECTIVITIES = [0.01, 0.1, 0.5, 0.9, 1.0]
+DISTRIBUTIONS = {
+    "uniform": uniform_ints,
+    "zipf": zipf_ints,
+    "sorted": sorted_ints,
+}
+# The number of distinct values of the columns that aren't grouped by.
+NUM_VALUES = 1_000_000
+
+
+class _BatchSource(PhysicalPlan):
+    """Yields batches that are already in memory.
+
+    Attributes:
+        _schema: The schema of the batches.
+        _batches: The batches.
+    """
+
+    _schema: Schema
+    _batches: list[RowBatch]
+
+    def __init__(self, schema: Schema, batches: list[RowBatch]) -> None:
+        self._schema = schema
+        self._batches = batches
+
+    def __str__(self) -> str:
+        return f"BatchSource: schema={self._schema}"
+
+    def get_schema(self) -> Schema:
+        return self._schema
+
+    def get_children(self) -> list[PhysicalPlan]:
+        return []
+
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        return self
+
+    def execute(self) -> Generator[RowBatch, None, None]:
+        yield from self._batches
+
+
+def measure(
+    name: str,
+    params: dict[str, Any],
+    num_rows: int,
+    run: Callable[[], None],
+    repeat: int,
+) -> dict[str, Any]:
+    """Measures the throughput and peak memory of a benchmark.
+
+    The throughput is taken from the fastest of the timed runs. The peak
+    memory is measured in a separate run, as tracing allocations slows the
+    run down.
+
+    Args:
+        name: The name of the benchmark.
+        params: The parameters of the benchmark.
+        num_rows: The number of rows that a run processes.
+        run: Runs the benchmark once.
+        repeat: The number of timed runs.
+    Returns:
+        The result record.
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "name": name,
+        "params": params,
+        "num_rows": num_rows,
+        "seconds": seconds,
+        "rows_per_second": num_rows / seconds if seconds > 0 else None,
+        "peak_memory_bytes": peak_memory_bytes,
+    }
+
+
+def benchmark_csv_scan(
+    num_rows: int, batch_size: int, repeat: int, directory: Path
+) -> Generator[dict[str, Any], None, None]:
+    """Scans a CSV file with and without its columns in the column cache."""
+    path = directory / "scan.csv"
+    write_csv(
+        path,
+        {
+            "a": uniform_ints(num_rows, NUM_VALUES, seed=1),
+            "b": uniform_ints(num_rows, NUM_VALUES, seed=2),
+        },
+    )
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+    scan = PhysicalScan(CsvLoader(path, schema, batch_size), ["a", "b"])
+    column_cache = get_column_cache()
+
+    def run_uncached() -> None:
+        column_cache.clear()
+        _drain(scan)
+
+    def run_cached() -> None:
+        _drain(scan)
+
+    params = {"batch_size": batch_size}
+    yield measure("csv_scan", params, num_rows, run_uncached, repeat)
+    _drain(scan)
+    yield measure("csv_scan_cached", params, num_rows, run_cached, repeat)
+    column_cache.clear()
+
+
+def benchmark_kernels(
+    num_rows: int, batch_size: int, repeat: int
+) -> Generator[dict[str, Any], None, None]:
+    """Evaluates every math and boolean expression on whole batches."""
+    int_batches = to_row_batches(
+        {
+            "a": uniform_ints(num_rows, NUM_VALUES, seed=1),
+            "b": uniform_ints(num_rows, NUM_VALUES, seed=2),
+        },
+        batch_size,
+    )
+    left_expr = PhysicalColumnExpr(0)
+    right_expr = PhysicalColumnExpr(1)
+    for kernel in MATH_KERNELS + COMPARISON_KERNELS:
+        expr = kernel(left_expr, right_expr)
+        yield measure(
+            "kernel",
+            {"expr": kernel.__name__, "batch_size": batch_size},
+            num_rows,
+            _evaluate_all(expr, int_batches),
+            repeat,
+        )
+
+    bool_schema = Schema({"a": DataType.Bool, "b": DataType.Bool})
+    bool_batches = [
+        RowBatch(
+            bool_schema,
+            [
+                PhysicalBooleanExprLt(left_expr, right_expr).evaluate(batch),
+                PhysicalBooleanExprGt(left_expr, right_expr).evaluate(batch),
+            ],
+        )
+        for batch in int_batches
+    ]
+    for kernel in LOGICAL_KERNELS:
+        expr = kernel(left_expr, right_expr)
+        yield measure(
+            "kernel",
+            {"expr": kernel.__name__, "batch_size": batch_size},
+            num_rows,
+            _evaluate_all(expr, bool_batches),
+            repeat,
+        )
+
+
+def benchmark_compiled_expr(
+    num_rows: int, batch_size: int, repeat: int
+) -> Generator[dict[str, Any], None, None]:
+    """Evaluates a nested math expression interpreted and compiled."""
+    batches = to_row_batches(
+        {
+            "a": uniform_ints(num_rows, NUM_VALUES, seed=1),
+            "b": uniform_ints(num_rows, NUM_VALUES, seed=2),
+        },
+        batch_size,
+    )
+    # (a * b + (a - 3)) % 97
+    expr = PhysicalMathExprModulo(
+        PhysicalMathExprAdd(
+            PhysicalMathExprMultiply(
+                PhysicalColumnExpr(0), PhysicalColumnExpr(1)
+            ),
+            PhysicalMathExprSubtract(
+                PhysicalColumnExpr(0), PhysicalLiteralIntExpr(3)
+            ),
+        ),
+        PhysicalLiteralIntExpr(97),
+    )
+    for compiled in [False, True]:
+        yield measure(
+            "compiled_expr",
+            {"compiled": compiled, "batch_size": batch_size},
+            num_rows,
+            _evaluate_all(compile_expr(expr) if compiled else expr, batches),
+            repeat,
+        )
+
+
+def benchmark_selection(
+    num_rows: int, batch_size: int, repeat: int
+) -> Generator[dict[str, Any], None, None]:
+    """Filters uniformly distributed values by a range at each selectivity."""
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+    source = _BatchSource(
+        schema,
+        to_row_batches(
+            {
+                "a": uniform_ints(num_rows, NUM_VALUES, seed=1),
+                "b": uniform_ints(num_rows, NUM_VALUES, seed=2),
+            },
+            batch_size,
+        ),
+    )
+    for selectivity in SELECTIVITIES:
+        # The values are drawn from 1 to NUM_VALUES.
+        upper_bound = round(selectivity * NUM_VALUES) + 1
+        selection = PhysicalSelection(
+            source,
+            PhysicalBooleanExprLt(
+                PhysicalColumnExpr(0), PhysicalLiteralIntExpr(upper_bound)
+            ),
+        )
+        yield measure(
+            "selection",
+            {"selectivity": selectivity, "batch_size": batch_size},
+            num_rows,
+            lambda: _drain(selection),
+            repeat,
+        )
+
+
+def benchmark_aggregation(
+    num_rows: int, batch_size: int, repeat: int
+) -> Generator[dict[str, Any], None, None]:
+    """Groups by keys of each distribution at several group cardinalities."""
+    schema = Schema({"key": DataType.Int, "value": DataType.Int})
+    output_schema = Schema(
+        {"key": DataType.Int, "SUM": DataType.Int, "COUNT": DataType.Int}
+    )
+    values = uniform_ints(num_rows, NUM_VALUES, seed=2)
+    cardinalities = sorted({1, 100, 10_000, num_rows})
+    for distribution, generate in DISTRIBUTIONS.items():
+        for cardinality in cardinalities:
+            keys = generate(num_rows, cardinality, seed=1)
+            source = _BatchSource(
+                schema,
+                to_row_batches({"key": keys, "value": values}, batch_size),
+            )
+            aggregate = PhysicalAggregate(
+                source,
+                [PhysicalColumnExpr(0)],
+                [
+                    PhysicalAggregateExprSum(PhysicalColumnExpr(1)),
+                    PhysicalAggregateExprCount(PhysicalColumnExpr(1)),
+                ],
+                output_schema,
+            )
+            yield measure(
+                "aggregation",
+                {
+                    "distribution": distribution,
+                    "cardinality": cardinality,
+                    "batch_size": batch_size,
+                },
+                num_rows,
+                lambda: _drain(aggregate),
+                repeat,
+            )
+
+
+def run_benchmarks(
+    num_rows: int, batch_size: int = 1_000, repeat: int = 3
+) -> list[dict[str, Any]]:
+    """Runs all benchmarks.
+
+    Args:
+        num_rows: The number of rows of the generated data.
+        batch_size: The maximum number of rows in a batch.
+        repeat: The number of timed runs of every benchmark.
+    Returns:
+        The result records.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        return [
+            *benchmark_csv_scan(num_rows, batch_size, repeat, Path(directory)),
+            *benchmark_kernels(num_rows, batch_size, repeat),
+            *benchmark_compiled_expr(num_rows, batch_size, repeat),
+            *benchmark_selection(num_rows, batch_size, repeat),
+            *benchmark_aggregation(num_rows, batch_size, repeat),
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--output", type=Path, help="The JSON file to write, default stdout."
+    )
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": NUMPY_ENABLED,
+        "results": run_benchmarks(args.rows, args.batch_size, args.repeat),
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+def _drain(plan: PhysicalPlan) -> None:
+    for _ in plan.execute():
+        pass
+
+
+def _evaluate_all(
+    expr: PhysicalExpr, batches: list[RowBatch]
+) -> Callable[[], None]:
+    def run() -> None:
+        for batch in batches:
+            expr.evaluate(batch)
+
+    return run
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,98 @@
 """A column in a RowBatch."""
 
-from typing import Any
+from __future__ import annotations
+
+from array import array
+from itertools import chain
+from typing import Any, Iterable, Sequence
 
 from ota.schema import DataType
 
+# Bit i of a bitmap byte holds the value of row 8 * byte_index + i.
+_BYTE_TO_BITS = [
+    tuple(bool(byte >> bit & 1) for bit in range(8)) for byte in range(256)
+]
+_BITS_TO_BYTE = {bits: byte for byte, bits in enumerate(_BYTE_TO_BITS)}
+
 
 class Column:
+    """A fixed-width buffer of values of a single data type.
+
+    Int values are stored as 64-bit signed integers in an ``array("q")`` and
+    Bool values in a bitmap holding one bit per value.
+
+    Attributes:
+        _data_type: The data type of the values.
+        _buffer: The buffer holding the values.
+        _size: The number of values.
+    """
+
     _data_type: DataType
-    _values: list[int | bool]
+    _buffer: Any
+    _size: int
+
+    def __init__(self, data_type: DataType, values: Iterable[Any]) -> None:
+        """Creates a column, converting the values to the data type.
 
-    def __init__(self, data_type: DataType, values: list[Any]) -> None:
+        Args:
+            data_type: The data type of the column.
+            values: The values as strings or as Python objects of the data
+                type.
+        Raises:
+            RuntimeError: When the values can't be converted to the data type.
+        """
         self._data_type = data_type
 
-        if len(values) == 0 or values[0] is None:
-            self._values = values
+        values = values if isinstance(values, list) else list(values)
+        self._size = len(values)
+        if self._size == 0:
+            self._buffer = _pack(data_type, values)
             return
 
         read_type = type(values[0])
-        # TODO: Sort out this mess...
         if read_type is str:
             if data_type == DataType.Bool:
-                self._values = list(
-                    map(lambda s: s in ["true", "True"], values)
-                )
+                values = [s in ("true", "True") for s in values]
             elif data_type == DataType.Int:
-                self._values = list(map(int, values))
+                values = map(int, values)
             else:
                 raise RuntimeError(
                     f"No conversion from {read_type} to {data_type}"
                 )
         elif read_type is int:
-            if data_type == DataType.Int:
-                self._values = values
-            else:
+            if data_type != DataType.Int:
                 raise RuntimeError(
                     f"No conversion from {read_type} to {data_type}"
                 )
         elif read_type is bool:
-            if data_type == DataType.Bool:
-                self._values = values
-            else:
+            if data_type != DataType.Bool:
                 raise RuntimeError(
                     f"No conversion from {read_type} to {data_type}"
                 )
         else:
             raise RuntimeError(f"No conversion from {read_type} to {data_type}")
 
-    def __getitem__(self, item: int) -> int | bool | None:
+        self._buffer = _pack(data_type, values)
+
+    @classmethod
+    def from_buffer(cls, data_type: DataType, buffer: Any, size: int) -> Column:
+        """Creates a column around an existing buffer without copying it.
+
+        Args:
+            data_type: The data type of the column.
+            buffer: An ``array("q")`` (or a memoryview cast to ``"q"``) for Int
+                columns, a bitmap for Bool columns.
+            size: The number of values in the buffer.
+        Returns:
+            A column.
+        """
+        column = cls.__new__(cls)
+        column._data_type = data_type
+        column._buffer = buffer
+        column._size = size
+        return column
+
+    def __getitem__(self, item: int) -> int | bool:
         """Returns the element corresponding to the given index.
 
         Args:
@@ -54,10 +100,20 @@ class Column:
         Returns:
             An element.
         """
-        return self._values[item]
+        if self._data_type != DataType.Bool:
+            return self._buffer[item]
+        item = self._check_index(item)
+        return bool(self._buffer[item >> 3] >> (item & 7) & 1)
 
-    def __setitem__(self, item: int, value: int | bool | None) -> None:
-        self._values[item] = value
+    def __setitem__(self, item: int, value: int | bool) -> None:
+        if self._data_type != DataType.Bool:
+            self._buffer[item] = value
+            return
+        item = self._check_index(item)
+        if value:
+            self._buffer[item >> 3] |= 1 << (item & 7)
+        else:
+            self._buffer[item >> 3] &= ~(1 << (item & 7)) & 0xFF
 
     def get_data_type(self) -> DataType:
         """Returns the column's data type.
@@ -73,4 +129,107 @@ class Column:
         Returns:
             The number of elements.
         """
-        return len(self._values)
+        return self._size
+
+    def get_buffer(self) -> Any:
+        """Returns the buffer backing the column.
+
+        Returns:
+            An ``array("q")`` for Int columns, a bitmap for Bool columns.
+        """
+        return self._buffer
+
+    def to_list(self) -> list[int | bool]:
+        """Returns the elements as a list.
+
+        Returns:
+            The elements.
+        """
+        if self._data_type != DataType.Bool:
+            return self._buffer.tolist()
+        bits = chain.from_iterable(map(_BYTE_TO_BITS.__getitem__, self._buffer))
+        return list(bits)[: self._size]
+
+    def take(self, indices: Sequence[int]) -> Column:
+        """Returns a new column with the elements at the given indices.
+
+        Args:
+            indices: The indices of the elements to take.
+        Returns:
+            A column.
+        """
+        if self._data_type != DataType.Bool:
+            values = array("q", map(self._buffer.__getitem__, indices))
+            return Column.from_buffer(self._data_type, values, len(values))
+        values = self.to_list()
+        return Column(self._data_type, [values[i] for i in indices])
+
+    def _check_index(self, item: int) -> int:
+        if item < 0:
+            item += self._size
+        if not 0 <= item < self._size:
+            raise IndexError("Column index out of range")
+        return item
+
+
+class ConstantColumn(Column):
+    """A column where every element has the same value.
+
+    The value is stored once instead of in a buffer, which is only created if
+    get_buffer() is called.
+
+    Attributes:
+        _value: The value of every element.
+    """
+
+    _value: int | bool
+
+    def __init__(self, data_type: DataType, value: int | bool, size: int):
+        """Creates a constant column.
+
+        Args:
+            data_type: The data type of the column.
+            value: The value of every element.
+            size: The number of elements.
+        """
+        self._data_type = data_type
+        self._value = value
+        self._size = size
+        self._buffer = None
+
+    def __getitem__(self, item: int) -> int | bool:
+        self._check_index(item)
+        return self._value
+
+    def __setitem__(self, item: int, value: int | bool) -> None:
+        raise RuntimeError("Can't modify a constant column")
+
+    def get_value(self) -> int | bool:
+        """Returns the value of every element.
+
+        Returns:
+            The value.
+        """
+        return self._value
+
+    def get_buffer(self) -> Any:
+        if self._buffer is None:
+            self._buffer = _pack(self._data_type, self.to_list())
+        return self._buffer
+
+    def to_list(self) -> list[int | bool]:
+        return [self._value] * self._size
+
+    def take(self, indices: Sequence[int]) -> Column:
+        return ConstantColumn(self._data_type, self._value, len(indices))
+
+
+def _pack(data_type: DataType, values: Iterable[Any]) -> Any:
+    if data_type != DataType.Bool:
+        return array("q", values)
+    values = list(values)
+    values += [False] * (-len(values) % 8)
+    return bytearray(
+        _BITS_TO_BYTE[tuple(values[i : i + 8])]
+        for i in range(0, len(values), 8)
+    )
@@ -0,0 +1,153 @@
+"""A process-wide cache of columns decoded from files."""
+
+from collections import OrderedDict
+from typing import Hashable
+
+from ota.column import Column
+from ota.schema import DataType
+
+# The path, size and modification time of a file.
+SourceState = tuple[str, int, int]
+
+
+class ColumnCache:
+    """Holds the most recently used decoded columns within a memory budget.
+
+    Columns are cached per file state. When a file is seen with a different
+    size or modification time, the columns cached for it are dropped.
+
+    Attributes:
+        _max_bytes: The maximum total size of the cached column buffers.
+        _num_bytes: The total size of the cached column buffers.
+        _columns: The cached columns by source state and key, least recently
+            used first.
+        _source_states: The last seen state of each file, by path.
+        _num_hits: The number of lookups that found a column.
+        _num_misses: The number of lookups that didn't.
+    """
+
+    _max_bytes: int
+    _num_bytes: int
+    _columns: OrderedDict[tuple[SourceState, Hashable], Column]
+    _source_states: dict[str, SourceState]
+    _num_hits: int
+    _num_misses: int
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._num_bytes = 0
+        self._columns = OrderedDict()
+        self._source_states = {}
+        self._num_hits = 0
+        self._num_misses = 0
+
+    def get(self, source_state: SourceState, key: Hashable) -> Column | None:
+        """Returns a cached column and marks it as most recently used.
+
+        Args:
+            source_state: The state of the file that the column is from.
+            key: The key of the column within the file.
+        Returns:
+            The column, or None when it isn't cached.
+        """
+        self._check_source_state(source_state)
+        column = self._columns.get((source_state, key))
+        if column is None:
+            self._num_misses += 1
+            return None
+        self._num_hits += 1
+        self._columns.move_to_end((source_state, key))
+        return column
+
+    def put(
+        self, source_state: SourceState, key: Hashable, column: Column
+    ) -> None:
+        """Caches a column, evicting the least recently used ones when full.
+
+        Columns larger than the budget aren't cached.
+
+        Args:
+            source_state: The state of the file that the column is from.
+            key: The key of the column within the file.
+            column: The column.
+        """
+        num_bytes = get_num_column_bytes(column)
+        if num_bytes > self._max_bytes:
+            return
+        self._check_source_state(source_state)
+        previous_column = self._columns.pop((source_state, key), None)
+        if previous_column is not None:
+            self._num_bytes -= get_num_column_bytes(previous_column)
+        self._columns[(source_state, key)] = column
+        self._num_bytes += num_bytes
+        self._evict(self._max_bytes)
+
+    def invalidate(self, path: str) -> None:
+        """Drops the columns cached for a file.
+
+        Args:
+            path: The path of the file.
+        """
+        self._source_states.pop(path, None)
+        for cache_key in list(self._columns):
+            if cache_key[0][0] == path:
+                self._num_bytes -= get_num_column_bytes(
+                    self._columns.pop(cache_key)
+                )
+
+    def clear(self) -> None:
+        """Drops all columns and resets the counters."""
+        self._columns.clear()
+        self._source_states.clear()
+        self._num_bytes = 0
+        self._num_hits = 0
+        self._num_misses = 0
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._evict(max_bytes)
+
+    def get_num_bytes(self) -> int:
+        return self._num_bytes
+
+    def get_num_hits(self) -> int:
+        return self._num_hits
+
+    def get_num_misses(self) -> int:
+        return self._num_misses
+
+    def _check_source_state(self, source_state: SourceState) -> None:
+        path = source_state[0]
+        if self._source_states.get(path, source_state) != source_state:
+            self.invalidate(path)
+        self._source_states[path] = source_state
+
+    def _evict(self, max_bytes: int) -> None:
+        while self._num_bytes > max_bytes:
+            _, column = self._columns.popitem(last=False)
+            self._num_bytes -= get_num_column_bytes(column)
+
+
+_column_cache = ColumnCache(256 * 1024 * 1024)
+
+
+def get_column_cache() -> ColumnCache:
+    """Returns the column cache of the process.
+
+    Returns:
+        The cache.
+    """
+    return _column_cache
+
+
+def get_num_column_bytes(column: Column) -> int:
+    """Returns the size of the buffer of a column.
+
+    Args:
+        column: The column.
+    Returns:
+        The size in bytes.
+    """
+    if column.get_data_type() == DataType.Bool:
+        return (column.size() + 7) // 8
+    return 8 * column.size()
@@ -0,0 +1,285 @@
+"""The native columnar file format.
+
+A file consists of:
+
+- the magic bytes ``OTA1``
+- row groups, each holding one buffer per column in schema order, with every
+  buffer starting at a multiple of 8 bytes. Int buffers hold little-endian
+  64-bit integers and Bool buffers hold bitmaps like Bool columns do.
+- a footer, UTF-8 encoded JSON with the format version, the schema and, for
+  every row group, its number of rows, the offset and length of every column
+  buffer and the minimum and maximum value of every column
+- the length of the footer as a little-endian unsigned 64-bit integer
+- the magic bytes ``OTA1``
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable
+
+from ota.column import Column
+from ota.row_batch import RowBatch
+from ota.schema import DataType, Schema
+from ota.zone_map import ColumnStatistics, compute_statistics
+
+MAGIC = b"OTA1"
+# Version 1 footers have no version field and no statistics.
+FORMAT_VERSION = 2
+_FOOTER_LENGTH_SIZE = 8
+_ALIGNMENT = 8
+
+
+@dataclass()
+class RowGroup:
+    """The location of a row group in a columnar file.
+
+    Attributes:
+        num_rows: The number of rows.
+        column_chunks: The offset and length of the buffer of each column, in
+            schema order.
+        statistics: The statistics of each column, in schema order, or None
+            for files of version 1, which don't record them.
+    """
+
+    num_rows: int
+    column_chunks: list[tuple[int, int]]
+    statistics: list[ColumnStatistics] | None
+
+
+@dataclass()
+class ColumnarFileMetadata:
+    """The contents of the footer of a columnar file.
+
+    Attributes:
+        schema: The schema of the file.
+        row_groups: The row groups, in file order.
+    """
+
+    schema: Schema
+    row_groups: list[RowGroup]
+
+
+class ColumnarFileWriter:
+    """Writes batches into a columnar file.
+
+    Batches are collected until they add up to the row group size and then
+    written out as one row group.
+
+    Attributes:
+        _file: The file being written.
+        _schema: The schema of the batches.
+        _row_group_size: The number of rows in a full row group.
+        _pending_batches: The batches of the row group being collected.
+        _num_pending_rows: The number of rows in the pending batches.
+        _row_groups: The row groups written so far.
+    """
+
+    _file: BinaryIO
+    _schema: Schema
+    _row_group_size: int
+    _pending_batches: list[RowBatch]
+    _num_pending_rows: int
+    _row_groups: list[RowGroup]
+
+    def __init__(
+        self, path: Path, schema: Schema, row_group_size: int = 65_536
+    ) -> None:
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._schema = schema
+        self._row_group_size = row_group_size
+        self._pending_batches = []
+        self._num_pending_rows = 0
+        self._row_groups = []
+
+    def __enter__(self) -> ColumnarFileWriter:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def write(self, batch: RowBatch) -> None:
+        """Writes a batch, possibly delaying it until a row group is full.
+
+        Args:
+            batch: The batch.
+        """
+        batch = batch.compact()
+        if batch.num_rows() == 0:
+            return
+        self._pending_batches.append(batch)
+        self._num_pending_rows += batch.num_rows()
+        if self._num_pending_rows >= self._row_group_size:
+            self._write_row_group()
+
+    def close(self) -> None:
+        """Writes any pending rows and the footer, and closes the file."""
+        if self._file.closed:
+            return
+        if self._pending_batches:
+            self._write_row_group()
+        footer = json.dumps(
+            {
+                "version": FORMAT_VERSION,
+                "schema": [
+                    [field.name, field.data_type.name]
+                    for field in self._schema.get_fields()
+                ],
+                "row_groups": [
+                    [
+                        row_group.num_rows,
+                        row_group.column_chunks,
+                        [
+                            [statistics.min_value, statistics.max_value]
+                            for statistics in row_group.statistics or []
+                        ],
+                    ]
+                    for row_group in self._row_groups
+                ],
+            }
+        ).encode()
+        self._file.write(footer)
+        self._file.write(len(footer).to_bytes(_FOOTER_LENGTH_SIZE, "little"))
+        self._file.write(MAGIC)
+        self._file.close()
+
+    def _write_row_group(self) -> None:
+        column_chunks = []
+        statistics = []
+        for index in range(len(self._schema.get_fields())):
+            columns = [
+                batch.get_column(index) for batch in self._pending_batches
+            ]
+            buffer = _to_file_buffer(columns)
+            self._file.write(b"\0" * (-self._file.tell() % _ALIGNMENT))
+            column_chunks.append((self._file.tell(), len(buffer)))
+            self._file.write(buffer)
+            statistics.append(
+                _merge_statistics(list(map(compute_statistics, columns)))
+            )
+        self._row_groups.append(
+            RowGroup(self._num_pending_rows, column_chunks, statistics)
+        )
+        self._pending_batches = []
+        self._num_pending_rows = 0
+
+
+def write_columnar_file(
+    path: Path,
+    schema: Schema,
+    batches: Iterable[RowBatch],
+    row_group_size: int = 65_536,
+) -> None:
+    """Writes batches into a columnar file.
+
+    Args:
+        path: The path of the file.
+        schema: The schema of the batches.
+        batches: The batches.
+        row_group_size: The number of rows in a full row group.
+    """
+    with ColumnarFileWriter(path, schema, row_group_size) as writer:
+        for batch in batches:
+            writer.write(batch)
+
+
+def read_metadata(data: Any) -> ColumnarFileMetadata:
+    """Reads the footer of a columnar file.
+
+    Args:
+        data: The contents of the file as a bytes-like object, e.g. an mmap.
+    Returns:
+        The metadata.
+    Raises:
+        RuntimeError: When the data isn't a columnar file or was written in a
+            newer version of the format.
+    """
+    trailer_size = _FOOTER_LENGTH_SIZE + len(MAGIC)
+    if (
+        len(data) < len(MAGIC) + trailer_size
+        or data[: len(MAGIC)] != MAGIC
+        or data[-len(MAGIC) :] != MAGIC
+    ):
+        raise RuntimeError("Not a columnar file")
+
+    footer_length = int.from_bytes(data[-trailer_size : -len(MAGIC)], "little")
+    footer_start = len(data) - trailer_size - footer_length
+    footer = json.loads(bytes(data[footer_start:-trailer_size]))
+    version = footer.get("version", 1)
+    if version > FORMAT_VERSION:
+        raise RuntimeError(
+            f"Unsupported columnar file version {version}, "
+            f"the newest supported version is {FORMAT_VERSION}"
+        )
+    schema = Schema(
+        {name: DataType[data_type] for name, data_type in footer["schema"]}
+    )
+    row_groups = []
+    for num_rows, column_chunks, *statistics in footer["row_groups"]:
+        row_groups.append(
+            RowGroup(
+                num_rows,
+                [tuple(chunk) for chunk in column_chunks],
+                [ColumnStatistics(*values) for values in statistics[0]]
+                if version >= 2
+                else None,
+            )
+        )
+    return ColumnarFileMetadata(schema, row_groups)
+
+
+def read_column(
+    data: memoryview, data_type: DataType, chunk: tuple[int, int], size: int
+) -> Column:
+    """Returns a column backed by a chunk of a columnar file.
+
+    The column refers to the data without copying it, except for Int columns
+    on big-endian machines.
+
+    Args:
+        data: The contents of the file.
+        data_type: The data type of the column.
+        chunk: The offset and length of the column buffer.
+        size: The number of values in the column.
+    Returns:
+        A column.
+    """
+    offset, length = chunk
+    buffer = data[offset : offset + length]
+    if data_type == DataType.Int:
+        if sys.byteorder == "little":
+            buffer = buffer.cast("q")
+        else:
+            buffer = array("q", buffer)
+            buffer.byteswap()
+    return Column.from_buffer(data_type, buffer, size)
+
+
+def _to_file_buffer(columns: list[Column]) -> bytes:
+    data_type = columns[0].get_data_type()
+    if data_type == DataType.Bool:
+        values = [value for column in columns for value in column.to_list()]
+        return bytes(Column(DataType.Bool, values).get_buffer())
+
+    buffer = array("q")
+    for column in columns:
+        column_buffer = column.get_buffer()
+        if isinstance(column_buffer, array):
+            buffer.extend(column_buffer)
+        else:
+            buffer.frombytes(memoryview(column_buffer).cast("B"))
+    if sys.byteorder != "little":
+        buffer.byteswap()
+    return buffer.tobytes()
+
+
+def _merge_statistics(statistics: list[ColumnStatistics]) -> ColumnStatistics:
+    return ColumnStatistics(
+        min(column_statistics.min_value for column_statistics in statistics),
+        max(column_statistics.max_value for column_statistics in statistics),
+    )
@@ -1,13 +1,49 @@
 """Data loaders for various file formats."""
 
+import csv
+import io
+import mmap
+import os
 from abc import ABC, abstractmethod
-from csv import DictReader
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Generator
+from typing import BinaryIO, Generator, Hashable, Iterator
 
 from ota.column import Column
+from ota.column_cache import SourceState, get_column_cache
+from ota.columnar_file import (
+    ColumnarFileMetadata,
+    RowGroup,
+    read_column,
+    read_metadata,
+)
+from ota.physical.expr.abc import PhysicalExpr
 from ota.row_batch import RowBatch
 from ota.schema import Schema
+from ota.zone_map import may_match
+
+
+@dataclass()
+class ScanPredicate:
+    """A filter that a data loader applies to rows while loading them.
+
+    Attributes:
+        column_names: The columns that the expression reads, in the order of
+            the column indices that the expression uses.
+        expr: The filter expression.
+    """
+
+    column_names: list[str]
+    expr: PhysicalExpr
 
 
 class DataLoader(ABC):
@@ -19,21 +55,100 @@ class DataLoader(ABC):
 
     @abstractmethod
     def load(
-        self, projection: list[str]
-    ) -> Generator[RowBatch, None, None]: ...
+        self, projection: list[str], predicate: ScanPredicate | None = None
+    ) -> Generator[RowBatch, None, None]:
+        """Loads batches of rows from the source.
+
+        Args:
+            projection: The columns to load. All columns are loaded when empty.
+            predicate: A filter that the loaded rows must pass.
+        Returns:
+            A generator of batches. Batches where no rows pass the predicate
+            may be left out.
+        """
+
+    def get_partitions(self) -> list["DataLoader"]:
+        """Splits the source into parts that can be loaded separately.
+
+        Returns:
+            Loaders for the parts, in source order.
+        """
+        return [self]
+
+    def get_num_workers(self) -> int:
+        """Returns the number of processes to load the partitions with.
+
+        Returns:
+            The number of worker processes.
+        """
+        return 1
+
+    def get_source_state(self) -> Hashable | None:
+        """Returns a value that changes whenever the source changes.
+
+        Returns:
+            The state, or None when it is unknown.
+        """
+        return None
+
+    def get_sort_order(self) -> list[str]:
+        """Returns the columns that the loaded rows are sorted by.
+
+        Returns:
+            The column names, most significant first. Empty when the rows are
+            in no known order.
+        """
+        return []
 
 
 class CsvLoader(DataLoader):
+    """Loads batches from a CSV file with a header line.
+
+    With more than one worker the file is split into byte ranges aligned to
+    line boundaries, which are parsed in a process pool. Splitting assumes
+    that quoted values don't contain line breaks.
+
+    Converted columns are kept in the process-wide column cache, so later
+    loads of the same batches of an unchanged file only convert the columns
+    that aren't cached yet.
+
+    Attributes:
+        _path: The path of the file.
+        _schema: The schema of the columns to load.
+        _batch_size: The maximum number of rows in a batch.
+        _num_workers: The number of worker processes.
+        _preserve_order: Whether batches are yielded in file order when
+            loading with workers, instead of as soon as they are parsed.
+        _byte_range: The start and end offsets of the part of the file to
+            load, or None to load the whole file. A range covers the lines
+            that start within it.
+    """
+
     _path: Path
     _schema: Schema
     _batch_size: int
+    _num_workers: int
+    _preserve_order: bool
+    _byte_range: tuple[int, int] | None
+    _sorted_by: list[str]
 
     def __init__(
-        self, path: Path, schema: Schema, batch_size: int = 1_000
+        self,
+        path: Path,
+        schema: Schema,
+        batch_size: int = 1_000,
+        num_workers: int = 1,
+        preserve_order: bool = True,
+        byte_range: tuple[int, int] | None = None,
+        sorted_by: list[str] | None = None,
     ) -> None:
         self._path = path
         self._schema = schema
         self._batch_size = batch_size
+        self._num_workers = num_workers
+        self._preserve_order = preserve_order
+        self._byte_range = byte_range
+        self._sorted_by = sorted_by or []
 
     def get_schema(self) -> Schema:
         return self._schema
@@ -41,33 +156,357 @@ class CsvLoader(DataLoader):
     def get_source_name(self) -> str:
         return str(self._path)
 
-    def load(self, projection: list[str]) -> Generator[RowBatch, None, None]:
+    def get_source_state(self) -> Hashable | None:
+        return _get_file_state(self._path)
+
+    def get_num_workers(self) -> int:
+        return self._num_workers
+
+    def get_sort_order(self) -> list[str]:
+        if self._num_workers > 1 and not self._preserve_order:
+            return []
+        return self._sorted_by
+
+    def get_partitions(self) -> list[DataLoader]:
+        """Splits the file into byte ranges that can be loaded separately.
+
+        Returns:
+            Single-worker loaders for the byte ranges, in file order.
+        """
+        file_size = os.path.getsize(self._path)
+        num_partitions = max(
+            self._num_workers, -(-file_size // _MAX_PARTITION_SIZE)
+        )
+        partition_size = max(1, -(-file_size // num_partitions))
+        return [
+            CsvLoader(
+                self._path,
+                self._schema,
+                self._batch_size,
+                byte_range=(start, min(start + partition_size, file_size)),
+                sorted_by=self._sorted_by,
+            )
+            for start in range(0, file_size, partition_size)
+        ]
+
+    def load(
+        self, projection: list[str], predicate: ScanPredicate | None = None
+    ) -> Generator[RowBatch, None, None]:
+        if self._num_workers > 1:
+            yield from self._load_in_parallel(projection, predicate)
+            return
+
+        if self._byte_range is not None:
+            header, text = self._read_byte_range()
+            reader = csv.reader(io.StringIO(text, newline=""))
+            yield from self._load_rows(header, reader, projection, predicate)
+            return
+
+        with open(self._path, newline="") as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader, None)
+            yield from self._load_rows(header, reader, projection, predicate)
+
+    def _load_in_parallel(
+        self, projection: list[str], predicate: ScanPredicate | None
+    ) -> Generator[RowBatch, None, None]:
+        # At most two partitions per worker are loaded ahead of the consumer.
+        max_pending = 2 * self._num_workers
+        partitions = iter(self.get_partitions())
+        pending: deque[Future] = deque()
+        executor = ProcessPoolExecutor(self._num_workers)
+        try:
+            while True:
+                while len(pending) < max_pending:
+                    partition = next(partitions, None)
+                    if partition is None:
+                        break
+                    pending.append(
+                        executor.submit(
+                            _load_partition, partition, projection, predicate
+                        )
+                    )
+                if not pending:
+                    return
+
+                if self._preserve_order:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+                yield from future.result()
+        finally:
+            # When the consumer stops early, the partitions that are still
+            # being loaded are abandoned instead of waited for.
+            executor.shutdown(wait=not pending, cancel_futures=True)
+
+    def _read_byte_range(self) -> tuple[list[str] | None, str]:
+        assert self._byte_range is not None
+        with open(self._path, "rb") as csv_file:
+            header_line = csv_file.readline()
+            header = next(csv.reader([header_line.decode()]), None)
+            header_end = len(header_line)
+            start = _align_to_line(csv_file, self._byte_range[0], header_end)
+            end = _align_to_line(csv_file, self._byte_range[1], header_end)
+            if start >= end:
+                return header, ""
+            csv_file.seek(start)
+            return header, csv_file.read(end - start).decode()
+
+    def _load_rows(
+        self,
+        header: list[str] | None,
+        reader: Iterator[list[str]],
+        projection: list[str],
+        predicate: ScanPredicate | None,
+    ) -> Generator[RowBatch, None, None]:
+        if header is None:
+            return
         if projection:
             schema = self._schema.select(projection)
         else:
             schema = self._schema
 
-        with open(self._path, newline="") as csv_file:
-            reader = DictReader(csv_file)
-            read_rows = []
-            for num_rows_read, row in enumerate(reader, start=1):
-                read_rows.append(
-                    {
-                        column_name: row[column_name]
-                        for column_name in schema.get_field_names()
-                    }
+        column_names = schema.get_field_names()
+        if predicate is not None:
+            column_names = column_names + predicate.column_names
+        positions = _get_positions(header, column_names)
+        source_state = _get_file_state(self._path)
+        # Blank lines are skipped.
+        rows = filter(None, reader)
+        batch_index = 0
+        while read_rows := list(islice(rows, self._batch_size)):
+            batch_key = (
+                source_state,
+                (self._byte_range, self._batch_size, batch_index),
+            )
+            yield from self._to_row_batches(
+                read_rows, positions, schema, predicate, batch_key
+            )
+            batch_index += 1
+
+    def _to_row_batches(
+        self,
+        read_rows: list[list[str]],
+        positions: dict[str, int],
+        schema: Schema,
+        predicate: ScanPredicate | None,
+        batch_key: tuple[SourceState, Hashable],
+    ) -> Generator[RowBatch, None, None]:
+        if predicate is None:
+            columns = [
+                self._decode_column(
+                    read_rows, positions, column_name, batch_key
+                )
+                for column_name in schema.get_field_names()
+            ]
+            yield RowBatch(schema, columns)
+            return
+
+        # Only the predicate columns are converted for all rows, the other
+        # columns just for the rows that pass the predicate, unless cached.
+        predicate_columns = [
+            self._decode_column(read_rows, positions, column_name, batch_key)
+            for column_name in predicate.column_names
+        ]
+        predicate_batch = RowBatch(
+            self._schema.select(predicate.column_names), predicate_columns
+        )
+        selected = predicate.expr.evaluate(predicate_batch).to_list()
+        selected_row_indices = [i for i, keep in enumerate(selected) if keep]
+        if not selected_row_indices:
+            return
+
+        selected_rows = [read_rows[i] for i in selected_row_indices]
+        columns = []
+        for column_name in schema.get_field_names():
+            if column_name in predicate.column_names:
+                index = predicate.column_names.index(column_name)
+                column = predicate_columns[index]
+            else:
+                column = self._get_cached_column(column_name, batch_key)
+            if column is not None:
+                columns.append(column.take(selected_row_indices))
+            else:
+                columns.append(
+                    _to_column(selected_rows, positions, schema, column_name)
+                )
+        yield RowBatch(schema, columns)
+
+    def _decode_column(
+        self,
+        read_rows: list[list[str]],
+        positions: dict[str, int],
+        column_name: str,
+        batch_key: tuple[SourceState, Hashable],
+    ) -> Column:
+        # Converts a column of a batch, or takes it from the column cache.
+        column = self._get_cached_column(column_name, batch_key)
+        if column is None:
+            column = _to_column(read_rows, positions, self._schema, column_name)
+            source_state, key = self._get_cache_key(column_name, batch_key)
+            get_column_cache().put(source_state, key, column)
+        return column
+
+    def _get_cached_column(
+        self, column_name: str, batch_key: tuple[SourceState, Hashable]
+    ) -> Column | None:
+        source_state, key = self._get_cache_key(column_name, batch_key)
+        return get_column_cache().get(source_state, key)
+
+    def _get_cache_key(
+        self, column_name: str, batch_key: tuple[SourceState, Hashable]
+    ) -> tuple[SourceState, Hashable]:
+        source_state, batch_location = batch_key
+        data_type = self._schema.get_data_type(column_name)
+        return source_state, (batch_location, column_name, data_type)
+
+
+# The maximum size of a byte range that a worker loads at once.
+_MAX_PARTITION_SIZE = 16 * 1024 * 1024
+
+
+def _get_file_state(path: Path) -> SourceState:
+    stat_result = os.stat(path)
+    return str(path), stat_result.st_size, stat_result.st_mtime_ns
+
+
+def _load_partition(
+    partition: DataLoader,
+    projection: list[str],
+    predicate: ScanPredicate | None,
+) -> list[RowBatch]:
+    return list(partition.load(projection, predicate))
+
+
+def _align_to_line(csv_file: BinaryIO, offset: int, header_end: int) -> int:
+    # Returns the offset of the first line after the header that starts at or
+    # after the given offset.
+    if offset <= header_end:
+        return header_end
+    csv_file.seek(offset - 1)
+    csv_file.readline()
+    return csv_file.tell()
+
+
+def _get_positions(
+    header: list[str], column_names: list[str]
+) -> dict[str, int]:
+    positions = {}
+    for column_name in column_names:
+        try:
+            positions[column_name] = header.index(column_name)
+        except ValueError:
+            raise KeyError(f"{column_name} not in the CSV header")
+    return positions
+
+
+def _to_column(
+    read_rows: list[list[str]],
+    positions: dict[str, int],
+    schema: Schema,
+    column_name: str,
+) -> Column:
+    values = list(map(itemgetter(positions[column_name]), read_rows))
+    return Column(schema.get_data_type(column_name), values)
+
+
+class ColumnarFileLoader(DataLoader):
+    """Loads row groups from a columnar file.
+
+    Row groups are skipped when their statistics show that no row passes the
+    predicate. The file is memory-mapped and the columns of the loaded batches
+    refer to the mapped pages without copying them. The mapping is never closed
+    explicitly, it is released once the last column referring to it is
+    garbage collected.
+
+    Attributes:
+        _path: The path of the file.
+        _metadata: The contents of the footer of the file.
+        _sorted_by: The columns that the rows of the file are sorted by, most
+            significant first.
+    """
+
+    _path: Path
+    _metadata: ColumnarFileMetadata
+    _sorted_by: list[str]
+
+    def __init__(self, path: Path, sorted_by: list[str] | None = None) -> None:
+        self._path = path
+        self._sorted_by = sorted_by or []
+        with open(path, "rb") as columnar_file:
+            with mmap.mmap(
+                columnar_file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                self._metadata = read_metadata(data)
+
+    def get_schema(self) -> Schema:
+        return self._metadata.schema
+
+    def get_source_name(self) -> str:
+        return str(self._path)
+
+    def get_source_state(self) -> Hashable | None:
+        return _get_file_state(self._path)
+
+    def get_sort_order(self) -> list[str]:
+        return self._sorted_by
+
+    def load(
+        self, projection: list[str], predicate: ScanPredicate | None = None
+    ) -> Generator[RowBatch, None, None]:
+        schema = self._metadata.schema
+        if projection:
+            projected_schema = schema.select(projection)
+        else:
+            projected_schema = schema
+        with open(self._path, "rb") as columnar_file:
+            data = memoryview(
+                mmap.mmap(columnar_file.fileno(), 0, access=mmap.ACCESS_READ)
+            )
+
+        if predicate is not None:
+            field_names = schema.get_field_names()
+            predicate_indices = [
+                field_names.index(column_name)
+                for column_name in predicate.column_names
+            ]
+
+        for row_group in self._metadata.row_groups:
+            selection = None
+            if predicate is not None:
+                # Files of version 1 have no statistics to skip row groups by.
+                if row_group.statistics is not None and not may_match(
+                    predicate.expr,
+                    [row_group.statistics[i] for i in predicate_indices],
+                ):
+                    continue
+                predicate_schema = schema.select(predicate.column_names)
+                predicate_batch = RowBatch(
+                    predicate_schema,
+                    self._read_columns(data, row_group, predicate_schema),
                 )
-                if num_rows_read % self._batch_size == 0:
-                    yield _to_row_batch(read_rows, schema)
-                    read_rows.clear()
-            if read_rows:
-                yield _to_row_batch(read_rows, schema)
-
-
-def _to_row_batch(read_rows: list[dict], schema: Schema) -> RowBatch:
-    columns = []
-    for column_name in schema.get_field_names():
-        data_type = schema.get_data_type(column_name)
-        values = [read_row[column_name] for read_row in read_rows]
-        columns.append(Column(data_type, values))
-    return RowBatch(schema, columns)
+                selected = predicate.expr.evaluate(predicate_batch).to_list()
+                selection = [i for i, keep in enumerate(selected) if keep]
+                if not selection:
+                    continue
+                if len(selection) == row_group.num_rows:
+                    selection = None
+
+            columns = self._read_columns(data, row_group, projected_schema)
+            yield RowBatch(projected_schema, columns, selection)
+
+    def _read_columns(
+        self, data: memoryview, row_group: RowGroup, schema: Schema
+    ) -> list[Column]:
+        field_names = self._metadata.schema.get_field_names()
+        return [
+            read_column(
+                data,
+                field.data_type,
+                row_group.column_chunks[field_names.index(field.name)],
+                row_group.num_rows,
+            )
+            for field in schema.get_fields()
+        ]
@@ -1,22 +1,144 @@
 from pathlib import Path
 from typing import Generator
 
-from ota.data_loader import CsvLoader
+from ota.columnar_file import write_columnar_file
+from ota.data_loader import ColumnarFileLoader, CsvLoader
+from ota.logical.optimizer.abc import OptimizerRule
 from ota.logical.plan.abc import LogicalPlan
 from ota.logical.plan.builder import LogicalPlanBuilder
 from ota.logical.plan.impls import LogicalScan
+from ota.physical.plan.metrics import format_metrics, instrument
+from ota.query_optimizer import optimize
 from ota.query_planner import create_physical_plan
+from ota.result_cache import ResultCache, get_num_batch_bytes
 from ota.row_batch import RowBatch
 from ota.schema import Schema
 
 
 class ExecutionContext:
-    def csv(self, path: Path, schema: Schema) -> LogicalPlanBuilder:
-        data_loader = CsvLoader(path, schema)
+    """Creates and executes plans.
+
+    Attributes:
+        _optimizer_rules: The rules to optimize plans with, or None for the
+            default rules.
+        _result_cache: The cache of query results, or None to always execute
+            plans.
+    """
+
+    _optimizer_rules: list[OptimizerRule] | None
+    _result_cache: ResultCache | None
+
+    def __init__(
+        self,
+        optimizer_rules: list[OptimizerRule] | None = None,
+        result_cache: ResultCache | None = None,
+    ) -> None:
+        self._optimizer_rules = optimizer_rules
+        self._result_cache = result_cache
+
+    def csv(
+        self,
+        path: Path,
+        schema: Schema,
+        num_workers: int = 1,
+        preserve_order: bool = True,
+        sorted_by: list[str] | None = None,
+    ) -> LogicalPlanBuilder:
+        data_loader = CsvLoader(
+            path,
+            schema,
+            num_workers=num_workers,
+            preserve_order=preserve_order,
+            sorted_by=sorted_by,
+        )
+        return LogicalPlanBuilder(LogicalScan(data_loader, []))
+
+    def columnar(
+        self, path: Path, sorted_by: list[str] | None = None
+    ) -> LogicalPlanBuilder:
+        data_loader = ColumnarFileLoader(path, sorted_by)
         return LogicalPlanBuilder(LogicalScan(data_loader, []))
 
+    def get_result_cache(self) -> ResultCache | None:
+        return self._result_cache
+
     def execute(
         self, logical_plan: LogicalPlan
     ) -> Generator[RowBatch, None, None]:
+        """Executes a plan, or returns its cached result.
+
+        A result is cached once all of its batches have been consumed. Its
+        batches are kept while they fit into the size budget of the cache, and
+        a larger result is neither kept nor cached.
+
+        Args:
+            logical_plan: The plan.
+        Returns:
+            A generator of the batches of the result.
+        """
+        result_cache = self._result_cache
+        if result_cache is None:
+            yield from self._execute(logical_plan)
+            return
+        key = result_cache.get_key(logical_plan)
+        if key is None:
+            yield from self._execute(logical_plan)
+            return
+
+        batches = result_cache.get(key)
+        if batches is not None:
+            yield from batches
+            return
+
+        buffered_batches: list[RowBatch] | None = []
+        num_bytes = 0
+        for batch in self._execute(logical_plan):
+            if buffered_batches is not None:
+                num_bytes += get_num_batch_bytes(batch)
+                if num_bytes > result_cache.get_max_bytes():
+                    buffered_batches = None
+                else:
+                    buffered_batches.append(batch)
+            yield batch
+        if buffered_batches is not None:
+            result_cache.put(key, buffered_batches)
+
+    def explain(self, logical_plan: LogicalPlan, analyze: bool = False) -> str:
+        """Returns the physical plan that a logical plan is executed with.
+
+        Args:
+            logical_plan: The plan.
+            analyze: Whether to execute the plan and annotate every operator
+                with its elapsed time, inclusive and exclusive of its inputs,
+                and the rows and batches that it consumed and produced.
+        Returns:
+            The physical plan as text, one line per operator.
+        """
+        logical_plan = optimize(logical_plan, self._optimizer_rules)
+        physical_plan = create_physical_plan(logical_plan)
+        if not analyze:
+            return physical_plan.format()
+
+        instrumented_plan = instrument(physical_plan)
+        for _ in instrumented_plan.execute():
+            pass
+        return format_metrics(instrumented_plan)
+
+    def _execute(
+        self, logical_plan: LogicalPlan
+    ) -> Generator[RowBatch, None, None]:
+        logical_plan = optimize(logical_plan, self._optimizer_rules)
         physical_plan = create_physical_plan(logical_plan)
-        yield from physical_plan.execute()
+        for batch in physical_plan.execute():
+            yield batch.compact()
+
+    def write_columnar(self, logical_plan: LogicalPlan, path: Path) -> None:
+        """Executes a plan and writes the result into a columnar file.
+
+        Args:
+            logical_plan: The plan.
+            path: The path of the file.
+        """
+        write_columnar_file(
+            path, logical_plan.get_schema(), self.execute(logical_plan)
+        )
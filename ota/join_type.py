@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class JoinType(Enum):
+    """Join types.
+
+    Inner joins produce the pairs of matching left and right rows, and left
+    joins also the left rows without a match. Semi and anti joins produce the
+    left rows with and without a match, respectively.
+    """
+
+    Inner = 1
+    Left = 2
+    Semi = 3
+    Anti = 4
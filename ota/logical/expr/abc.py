@@ -11,6 +11,20 @@ class LogicalExpr(ABC):
     @abstractmethod
     def to_schema_field(self, plan: LogicalPlan) -> SchemaField: ...
 
+    @abstractmethod
+    def get_children(self) -> list["LogicalExpr"]: ...
+
+    def get_column_names(self) -> set[str]:
+        """Returns the names of the columns that the expression references.
+
+        Returns:
+            The column names.
+        """
+        column_names = set()
+        for child in self.get_children():
+            column_names |= child.get_column_names()
+        return column_names
+
 
 class LogicalBinaryExpr(LogicalExpr):
     _operator: str
@@ -33,6 +47,9 @@ class LogicalBinaryExpr(LogicalExpr):
     @abstractmethod
     def to_schema_field(self, plan: LogicalPlan) -> SchemaField: ...
 
+    def get_children(self) -> list[LogicalExpr]:
+        return [self._left_operand, self._right_operand]
+
     def get_left_operand(self) -> LogicalExpr:
         return self._left_operand
 
@@ -91,5 +108,8 @@ class LogicalAggregateExpr(LogicalExpr):
             self._name, self._expr.to_schema_field(plan).data_type
         )
 
+    def get_children(self) -> list[LogicalExpr]:
+        return [self._expr]
+
     def get_expr(self) -> LogicalExpr:
         return self._expr
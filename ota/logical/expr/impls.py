@@ -24,6 +24,12 @@ class LogicalColumnExpr(LogicalExpr):
             plan.get_schema().get_data_type(self._column_name),
         )
 
+    def get_children(self) -> list[LogicalExpr]:
+        return []
+
+    def get_column_names(self) -> set[str]:
+        return {self._column_name}
+
     def get_column_name(self) -> str:
         return self._column_name
 
@@ -160,6 +166,54 @@ class LogicalLiteralIntExpr(LogicalExpr):
     def to_schema_field(self, plan: LogicalPlan) -> SchemaField:
         return SchemaField(str(self._number), DataType.Int)
 
+    def get_children(self) -> list[LogicalExpr]:
+        return []
+
+
+class LogicalLiteralBoolExpr(LogicalExpr):
+    _value: bool
+
+    def __init__(self, value: bool) -> None:
+        self._value = value
+
+    def __str__(self) -> str:
+        return str(self._value).upper()
+
+    def get_value(self) -> bool:
+        return self._value
+
+    def to_schema_field(self, plan: LogicalPlan) -> SchemaField:
+        return SchemaField(str(self), DataType.Bool)
+
+    def get_children(self) -> list[LogicalExpr]:
+        return []
+
+
+class LogicalAliasExpr(LogicalExpr):
+    _expr: LogicalExpr
+    _name: str
+
+    def __init__(self, expr: LogicalExpr, name: str) -> None:
+        self._expr = expr
+        self._name = name
+
+    def __str__(self) -> str:
+        return f"{self._expr} AS {self._name}"
+
+    def to_schema_field(self, plan: LogicalPlan) -> SchemaField:
+        return SchemaField(
+            self._name, self._expr.to_schema_field(plan).data_type
+        )
+
+    def get_children(self) -> list[LogicalExpr]:
+        return [self._expr]
+
+    def get_expr(self) -> LogicalExpr:
+        return self._expr
+
+    def get_name(self) -> str:
+        return self._name
+
 
 class LogicalAggregateExprSum(LogicalAggregateExpr):
     def __init__(self, expr: LogicalExpr) -> None:
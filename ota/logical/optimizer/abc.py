@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+
+from ota.logical.plan.abc import LogicalPlan
+
+
+class OptimizerRule(ABC):
+    """A rewrite of a logical plan into an equivalent, cheaper plan."""
+
+    @abstractmethod
+    def __str__(self) -> str: ...
+
+    @abstractmethod
+    def optimize(self, plan: LogicalPlan) -> LogicalPlan:
+        """Rewrites a logical plan.
+
+        Args:
+            plan: The plan.
+        Returns:
+            A plan producing the same rows as the given plan.
+        """
@@ -0,0 +1,387 @@
+import operator
+from typing import Any, Callable
+
+from ota.join_type import JoinType
+from ota.logical.expr.abc import (
+    LogicalAggregateExpr,
+    LogicalBinaryExpr,
+    LogicalExpr,
+)
+from ota.logical.expr.impls import (
+    LogicalAliasExpr,
+    LogicalBooleanExprAnd,
+    LogicalBooleanExprEq,
+    LogicalBooleanExprGt,
+    LogicalBooleanExprGtEq,
+    LogicalBooleanExprLt,
+    LogicalBooleanExprLtEq,
+    LogicalBooleanExprNeq,
+    LogicalBooleanExprOr,
+    LogicalLiteralBoolExpr,
+    LogicalLiteralIntExpr,
+    LogicalMathExprAdd,
+    LogicalMathExprDivide,
+    LogicalMathExprModulo,
+    LogicalMathExprMultiply,
+    LogicalMathExprSubtract,
+)
+from ota.logical.plan.abc import LogicalPlan
+from ota.logical.plan.impls import (
+    LogicalAggregate,
+    LogicalEmptyRelation,
+    LogicalJoin,
+    LogicalLimit,
+    LogicalProjection,
+    LogicalScan,
+    LogicalSelection,
+    LogicalSort,
+)
+from ota.schema import DataType
+
+from .abc import OptimizerRule
+
+
+class ConstantFoldingRule(OptimizerRule):
+    """Simplifies expressions and removes selections that are constant.
+
+    Literal subexpressions are evaluated, identities such as ``x * 1`` and
+    ``TRUE AND p`` are removed, selections that are always true are dropped
+    and selections that are always false are replaced with an empty relation.
+    Expressions whose output column name would change are aliased to keep the
+    schema of the plan unchanged.
+    """
+
+    def __str__(self) -> str:
+        return "ConstantFolding"
+
+    def optimize(self, plan: LogicalPlan) -> LogicalPlan:
+        plan = plan.with_children(
+            [self.optimize(child) for child in plan.get_children()]
+        )
+        match plan:
+            case LogicalProjection():
+                input_plan = plan.get_input_plan()
+                exprs = [
+                    _simplify_keeping_name(expr, input_plan)
+                    for expr in plan.get_exprs()
+                ]
+                return LogicalProjection(input_plan, exprs)
+            case LogicalSelection():
+                input_plan = plan.get_input_plan()
+                expr = _simplify(plan.get_expr(), input_plan)
+                if isinstance(expr, LogicalLiteralBoolExpr):
+                    return _select_all_or_nothing(input_plan, expr)
+                return LogicalSelection(input_plan, expr)
+            case LogicalAggregate():
+                input_plan = plan.get_input_plan()
+                grouping_exprs = [
+                    _simplify_keeping_name(expr, input_plan)
+                    for expr in plan.get_grouping_exprs()
+                ]
+                aggregation_exprs = [
+                    _simplify(expr, input_plan)
+                    for expr in plan.get_aggregation_exprs()
+                ]
+                return LogicalAggregate(
+                    input_plan,
+                    grouping_exprs,
+                    aggregation_exprs,
+                    plan.get_max_groups_in_memory(),
+                )
+            case LogicalScan() if plan.get_predicate() is not None:
+                unfiltered_scan = LogicalScan(
+                    plan.get_data_loader(), plan.get_projection()
+                )
+                expr = _simplify(plan.get_predicate(), unfiltered_scan)
+                if isinstance(expr, LogicalLiteralBoolExpr):
+                    return _select_all_or_nothing(unfiltered_scan, expr)
+                return LogicalScan(
+                    plan.get_data_loader(), plan.get_projection(), expr
+                )
+            case _:
+                return plan
+
+
+class PredicatePushdownRule(OptimizerRule):
+    """Moves selections directly above a scan into the scan's predicate."""
+
+    def __str__(self) -> str:
+        return "PredicatePushdown"
+
+    def optimize(self, plan: LogicalPlan) -> LogicalPlan:
+        plan = plan.with_children(
+            [self.optimize(child) for child in plan.get_children()]
+        )
+        if not isinstance(plan, LogicalSelection):
+            return plan
+        scan = plan.get_input_plan()
+        if not isinstance(scan, LogicalScan):
+            return plan
+
+        predicate = plan.get_expr()
+        if scan.get_predicate() is not None:
+            predicate = LogicalBooleanExprAnd(scan.get_predicate(), predicate)
+        return LogicalScan(
+            scan.get_data_loader(), scan.get_projection(), predicate
+        )
+
+
+class ProjectionPushdownRule(OptimizerRule):
+    """Restricts the scans to the columns that the plan references."""
+
+    def __str__(self) -> str:
+        return "ProjectionPushdown"
+
+    def optimize(self, plan: LogicalPlan) -> LogicalPlan:
+        return self._push_down(plan, None)
+
+    def _push_down(
+        self, plan: LogicalPlan, required_columns: set[str] | None
+    ) -> LogicalPlan:
+        # None means that all columns of the plan are required.
+        child_required_columns: set[str] | None
+        match plan:
+            case LogicalScan():
+                return _project_scan(plan, required_columns)
+            case LogicalProjection():
+                child_required_columns = _get_column_names(plan.get_exprs())
+            case LogicalSelection():
+                if required_columns is None:
+                    child_required_columns = None
+                else:
+                    child_required_columns = (
+                        required_columns | plan.get_expr().get_column_names()
+                    )
+            case LogicalSort():
+                if required_columns is None:
+                    child_required_columns = None
+                else:
+                    child_required_columns = required_columns | (
+                        _get_column_names(plan.get_sort_exprs())
+                    )
+            case LogicalLimit():
+                child_required_columns = required_columns
+            case LogicalJoin():
+                return plan.with_children(
+                    [
+                        self._push_down(child, child_required_columns)
+                        for child, child_required_columns in zip(
+                            plan.get_children(),
+                            _get_join_required_columns(plan, required_columns),
+                        )
+                    ]
+                )
+            case LogicalAggregate():
+                child_required_columns = _get_column_names(
+                    plan.get_grouping_exprs() + plan.get_aggregation_exprs()
+                )
+            case _:
+                child_required_columns = None
+
+        return plan.with_children(
+            [
+                self._push_down(child, child_required_columns)
+                for child in plan.get_children()
+            ]
+        )
+
+
+def _get_column_names(exprs: list[LogicalExpr]) -> set[str]:
+    column_names = set()
+    for expr in exprs:
+        column_names |= expr.get_column_names()
+    return column_names
+
+
+def _get_join_required_columns(
+    join: LogicalJoin, required_columns: set[str] | None
+) -> tuple[set[str] | None, set[str] | None]:
+    # Returns the columns required from the left and the right input. The
+    # right columns aren't part of the output of semi and anti joins.
+    left_required_columns = _get_column_names(join.get_left_keys())
+    right_required_columns = _get_column_names(join.get_right_keys())
+    outputs_right_columns = join.get_join_type() in (
+        JoinType.Inner,
+        JoinType.Left,
+    )
+    if required_columns is None:
+        if outputs_right_columns:
+            return None, None
+        return None, right_required_columns
+
+    left_column_names = join.get_left_plan().get_schema().get_field_names()
+    left_required_columns |= required_columns & set(left_column_names)
+    if outputs_right_columns:
+        right_column_names = set(
+            join.get_right_plan().get_schema().get_field_names()
+        )
+        right_required_columns |= required_columns & right_column_names
+    return left_required_columns, right_required_columns
+
+
+def _project_scan(
+    scan: LogicalScan, required_columns: set[str] | None
+) -> LogicalScan:
+    if required_columns is None:
+        return scan
+
+    predicate = scan.get_predicate()
+    if predicate is not None:
+        required_columns = required_columns | predicate.get_column_names()
+    field_names = scan.get_schema().get_field_names()
+    projection = [name for name in field_names if name in required_columns]
+    if not projection:
+        # A batch needs at least one column to have a number of rows.
+        projection = field_names[:1]
+    if projection == field_names:
+        return scan
+    return LogicalScan(scan.get_data_loader(), projection, predicate)
+
+
+_FOLDABLE_INT_OPERATORS: dict[type, Callable[[Any, Any], Any]] = {
+    LogicalMathExprAdd: operator.add,
+    LogicalMathExprSubtract: operator.sub,
+    LogicalMathExprMultiply: operator.mul,
+    LogicalMathExprDivide: lambda left, right: int(left / right),
+    LogicalMathExprModulo: operator.mod,
+    LogicalBooleanExprEq: operator.eq,
+    LogicalBooleanExprNeq: operator.ne,
+    LogicalBooleanExprGt: operator.gt,
+    LogicalBooleanExprGtEq: operator.ge,
+    LogicalBooleanExprLt: operator.lt,
+    LogicalBooleanExprLtEq: operator.le,
+}
+
+
+def _select_all_or_nothing(
+    input_plan: LogicalPlan, expr: LogicalLiteralBoolExpr
+) -> LogicalPlan:
+    if expr.get_value():
+        return input_plan
+    return LogicalEmptyRelation(input_plan.get_schema())
+
+
+def _simplify_keeping_name(
+    expr: LogicalExpr, input_plan: LogicalPlan
+) -> LogicalExpr:
+    simplified_expr = _simplify(expr, input_plan)
+    if simplified_expr is expr:
+        return expr
+    name = expr.to_schema_field(input_plan).name
+    if simplified_expr.to_schema_field(input_plan).name != name:
+        return LogicalAliasExpr(simplified_expr, name)
+    return simplified_expr
+
+
+def _simplify(expr: LogicalExpr, input_plan: LogicalPlan) -> LogicalExpr:
+    match expr:
+        case LogicalBinaryExpr():
+            left = _simplify(expr.get_left_operand(), input_plan)
+            right = _simplify(expr.get_right_operand(), input_plan)
+            simplified_expr = _simplify_binary(
+                type(expr), left, right, input_plan
+            )
+            if simplified_expr is not None:
+                return simplified_expr
+            if (
+                left is expr.get_left_operand()
+                and right is expr.get_right_operand()
+            ):
+                return expr
+            return type(expr)(left, right)
+        case LogicalAggregateExpr():
+            child = _simplify(expr.get_expr(), input_plan)
+            return expr if child is expr.get_expr() else type(expr)(child)
+        case LogicalAliasExpr():
+            child = _simplify(expr.get_expr(), input_plan)
+            if child is expr.get_expr():
+                return expr
+            return LogicalAliasExpr(child, expr.get_name())
+        case _:
+            return expr
+
+
+def _simplify_binary(
+    expr_type: type,
+    left: LogicalExpr,
+    right: LogicalExpr,
+    input_plan: LogicalPlan,
+) -> LogicalExpr | None:
+    # Returns None when the expression can't be simplified. Simplifications
+    # that would hide a type mismatch are left for execution to report.
+    left_value = _get_literal_value(left)
+    right_value = _get_literal_value(right)
+
+    if left_value is not None and right_value is not None:
+        if type(left_value) is not type(right_value):
+            return None
+        if expr_type in (LogicalBooleanExprAnd, LogicalBooleanExprOr):
+            if type(left_value) is int:
+                left_value, right_value = left_value == 1, right_value == 1
+            if expr_type is LogicalBooleanExprAnd:
+                return LogicalLiteralBoolExpr(left_value and right_value)
+            return LogicalLiteralBoolExpr(left_value or right_value)
+        if type(left_value) is not int:
+            return None
+        if expr_type not in _FOLDABLE_INT_OPERATORS:
+            return None
+        if (
+            expr_type in (LogicalMathExprDivide, LogicalMathExprModulo)
+            and right_value == 0
+        ):
+            return None
+        return _to_literal(
+            _FOLDABLE_INT_OPERATORS[expr_type](left_value, right_value)
+        )
+
+    if left_value is None and right_value is None:
+        return None
+    if left_value is not None:
+        literal_value, other = left_value, right
+    else:
+        literal_value, other = right_value, left
+    if _get_data_type(other, input_plan) != _get_literal_data_type(
+        literal_value
+    ):
+        return None
+
+    if type(literal_value) is int:
+        if expr_type is LogicalMathExprAdd and literal_value == 0:
+            return other
+        if expr_type is LogicalMathExprMultiply and literal_value == 1:
+            return other
+        if expr_type is LogicalMathExprSubtract and right_value == 0:
+            return other
+        if expr_type is LogicalMathExprDivide and right_value == 1:
+            return other
+    else:
+        if expr_type is LogicalBooleanExprAnd:
+            return other if literal_value else LogicalLiteralBoolExpr(False)
+        if expr_type is LogicalBooleanExprOr:
+            return LogicalLiteralBoolExpr(True) if literal_value else other
+    return None
+
+
+def _get_literal_value(expr: LogicalExpr) -> int | bool | None:
+    if isinstance(expr, (LogicalLiteralIntExpr, LogicalLiteralBoolExpr)):
+        return expr.get_value()
+    return None
+
+
+def _get_literal_data_type(value: int | bool) -> DataType:
+    return DataType.Bool if type(value) is bool else DataType.Int
+
+
+def _to_literal(value: int | bool) -> LogicalExpr:
+    if type(value) is bool:
+        return LogicalLiteralBoolExpr(value)
+    return LogicalLiteralIntExpr(value)
+
+
+def _get_data_type(
+    expr: LogicalExpr, input_plan: LogicalPlan
+) -> DataType | None:
+    try:
+        return expr.to_schema_field(input_plan).data_type
+    except KeyError:
+        return None
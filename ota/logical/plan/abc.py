@@ -13,6 +13,16 @@ class LogicalPlan(ABC):
     @abstractmethod
     def get_children(self) -> list["LogicalPlan"]: ...
 
+    @abstractmethod
+    def with_children(self, children: list["LogicalPlan"]) -> "LogicalPlan":
+        """Returns a copy of the plan with its children replaced.
+
+        Args:
+            children: The new children, in the order of get_children().
+        Returns:
+            A plan.
+        """
+
     def format(self) -> str:
         return _format_plan(self, 0)
 
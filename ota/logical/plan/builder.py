@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+from ota.join_type import JoinType
 from ota.logical.expr.abc import LogicalAggregateExpr, LogicalExpr
 from ota.schema import Schema
 
 from .abc import LogicalPlan
-from .impls import LogicalAggregate, LogicalProjection, LogicalSelection
+from .impls import (
+    LogicalAggregate,
+    LogicalJoin,
+    LogicalLimit,
+    LogicalProjection,
+    LogicalSelection,
+    LogicalSort,
+)
 
 
 class LogicalPlanBuilder:
@@ -29,7 +37,75 @@ class LogicalPlanBuilder:
         self,
         grouping_exprs: list[LogicalExpr],
         aggregation_exprs: list[LogicalAggregateExpr],
+        max_groups_in_memory: int | None = None,
     ) -> LogicalPlanBuilder:
         return LogicalPlanBuilder(
-            LogicalAggregate(self._plan, grouping_exprs, aggregation_exprs)
+            LogicalAggregate(
+                self._plan,
+                grouping_exprs,
+                aggregation_exprs,
+                max_groups_in_memory,
+            )
+        )
+
+    def order_by(
+        self,
+        exprs: list[LogicalExpr],
+        ascending: bool | list[bool] = True,
+        max_rows_in_memory: int | None = None,
+    ) -> LogicalPlanBuilder:
+        """Orders the rows by sort keys.
+
+        Args:
+            exprs: The sort key expressions, most significant first.
+            ascending: Whether the sort keys are sorted in ascending order,
+                for all keys or for each key.
+            max_rows_in_memory: The number of rows above which sorted runs
+                are spilled to temporary files and merged, or None to sort
+                the whole input in memory.
+        Returns:
+            A builder of the sorted plan.
+        """
+        if isinstance(ascending, bool):
+            ascending = [ascending] * len(exprs)
+        return LogicalPlanBuilder(
+            LogicalSort(self._plan, exprs, ascending, max_rows_in_memory)
+        )
+
+    def limit(self, limit: int) -> LogicalPlanBuilder:
+        return LogicalPlanBuilder(LogicalLimit(self._plan, limit))
+
+    def join(
+        self,
+        right: LogicalPlanBuilder,
+        left_keys: list[LogicalExpr],
+        right_keys: list[LogicalExpr],
+        join_type: JoinType = JoinType.Inner,
+        max_build_rows_in_memory: int | None = None,
+    ) -> LogicalPlanBuilder:
+        """Joins the plan with another one by equal keys.
+
+        The hash table is built from the right plan, so it should be the
+        smaller one.
+
+        Args:
+            right: A builder of the right plan.
+            left_keys: The key expressions of this plan.
+            right_keys: The key expressions of the right plan.
+            join_type: The join type.
+            max_build_rows_in_memory: The number of right rows above which
+                both plans are partitioned to disk, or None to keep all right
+                rows in memory.
+        Returns:
+            A builder of the joined plan.
+        """
+        return LogicalPlanBuilder(
+            LogicalJoin(
+                self._plan,
+                right.get_logical_plan(),
+                left_keys,
+                right_keys,
+                join_type,
+                max_build_rows_in_memory,
+            )
         )
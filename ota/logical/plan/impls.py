@@ -1,6 +1,7 @@
 from ota.data_loader import DataLoader
+from ota.join_type import JoinType
 from ota.logical.expr.abc import LogicalAggregateExpr, LogicalExpr
-from ota.schema import Schema
+from ota.schema import DataType, Schema, SchemaField
 
 from .abc import LogicalPlan
 
@@ -8,11 +9,18 @@ from .abc import LogicalPlan
 class LogicalScan(LogicalPlan):
     _data_loader: DataLoader
     _projection: list[str]
+    _predicate: LogicalExpr | None
     _schema: Schema
 
-    def __init__(self, data_loader: DataLoader, projection: list[str]) -> None:
+    def __init__(
+        self,
+        data_loader: DataLoader,
+        projection: list[str],
+        predicate: LogicalExpr | None = None,
+    ) -> None:
         self._data_loader = data_loader
         self._projection = projection
+        self._predicate = predicate
         if len(projection) == 0:
             self._schema = self._data_loader.get_schema()
         else:
@@ -20,7 +28,10 @@ class LogicalScan(LogicalPlan):
 
     def __str__(self) -> str:
         source_name = self._data_loader.get_source_name()
-        return f"Scan: {source_name}, projection={self._projection}"
+        scan_str = f"Scan: {source_name}, projection={self._projection}"
+        if self._predicate is not None:
+            scan_str += f", predicate={self._predicate}"
+        return scan_str
 
     def get_schema(self) -> Schema:
         return self._schema
@@ -28,12 +39,39 @@ class LogicalScan(LogicalPlan):
     def get_children(self) -> list[LogicalPlan]:
         return []
 
+    def with_children(self, children: list[LogicalPlan]) -> LogicalPlan:
+        return self
+
     def get_data_loader(self) -> DataLoader:
         return self._data_loader
 
     def get_projection(self) -> list[str]:
         return self._projection
 
+    def get_predicate(self) -> LogicalExpr | None:
+        return self._predicate
+
+
+class LogicalEmptyRelation(LogicalPlan):
+    """A plan that produces no rows."""
+
+    _schema: Schema
+
+    def __init__(self, schema: Schema) -> None:
+        self._schema = schema
+
+    def __str__(self) -> str:
+        return "EmptyRelation"
+
+    def get_schema(self) -> Schema:
+        return self._schema
+
+    def get_children(self) -> list[LogicalPlan]:
+        return []
+
+    def with_children(self, children: list[LogicalPlan]) -> LogicalPlan:
+        return self
+
 
 class LogicalProjection(LogicalPlan):
     _input_plan: LogicalPlan
@@ -56,6 +94,10 @@ class LogicalProjection(LogicalPlan):
     def get_children(self) -> list[LogicalPlan]:
         return [self._input_plan]
 
+    def with_children(self, children: list[LogicalPlan]) -> LogicalPlan:
+        (input_plan,) = children
+        return LogicalProjection(input_plan, self._exprs)
+
     def get_input_plan(self) -> LogicalPlan:
         return self._input_plan
 
@@ -80,6 +122,10 @@ class LogicalSelection(LogicalPlan):
     def get_children(self) -> list["LogicalPlan"]:
         return [self._input_plan]
 
+    def with_children(self, children: list[LogicalPlan]) -> LogicalPlan:
+        (input_plan,) = children
+        return LogicalSelection(input_plan, self._expr)
+
     def get_input_plan(self) -> LogicalPlan:
         return self._input_plan
 
@@ -88,19 +134,32 @@ class LogicalSelection(LogicalPlan):
 
 
 class LogicalAggregate(LogicalPlan):
+    """Groups rows and computes aggregates of the groups.
+
+    Attributes:
+        _input_plan: The input.
+        _grouping_exprs: The grouping key expressions.
+        _aggregation_exprs: The aggregate expressions.
+        _max_groups_in_memory: The number of groups above which groups are
+            spilled to disk, or None to keep all groups in memory.
+    """
+
     _input_plan: LogicalPlan
     _grouping_exprs: list[LogicalExpr]
     _aggregation_exprs: list[LogicalAggregateExpr]
+    _max_groups_in_memory: int | None
 
     def __init__(
         self,
         input_plan: LogicalPlan,
         grouping_exprs: list[LogicalExpr],
         aggregation_exprs: list[LogicalAggregateExpr],
+        max_groups_in_memory: int | None = None,
     ) -> None:
         self._input_plan = input_plan
         self._grouping_exprs = grouping_exprs
         self._aggregation_exprs = aggregation_exprs
+        self._max_groups_in_memory = max_groups_in_memory
 
     def __str__(self) -> str:
         return (
@@ -119,6 +178,15 @@ class LogicalAggregate(LogicalPlan):
     def get_children(self) -> list["LogicalPlan"]:
         return [self._input_plan]
 
+    def with_children(self, children: list[LogicalPlan]) -> LogicalPlan:
+        (input_plan,) = children
+        return LogicalAggregate(
+            input_plan,
+            self._grouping_exprs,
+            self._aggregation_exprs,
+            self._max_groups_in_memory,
+        )
+
     def get_input_plan(self) -> LogicalPlan:
         return self._input_plan
 
@@ -127,3 +195,209 @@ class LogicalAggregate(LogicalPlan):
 
     def get_aggregation_exprs(self) -> list[LogicalAggregateExpr]:
         return self._aggregation_exprs
+
+    def get_max_groups_in_memory(self) -> int | None:
+        return self._max_groups_in_memory
+
+
+class LogicalSort(LogicalPlan):
+    """Orders rows by sort key expressions.
+
+    Attributes:
+        _input_plan: The input.
+        _sort_exprs: The sort key expressions, most significant first.
+        _ascending: Whether each sort key is sorted in ascending order.
+        _max_rows_in_memory: The number of rows above which sorted runs are
+            spilled to disk, or None to sort the whole input in memory.
+    """
+
+    _input_plan: LogicalPlan
+    _sort_exprs: list[LogicalExpr]
+    _ascending: list[bool]
+    _max_rows_in_memory: int | None
+
+    def __init__(
+        self,
+        input_plan: LogicalPlan,
+        sort_exprs: list[LogicalExpr],
+        ascending: list[bool],
+        max_rows_in_memory: int | None = None,
+    ) -> None:
+        if len(sort_exprs) != len(ascending):
+            raise RuntimeError("Every sort key needs a sort direction")
+        self._input_plan = input_plan
+        self._sort_exprs = sort_exprs
+        self._ascending = ascending
+        self._max_rows_in_memory = max_rows_in_memory
+
+    def __str__(self) -> str:
+        return (
+            f"Sort: sortExprs={self._sort_exprs}, ascending={self._ascending}"
+        )
+
+    def get_schema(self) -> Schema:
+        return self._input_plan.get_schema()
+
+    def get_children(self) -> list[LogicalPlan]:
+        return [self._input_plan]
+
+    def with_children(self, children: list[LogicalPlan]) -> LogicalPlan:
+        (input_plan,) = children
+        return LogicalSort(
+            input_plan,
+            self._sort_exprs,
+            self._ascending,
+            self._max_rows_in_memory,
+        )
+
+    def get_input_plan(self) -> LogicalPlan:
+        return self._input_plan
+
+    def get_sort_exprs(self) -> list[LogicalExpr]:
+        return self._sort_exprs
+
+    def get_ascending(self) -> list[bool]:
+        return self._ascending
+
+    def get_max_rows_in_memory(self) -> int | None:
+        return self._max_rows_in_memory
+
+
+class LogicalLimit(LogicalPlan):
+    """Passes on the first rows of the input.
+
+    Attributes:
+        _input_plan: The input.
+        _limit: The maximum number of rows.
+    """
+
+    _input_plan: LogicalPlan
+    _limit: int
+
+    def __init__(self, input_plan: LogicalPlan, limit: int) -> None:
+        if limit < 0:
+            raise RuntimeError("Limit must not be negative")
+        self._input_plan = input_plan
+        self._limit = limit
+
+    def __str__(self) -> str:
+        return f"Limit: {self._limit}"
+
+    def get_schema(self) -> Schema:
+        return self._input_plan.get_schema()
+
+    def get_children(self) -> list[LogicalPlan]:
+        return [self._input_plan]
+
+    def with_children(self, children: list[LogicalPlan]) -> LogicalPlan:
+        (input_plan,) = children
+        return LogicalLimit(input_plan, self._limit)
+
+    def get_input_plan(self) -> LogicalPlan:
+        return self._input_plan
+
+    def get_limit(self) -> int:
+        return self._limit
+
+
+class LogicalJoin(LogicalPlan):
+    """Joins two inputs by equal keys.
+
+    Inner and left joins produce the columns of the left input followed by the
+    columns of the right input, whose names must differ. As columns can't hold
+    missing values, left joins fill the right columns of left rows without a
+    match with 0 or False and add a Bool column named "matched" that tells
+    these rows apart. Semi and anti joins produce the left columns.
+
+    Attributes:
+        _left_plan: The left input.
+        _right_plan: The right input, which the hash table is built from.
+        _left_keys: The key expressions of the left input.
+        _right_keys: The key expressions of the right input.
+        _join_type: The join type.
+        _max_build_rows_in_memory: The number of right rows above which both
+            inputs are partitioned to disk, or None to keep all right rows in
+            memory.
+    """
+
+    _left_plan: LogicalPlan
+    _right_plan: LogicalPlan
+    _left_keys: list[LogicalExpr]
+    _right_keys: list[LogicalExpr]
+    _join_type: JoinType
+    _max_build_rows_in_memory: int | None
+
+    def __init__(
+        self,
+        left_plan: LogicalPlan,
+        right_plan: LogicalPlan,
+        left_keys: list[LogicalExpr],
+        right_keys: list[LogicalExpr],
+        join_type: JoinType = JoinType.Inner,
+        max_build_rows_in_memory: int | None = None,
+    ) -> None:
+        if not left_keys or len(left_keys) != len(right_keys):
+            raise RuntimeError("A join needs pairs of left and right keys")
+        self._left_plan = left_plan
+        self._right_plan = right_plan
+        self._left_keys = left_keys
+        self._right_keys = right_keys
+        self._join_type = join_type
+        self._max_build_rows_in_memory = max_build_rows_in_memory
+
+        column_names = self.get_schema().get_field_names()
+        for column_name in column_names:
+            if column_names.count(column_name) > 1:
+                raise RuntimeError(f"Duplicate column in join: {column_name}")
+
+    def __str__(self) -> str:
+        return (
+            f"Join: joinType={self._join_type.name}, "
+            f"leftKeys={self._left_keys}, rightKeys={self._right_keys}"
+        )
+
+    def get_schema(self) -> Schema:
+        left_fields = self._left_plan.get_schema().get_fields()
+        right_fields = self._right_plan.get_schema().get_fields()
+        match self._join_type:
+            case JoinType.Inner:
+                return Schema(left_fields + right_fields)
+            case JoinType.Left:
+                matched_field = SchemaField("matched", DataType.Bool)
+                return Schema(left_fields + right_fields + [matched_field])
+            case JoinType.Semi | JoinType.Anti:
+                return Schema(left_fields)
+            case _:
+                raise RuntimeError("Unsupported join type")
+
+    def get_children(self) -> list[LogicalPlan]:
+        return [self._left_plan, self._right_plan]
+
+    def with_children(self, children: list[LogicalPlan]) -> LogicalPlan:
+        left_plan, right_plan = children
+        return LogicalJoin(
+            left_plan,
+            right_plan,
+            self._left_keys,
+            self._right_keys,
+            self._join_type,
+            self._max_build_rows_in_memory,
+        )
+
+    def get_left_plan(self) -> LogicalPlan:
+        return self._left_plan
+
+    def get_right_plan(self) -> LogicalPlan:
+        return self._right_plan
+
+    def get_left_keys(self) -> list[LogicalExpr]:
+        return self._left_keys
+
+    def get_right_keys(self) -> list[LogicalExpr]:
+        return self._right_keys
+
+    def get_join_type(self) -> JoinType:
+        return self._join_type
+
+    def get_max_build_rows_in_memory(self) -> int | None:
+        return self._max_build_rows_in_memory
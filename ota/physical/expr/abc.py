@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Any
+from itertools import repeat
+from typing import Any, Iterable, Sequence
 
-from ota.column import Column
+from ota.column import Column, ConstantColumn
 from ota.row_batch import RowBatch
 from ota.schema import DataType
 
+from . import vectorized
+
 
 class PhysicalExpr(ABC):
     @abstractmethod
@@ -26,6 +29,12 @@ class PhysicalBinaryExpr(PhysicalExpr):
         self._left_expr = left_expr
         self._right_expr = right_expr
 
+    def get_left_expr(self) -> PhysicalExpr:
+        return self._left_expr
+
+    def get_right_expr(self) -> PhysicalExpr:
+        return self._right_expr
+
     @abstractmethod
     def _evaluate(self, left_value: Column, right_value: Column): ...
 
@@ -49,11 +58,32 @@ class PhysicalMathExpr(PhysicalBinaryExpr):
         data_type: DataType,
     ): ...
 
+    @abstractmethod
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any: ...
+
     def _evaluate(self, left_value: Column, right_value: Column):
         data_type = left_value.get_data_type()
+        if _are_constant(left_value, right_value):
+            value = self._evaluate_impl(
+                left_value.get_value(), right_value.get_value(), data_type
+            )
+            return ConstantColumn(data_type, value, left_value.size())
+
+        if vectorized.ENABLED:
+            values = self._evaluate_vectorized(
+                vectorized.to_ndarray(left_value),
+                vectorized.to_ndarray(right_value),
+                data_type,
+            )
+            return vectorized.from_ndarray(data_type, values)
+
         values = [
-            self._evaluate_impl(left_value[i], right_value[i], data_type)
-            for i in range(left_value.size())
+            self._evaluate_impl(left_operand, right_operand, data_type)
+            for left_operand, right_operand in zip(
+                _get_values(left_value), _get_values(right_value)
+            )
         ]
         return Column(data_type, values)
 
@@ -67,22 +97,100 @@ class PhysicalBooleanExpr(PhysicalBinaryExpr):
         data_type: DataType,
     ): ...
 
+    @abstractmethod
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any: ...
+
     def _evaluate(self, left_value: Column, right_value: Column):
+        data_type = left_value.get_data_type()
+        if _are_constant(left_value, right_value):
+            value = self._evaluate_impl(
+                left_value.get_value(), right_value.get_value(), data_type
+            )
+            return ConstantColumn(DataType.Bool, value, left_value.size())
+
+        if vectorized.ENABLED:
+            values = self._evaluate_vectorized(
+                vectorized.to_ndarray(left_value),
+                vectorized.to_ndarray(right_value),
+                data_type,
+            )
+            return vectorized.from_ndarray(DataType.Bool, values)
+
         values = [
-            self._evaluate_impl(
-                left_value[i], right_value[i], left_value.get_data_type()
+            self._evaluate_impl(left_operand, right_operand, data_type)
+            for left_operand, right_operand in zip(
+                _get_values(left_value), _get_values(right_value)
             )
-            for i in range(left_value.size())
         ]
         return Column(DataType.Bool, values)
 
 
+def _are_constant(left_value: Column, right_value: Column) -> bool:
+    return isinstance(left_value, ConstantColumn) and isinstance(
+        right_value, ConstantColumn
+    )
+
+
+def _get_values(column: Column) -> Iterable[Any]:
+    # A constant's value is repeated lazily instead of copied into a list.
+    if isinstance(column, ConstantColumn):
+        return repeat(column.get_value(), column.size())
+    return column.to_list()
+
+
 class PhysicalAggregateExpr(ABC):
     _input_expr: PhysicalExpr
 
     class Accumulator(ABC):
-        def accumulate(self, value: Any): ...
-        def get_value(self) -> Any: ...
+        """The aggregate state of a number of groups.
+
+        Groups are identified by dense ids from 0 to the number of groups - 1.
+        """
+
+        @abstractmethod
+        def update(
+            self, group_ids: Sequence[int], num_groups: int, values: Column
+        ) -> None:
+            """Accumulates a batch of values into their groups.
+
+            Args:
+                group_ids: The group id of each value.
+                num_groups: The number of groups seen so far.
+                values: The values.
+            """
+
+        @abstractmethod
+        def get_values(self) -> list[Any]:
+            """Returns the aggregate value of each group.
+
+            Returns:
+                The values, indexed by group id.
+            """
+
+        @abstractmethod
+        def get_state(self) -> list[Any]:
+            """Returns the partial aggregate state of each group.
+
+            States can be pickled and merged into another accumulator of the
+            same aggregate expression.
+
+            Returns:
+                The states, indexed by group id.
+            """
+
+        @abstractmethod
+        def merge(
+            self, group_ids: Sequence[int], num_groups: int, states: list[Any]
+        ) -> None:
+            """Merges partial states into their groups.
+
+            Args:
+                group_ids: The group id of each state.
+                num_groups: The number of groups seen so far.
+                states: States returned by get_state() of another accumulator.
+            """
 
     def __init__(self, input_expr: PhysicalExpr) -> None:
         self._input_expr = input_expr
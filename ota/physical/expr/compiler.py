@@ -0,0 +1,368 @@
+"""Compilation of expression trees into single generated Python functions.
+
+An interpreted expression evaluates every node into an intermediate column.
+A compiled expression instead evaluates the whole tree in one list
+comprehension over the input columns, or, when NumPy is enabled, in one
+function applying the NumPy operations of every node without converting the
+intermediate arrays to columns.
+
+Functions are generated for the data types of the input columns, as these
+decide the operations, e.g. of AND on Int and Bool values. Literals are passed
+as arguments, so the source of a function identifies it regardless of literal
+values and column indices, and generated functions are cached by their
+source. Trees that don't type check, or whose inputs are all constant, are
+evaluated by the interpreted expression, which raises the usual errors.
+
+Like interpreted expressions, compiled ones raise an OverflowError when the
+value of a math expression doesn't fit into int64, also within the tree where
+Python integers would hold it.
+"""
+
+from functools import lru_cache
+from itertools import repeat
+from typing import Any, Callable
+
+from ota.column import Column, ConstantColumn
+from ota.row_batch import RowBatch
+from ota.schema import DataType
+
+from . import vectorized
+from .abc import PhysicalExpr
+from .impls import (
+    PhysicalBooleanExprAnd,
+    PhysicalBooleanExprEq,
+    PhysicalBooleanExprGt,
+    PhysicalBooleanExprGtEq,
+    PhysicalBooleanExprLt,
+    PhysicalBooleanExprLtEq,
+    PhysicalBooleanExprNeq,
+    PhysicalBooleanExprOr,
+    PhysicalColumnExpr,
+    PhysicalLiteralBoolExpr,
+    PhysicalLiteralIntExpr,
+    PhysicalMathExprAdd,
+    PhysicalMathExprDivide,
+    PhysicalMathExprModulo,
+    PhysicalMathExprMultiply,
+    PhysicalMathExprSubtract,
+)
+from .vectorized import np
+
+# The operators of the comparisons and of the math expressions that Python
+# and NumPy evaluate alike.
+_OPERATORS: dict[type[PhysicalExpr], str] = {
+    PhysicalMathExprAdd: "+",
+    PhysicalMathExprSubtract: "-",
+    PhysicalMathExprMultiply: "*",
+    PhysicalBooleanExprEq: "==",
+    PhysicalBooleanExprNeq: "!=",
+    PhysicalBooleanExprGt: ">",
+    PhysicalBooleanExprGtEq: ">=",
+    PhysicalBooleanExprLt: "<",
+    PhysicalBooleanExprLtEq: "<=",
+}
+_MATH_EXPRS = (
+    PhysicalMathExprAdd,
+    PhysicalMathExprSubtract,
+    PhysicalMathExprMultiply,
+    PhysicalMathExprDivide,
+    PhysicalMathExprModulo,
+)
+_LOGICAL_EXPRS = (PhysicalBooleanExprAnd, PhysicalBooleanExprOr)
+# The functions that evaluate math expressions on NumPy arrays, checking for
+# overflows.
+_VECTORIZED_FUNCTIONS: dict[type[PhysicalExpr], str] = {
+    PhysicalMathExprAdd: "_add",
+    PhysicalMathExprSubtract: "_subtract",
+    PhysicalMathExprMultiply: "_multiply",
+    PhysicalMathExprDivide: "_divide",
+    PhysicalMathExprModulo: "_modulo",
+}
+_COMPILED_EXPRS = (*_OPERATORS, *_MATH_EXPRS, *_LOGICAL_EXPRS)
+_COMPILED_FUNCTION_CACHE_SIZE = 256
+
+
+class PhysicalCompiledExpr(PhysicalExpr):
+    """Evaluates an expression tree with a generated function.
+
+    Columns and sub-expressions that can't be compiled are the inputs of the
+    function and are evaluated as usual.
+
+    Attributes:
+        _expr: The compiled expression.
+        _inputs: The inputs of the function.
+        _literals: The values of the literals, in the order of the function's
+            arguments.
+        _sources: The source of the function for the data types of the inputs
+            and whether NumPy is enabled, or None when the expression can't be
+            compiled for them.
+    """
+
+    _expr: PhysicalExpr
+    _inputs: list[PhysicalExpr]
+    _literals: list[int | bool]
+    _sources: dict[tuple[tuple[DataType, ...], bool], str | None]
+
+    def __init__(self, expr: PhysicalExpr) -> None:
+        self._expr = expr
+        self._inputs = []
+        self._literals = []
+        _collect_arguments(expr, self._inputs, self._literals)
+        self._sources = {}
+
+    def __str__(self) -> str:
+        return str(self._expr)
+
+    def get_expr(self) -> PhysicalExpr:
+        return self._expr
+
+    def get_source(
+        self, data_types: tuple[DataType, ...], is_vectorized: bool
+    ) -> str | None:
+        """Returns the source of the function for the types of the inputs.
+
+        Args:
+            data_types: The data type of each input.
+            is_vectorized: Whether the function evaluates NumPy arrays.
+        Returns:
+            The source, or None when the expression doesn't type check.
+        """
+        key = (data_types, is_vectorized)
+        if key not in self._sources:
+            generator = _SourceGenerator(
+                self._inputs, data_types, is_vectorized
+            )
+            self._sources[key] = generator.generate(self._expr)
+        return self._sources[key]
+
+    def evaluate(self, input_batch: RowBatch) -> Column:
+        input_columns = [expr.evaluate(input_batch) for expr in self._inputs]
+        if all(isinstance(column, ConstantColumn) for column in input_columns):
+            return self._expr.evaluate(input_batch)
+
+        is_vectorized = vectorized.ENABLED
+        data_types = tuple(column.get_data_type() for column in input_columns)
+        source = self.get_source(data_types, is_vectorized)
+        if source is None:
+            return self._expr.evaluate(input_batch)
+
+        function, data_type = _compile_function(source)
+        if is_vectorized:
+            values = function(
+                *map(vectorized.to_ndarray, input_columns), *self._literals
+            )
+            return vectorized.from_ndarray(data_type, values)
+        values = function(*map(_get_values, input_columns), *self._literals)
+        return Column(data_type, values)
+
+
+def compile_expr(expr: PhysicalExpr) -> PhysicalExpr:
+    """Compiles an expression tree if it has math or boolean expressions.
+
+    Args:
+        expr: The expression.
+    Returns:
+        A compiled expression, or the expression itself when there is nothing
+        to fuse.
+    """
+    if not isinstance(expr, _COMPILED_EXPRS):
+        return expr
+    return PhysicalCompiledExpr(expr)
+
+
+class _SourceGenerator:
+    """Generates the source of the function evaluating an expression tree.
+
+    The function takes the inputs, named ``c0``, ``c1``, ..., followed by the
+    literals, named ``k0``, ``k1``, .... In the comprehension of a function
+    evaluating values row by row, the values of the inputs are named ``x0``,
+    ``x1``, ....
+
+    Attributes:
+        _inputs: The inputs, in the order of the function's arguments.
+        _data_types: The data type of each input.
+        _is_vectorized: Whether the function evaluates NumPy arrays.
+        _num_literals: The number of literals named so far.
+    """
+
+    _inputs: list[PhysicalExpr]
+    _data_types: tuple[DataType, ...]
+    _is_vectorized: bool
+    _num_literals: int
+
+    def __init__(
+        self,
+        inputs: list[PhysicalExpr],
+        data_types: tuple[DataType, ...],
+        is_vectorized: bool,
+    ) -> None:
+        self._inputs = inputs
+        self._data_types = data_types
+        self._is_vectorized = is_vectorized
+        self._num_literals = 0
+
+    def generate(self, expr: PhysicalExpr) -> str | None:
+        """Generates the source of the function.
+
+        The source defines a function ``evaluate`` and the name
+        ``DATA_TYPE``, the data type of the values that it returns.
+
+        Args:
+            expr: The expression.
+        Returns:
+            The source, or None when the expression doesn't type check.
+        """
+        result = self._generate(expr)
+        if result is None:
+            return None
+        code, data_type = result
+
+        arguments = [f"c{index}" for index in range(len(self._inputs))]
+        arguments += [f"k{index}" for index in range(self._num_literals)]
+        if self._is_vectorized:
+            body = f"return {code}"
+        elif len(self._inputs) == 1:
+            body = f"return [{code} for x0 in c0]"
+        else:
+            values = ", ".join(
+                f"x{index}" for index in range(len(self._inputs))
+            )
+            columns = ", ".join(
+                f"c{index}" for index in range(len(self._inputs))
+            )
+            body = f"return [{code} for {values} in zip({columns})]"
+        return (
+            f"DATA_TYPE = DataType.{data_type.name}\n"
+            f"def evaluate({', '.join(arguments)}):\n"
+            f"    {body}\n"
+        )
+
+    def _generate(
+        self, expr: PhysicalExpr, is_root: bool = True
+    ) -> tuple[str, DataType] | None:
+        # Returns the code of an expression and the data type of its values.
+        # Values within the tree are checked for overflows, while the values
+        # of the root are checked when they are converted into a column.
+        index = _find_input(self._inputs, expr)
+        if index is not None:
+            name = "c" if self._is_vectorized else "x"
+            return f"{name}{index}", self._data_types[index]
+
+        match expr:
+            case PhysicalLiteralIntExpr():
+                return self._name_literal(), DataType.Int
+            case PhysicalLiteralBoolExpr():
+                return self._name_literal(), DataType.Bool
+
+        assert isinstance(expr, _COMPILED_EXPRS)
+        left = self._generate(expr.get_left_expr(), is_root=False)
+        right = self._generate(expr.get_right_expr(), is_root=False)
+        if left is None or right is None:
+            return None
+        (left_code, data_type), (right_code, right_data_type) = left, right
+        if data_type != right_data_type:
+            return None
+
+        if isinstance(expr, _LOGICAL_EXPRS):
+            # & and | evaluate both operands like the interpreted expressions,
+            # unlike "and" and "or".
+            operator = "&" if isinstance(expr, PhysicalBooleanExprAnd) else "|"
+            match data_type:
+                case DataType.Int:
+                    code = (
+                        f"(({left_code} == 1) {operator} ({right_code} == 1))"
+                    )
+                case DataType.Bool:
+                    code = f"({left_code} {operator} {right_code})"
+                case _:
+                    return None
+            return code, DataType.Bool
+
+        if data_type != DataType.Int:
+            return None
+        if not isinstance(expr, _MATH_EXPRS):
+            code = f"({left_code} {_OPERATORS[type(expr)]} {right_code})"
+            return code, DataType.Bool
+        if self._is_vectorized:
+            function = _VECTORIZED_FUNCTIONS[type(expr)]
+            return f"{function}({left_code}, {right_code})", DataType.Int
+        match expr:
+            case PhysicalMathExprDivide():
+                code = f"int({left_code} / {right_code})"
+            case PhysicalMathExprModulo():
+                # The remainder lies between 0 and the divisor.
+                return f"({left_code} % {right_code})", DataType.Int
+            case _:
+                code = f"({left_code} {_OPERATORS[type(expr)]} {right_code})"
+        if not is_root:
+            code = (
+                f"(v if _INT64_MIN <= (v := {code}) <= _INT64_MAX "
+                "else _overflow())"
+            )
+        return code, DataType.Int
+
+    def _name_literal(self) -> str:
+        name = f"k{self._num_literals}"
+        self._num_literals += 1
+        return name
+
+
+def _collect_arguments(
+    expr: PhysicalExpr, inputs: list[PhysicalExpr], literals: list[int | bool]
+) -> None:
+    # Collects the inputs and the literals of a tree in the order in which the
+    # source generator names them.
+    match expr:
+        case PhysicalLiteralIntExpr() | PhysicalLiteralBoolExpr():
+            literals.append(expr.get_value())
+        case _ if isinstance(expr, _COMPILED_EXPRS):
+            _collect_arguments(expr.get_left_expr(), inputs, literals)
+            _collect_arguments(expr.get_right_expr(), inputs, literals)
+        case _ if _find_input(inputs, expr) is None:
+            inputs.append(expr)
+
+
+def _find_input(inputs: list[PhysicalExpr], expr: PhysicalExpr) -> int | None:
+    # Returns the index of an input. A column used several times in a tree is
+    # a single input.
+    for index, input_expr in enumerate(inputs):
+        if input_expr is expr or (
+            isinstance(input_expr, PhysicalColumnExpr)
+            and isinstance(expr, PhysicalColumnExpr)
+            and input_expr.get_index() == expr.get_index()
+        ):
+            return index
+    return None
+
+
+@lru_cache(maxsize=_COMPILED_FUNCTION_CACHE_SIZE)
+def _compile_function(source: str) -> tuple[Callable[..., Any], DataType]:
+    namespace: dict[str, Any] = {
+        "DataType": DataType,
+        "_add": vectorized.add,
+        "_subtract": vectorized.subtract,
+        "_multiply": vectorized.multiply,
+        "_divide": vectorized.divide,
+        "_modulo": _modulo,
+        "_INT64_MIN": vectorized.INT64_MIN,
+        "_INT64_MAX": vectorized.INT64_MAX,
+        "_overflow": _overflow,
+    }
+    exec(compile(source, "<compiled expression>", "exec"), namespace)
+    return namespace["evaluate"], namespace["DATA_TYPE"]
+
+
+def _modulo(left_operand: Any, right_operand: Any) -> Any:
+    if np.any(right_operand == 0):
+        raise ZeroDivisionError("Division by zero")
+    return np.remainder(left_operand, right_operand)
+
+
+def _overflow() -> Any:
+    raise OverflowError(vectorized.OVERFLOW_MESSAGE)
+
+
+def _get_values(column: Column) -> Any:
+    if isinstance(column, ConstantColumn):
+        return repeat(column.get_value(), column.size())
+    return column.to_list()
@@ -1,15 +1,18 @@
-from typing import Any
+from typing import Any, Sequence
 
-from ota.column import Column
+from ota.column import Column, ConstantColumn
 from ota.row_batch import RowBatch
+from ota.runtime_filter import RuntimeFilter
 from ota.schema import DataType
 
+from . import vectorized
 from .abc import (
     PhysicalAggregateExpr,
     PhysicalBooleanExpr,
     PhysicalExpr,
     PhysicalMathExpr,
 )
+from .vectorized import np
 
 
 class PhysicalColumnExpr(PhysicalExpr):
@@ -21,6 +24,9 @@ class PhysicalColumnExpr(PhysicalExpr):
     def __str__(self) -> str:
         return f"#{self._index}"
 
+    def get_index(self) -> int:
+        return self._index
+
     def evaluate(self, input_batch: RowBatch) -> Column:
         return input_batch.get_column(self._index)
 
@@ -41,6 +47,15 @@ class PhysicalMathExprAdd(PhysicalMathExpr):
             case _:
                 raise RuntimeError("Unsupported data type")
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        match data_type:
+            case DataType.Int:
+                return vectorized.add(left_operand, right_operand)
+            case _:
+                raise RuntimeError("Unsupported data type")
+
 
 class PhysicalMathExprSubtract(PhysicalMathExpr):
     def __str__(self) -> str:
@@ -58,6 +73,15 @@ class PhysicalMathExprSubtract(PhysicalMathExpr):
             case _:
                 raise RuntimeError("Unsupported data type")
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        match data_type:
+            case DataType.Int:
+                return vectorized.subtract(left_operand, right_operand)
+            case _:
+                raise RuntimeError("Unsupported data type")
+
 
 class PhysicalMathExprMultiply(PhysicalMathExpr):
     def __str__(self) -> str:
@@ -75,6 +99,15 @@ class PhysicalMathExprMultiply(PhysicalMathExpr):
             case _:
                 raise RuntimeError("Unsupported data type")
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        match data_type:
+            case DataType.Int:
+                return vectorized.multiply(left_operand, right_operand)
+            case _:
+                raise RuntimeError("Unsupported data type")
+
 
 class PhysicalMathExprDivide(PhysicalMathExpr):
     def __str__(self) -> str:
@@ -92,6 +125,15 @@ class PhysicalMathExprDivide(PhysicalMathExpr):
             case _:
                 raise RuntimeError("Unsupported data type")
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        match data_type:
+            case DataType.Int:
+                return vectorized.divide(left_operand, right_operand)
+            case _:
+                raise RuntimeError("Unsupported data type")
+
 
 class PhysicalMathExprModulo(PhysicalMathExpr):
     def __str__(self) -> str:
@@ -109,6 +151,17 @@ class PhysicalMathExprModulo(PhysicalMathExpr):
             case _:
                 raise RuntimeError("Unsupported data type")
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        match data_type:
+            case DataType.Int:
+                if (right_operand == 0).any():
+                    raise ZeroDivisionError("Division by zero")
+                return np.remainder(left_operand, right_operand)
+            case _:
+                raise RuntimeError("Unsupported data type")
+
 
 class PhysicalBooleanExprEq(PhysicalBooleanExpr):
     def __str__(self) -> str:
@@ -120,6 +173,12 @@ class PhysicalBooleanExprEq(PhysicalBooleanExpr):
         assert data_type == DataType.Int
         return left_operand == right_operand
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        assert data_type == DataType.Int
+        return left_operand == right_operand
+
 
 class PhysicalBooleanExprNeq(PhysicalBooleanExpr):
     def __str__(self) -> str:
@@ -131,6 +190,12 @@ class PhysicalBooleanExprNeq(PhysicalBooleanExpr):
         assert data_type == DataType.Int
         return left_operand != right_operand
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        assert data_type == DataType.Int
+        return left_operand != right_operand
+
 
 class PhysicalBooleanExprGt(PhysicalBooleanExpr):
     def __str__(self) -> str:
@@ -142,6 +207,12 @@ class PhysicalBooleanExprGt(PhysicalBooleanExpr):
         assert data_type == DataType.Int
         return left_operand > right_operand
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        assert data_type == DataType.Int
+        return left_operand > right_operand
+
 
 class PhysicalBooleanExprGtEq(PhysicalBooleanExpr):
     def __str__(self) -> str:
@@ -153,6 +224,12 @@ class PhysicalBooleanExprGtEq(PhysicalBooleanExpr):
         assert data_type == DataType.Int
         return left_operand >= right_operand
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        assert data_type == DataType.Int
+        return left_operand >= right_operand
+
 
 class PhysicalBooleanExprLt(PhysicalBooleanExpr):
     def __str__(self) -> str:
@@ -164,6 +241,12 @@ class PhysicalBooleanExprLt(PhysicalBooleanExpr):
         assert data_type == DataType.Int
         return left_operand < right_operand
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        assert data_type == DataType.Int
+        return left_operand < right_operand
+
 
 class PhysicalBooleanExprLtEq(PhysicalBooleanExpr):
     def __str__(self) -> str:
@@ -175,6 +258,12 @@ class PhysicalBooleanExprLtEq(PhysicalBooleanExpr):
         assert data_type == DataType.Int
         return left_operand <= right_operand
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        assert data_type == DataType.Int
+        return left_operand <= right_operand
+
 
 class PhysicalBooleanExprAnd(PhysicalBooleanExpr):
     def __str__(self) -> str:
@@ -184,13 +273,24 @@ class PhysicalBooleanExprAnd(PhysicalBooleanExpr):
         self, left_operand: Any, right_operand: Any, data_type: DataType
     ):
         match data_type:
-            case DataType.Int():
+            case DataType.Int:
                 return (left_operand == 1) and (right_operand == 1)
-            case DataType.Bool():
+            case DataType.Bool:
                 return left_operand and right_operand
             case _:
                 raise RuntimeError("Unsupported data type")
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        match data_type:
+            case DataType.Int:
+                return (left_operand == 1) & (right_operand == 1)
+            case DataType.Bool:
+                return left_operand & right_operand
+            case _:
+                raise RuntimeError("Unsupported data type")
+
 
 class PhysicalBooleanExprOr(PhysicalBooleanExpr):
     def __str__(self) -> str:
@@ -200,13 +300,24 @@ class PhysicalBooleanExprOr(PhysicalBooleanExpr):
         self, left_operand: Any, right_operand: Any, data_type: DataType
     ):
         match data_type:
-            case DataType.Int():
+            case DataType.Int:
                 return (left_operand == 1) or (right_operand == 1)
-            case DataType.Bool():
+            case DataType.Bool:
                 return left_operand or right_operand
             case _:
                 raise RuntimeError("Unsupported data type")
 
+    def _evaluate_vectorized(
+        self, left_operand: Any, right_operand: Any, data_type: DataType
+    ) -> Any:
+        match data_type:
+            case DataType.Int:
+                return (left_operand == 1) | (right_operand == 1)
+            case DataType.Bool:
+                return left_operand | right_operand
+            case _:
+                raise RuntimeError("Unsupported data type")
+
 
 class PhysicalLiteralIntExpr(PhysicalExpr):
     _of: int
@@ -217,27 +328,95 @@ class PhysicalLiteralIntExpr(PhysicalExpr):
     def __str__(self) -> str:
         return str(self._of)
 
+    def get_value(self) -> int:
+        return self._of
+
     def evaluate(self, input_batch: RowBatch) -> Column:
-        # TODO: Create a literal column class to optimize this
-        return Column(DataType.Int, [self._of] * input_batch.num_rows())
+        return ConstantColumn(
+            DataType.Int, self._of, input_batch.num_physical_rows()
+        )
+
+
+class PhysicalLiteralBoolExpr(PhysicalExpr):
+    _of: bool
+
+    def __init__(self, of: bool) -> None:
+        self._of = of
+
+    def __str__(self) -> str:
+        return str(self._of).upper()
+
+    def get_value(self) -> bool:
+        return self._of
+
+    def evaluate(self, input_batch: RowBatch) -> Column:
+        return ConstantColumn(
+            DataType.Bool, self._of, input_batch.num_physical_rows()
+        )
+
+
+class PhysicalRuntimeFilterExpr(PhysicalExpr):
+    """Checks whether the keys of rows may have a match in a join.
+
+    The expression is True for every row until the join has built the
+    runtime filter from its right input.
+    """
+
+    _key_exprs: list[PhysicalExpr]
+    _runtime_filter: RuntimeFilter
+
+    def __init__(
+        self, key_exprs: list[PhysicalExpr], runtime_filter: RuntimeFilter
+    ) -> None:
+        self._key_exprs = key_exprs
+        self._runtime_filter = runtime_filter
+
+    def __str__(self) -> str:
+        return f"RUNTIME_FILTER({', '.join(map(str, self._key_exprs))})"
+
+    def get_key_exprs(self) -> list[PhysicalExpr]:
+        return self._key_exprs
+
+    def get_runtime_filter(self) -> RuntimeFilter:
+        return self._runtime_filter
+
+    def evaluate(self, input_batch: RowBatch) -> Column:
+        if not self._runtime_filter.is_built():
+            return ConstantColumn(
+                DataType.Bool, True, input_batch.num_physical_rows()
+            )
+        return self._runtime_filter.may_contain(
+            [expr.evaluate(input_batch) for expr in self._key_exprs]
+        )
 
 
 class PhysicalAggregateExprSum(PhysicalAggregateExpr):
     class Accumulator(PhysicalAggregateExpr.Accumulator):
-        _value: Any
+        _sums: list[int]
 
         def __init__(self):
-            self._value = 0
+            self._sums = []
+
+        def update(
+            self, group_ids: Sequence[int], num_groups: int, values: Column
+        ) -> None:
+            if values.get_data_type() != DataType.Int:
+                raise RuntimeError("Unsupported data type")
+            self.merge(group_ids, num_groups, values.to_list())
+
+        def get_values(self) -> list[Any]:
+            return self._sums
 
-        def accumulate(self, value: Any) -> None:
-            match value:
-                case int():
-                    self._value += value
-                case _:
-                    raise RuntimeError("Unsupported data type")
+        def get_state(self) -> list[Any]:
+            return self._sums
 
-        def get_value(self) -> Any:
-            return self._value
+        def merge(
+            self, group_ids: Sequence[int], num_groups: int, states: list[Any]
+        ) -> None:
+            sums = self._sums
+            sums.extend([0] * (num_groups - len(sums)))
+            for group_id, value in zip(group_ids, states):
+                sums[group_id] += value
 
     def __str__(self) -> str:
         return f"SUM({self._input_expr})"
@@ -248,24 +427,31 @@ class PhysicalAggregateExprSum(PhysicalAggregateExpr):
 
 class PhysicalAggregateExprMin(PhysicalAggregateExpr):
     class Accumulator(PhysicalAggregateExpr.Accumulator):
-        _value: Any
+        _mins: list[Any]
 
         def __init__(self):
-            self._value = None
+            self._mins = []
 
-        def accumulate(self, value: Any) -> None:
-            if self._value is None:
-                self._value = value
-                return
+        def update(
+            self, group_ids: Sequence[int], num_groups: int, values: Column
+        ) -> None:
+            self.merge(group_ids, num_groups, values.to_list())
 
-            match value:
-                case int() | str():
-                    self._value = min(self._value, value)
-                case _:
-                    raise RuntimeError("Unsupported data type")
+        def get_values(self) -> list[Any]:
+            return self._mins
 
-        def get_value(self) -> Any:
-            return self._value
+        def get_state(self) -> list[Any]:
+            return self._mins
+
+        def merge(
+            self, group_ids: Sequence[int], num_groups: int, states: list[Any]
+        ) -> None:
+            mins = self._mins
+            mins.extend([None] * (num_groups - len(mins)))
+            for group_id, value in zip(group_ids, states):
+                current = mins[group_id]
+                if current is None or value < current:
+                    mins[group_id] = value
 
     def __str__(self) -> str:
         return f"MIN({self._input_expr})"
@@ -276,24 +462,31 @@ class PhysicalAggregateExprMin(PhysicalAggregateExpr):
 
 class PhysicalAggregateExprMax(PhysicalAggregateExpr):
     class Accumulator(PhysicalAggregateExpr.Accumulator):
-        _value: Any
+        _maxes: list[Any]
 
         def __init__(self):
-            self._value = None
+            self._maxes = []
+
+        def update(
+            self, group_ids: Sequence[int], num_groups: int, values: Column
+        ) -> None:
+            self.merge(group_ids, num_groups, values.to_list())
 
-        def accumulate(self, value: Any) -> None:
-            if self._value is None:
-                self._value = value
-                return
+        def get_values(self) -> list[Any]:
+            return self._maxes
 
-            match value:
-                case int() | str():
-                    self._value = max(self._value, value)
-                case _:
-                    raise RuntimeError("Unsupported data type")
+        def get_state(self) -> list[Any]:
+            return self._maxes
 
-        def get_value(self) -> Any:
-            return self._value
+        def merge(
+            self, group_ids: Sequence[int], num_groups: int, states: list[Any]
+        ) -> None:
+            maxes = self._maxes
+            maxes.extend([None] * (num_groups - len(maxes)))
+            for group_id, value in zip(group_ids, states):
+                current = maxes[group_id]
+                if current is None or value > current:
+                    maxes[group_id] = value
 
     def __str__(self) -> str:
         return f"MAX({self._input_expr})"
@@ -304,23 +497,45 @@ class PhysicalAggregateExprMax(PhysicalAggregateExpr):
 
 class PhysicalAggregateExprAvg(PhysicalAggregateExpr):
     class Accumulator(PhysicalAggregateExpr.Accumulator):
-        _total: Any
-        _num_values: int
+        _totals: list[int]
+        _counts: list[int]
 
         def __init__(self):
-            self._total = 0
-            self._num_values = 0
-
-        def accumulate(self, value: Any) -> None:
-            match value:
-                case int():
-                    self._total += value
-                    self._num_values += 1
-                case _:
-                    raise RuntimeError("Unsupported data type")
+            self._totals = []
+            self._counts = []
 
-        def get_value(self) -> Any:
-            return int(self._total / self._num_values)
+        def update(
+            self, group_ids: Sequence[int], num_groups: int, values: Column
+        ) -> None:
+            if values.get_data_type() != DataType.Int:
+                raise RuntimeError("Unsupported data type")
+            totals = self._totals
+            counts = self._counts
+            totals.extend([0] * (num_groups - len(totals)))
+            counts.extend([0] * (num_groups - len(counts)))
+            for group_id, value in zip(group_ids, values.to_list()):
+                totals[group_id] += value
+                counts[group_id] += 1
+
+        def get_values(self) -> list[Any]:
+            return [
+                int(total / count)
+                for total, count in zip(self._totals, self._counts)
+            ]
+
+        def get_state(self) -> list[Any]:
+            return list(zip(self._totals, self._counts))
+
+        def merge(
+            self, group_ids: Sequence[int], num_groups: int, states: list[Any]
+        ) -> None:
+            totals = self._totals
+            counts = self._counts
+            totals.extend([0] * (num_groups - len(totals)))
+            counts.extend([0] * (num_groups - len(counts)))
+            for group_id, (total, count) in zip(group_ids, states):
+                totals[group_id] += total
+                counts[group_id] += count
 
     def __str__(self) -> str:
         return f"AVG({self._input_expr})"
@@ -331,16 +546,32 @@ class PhysicalAggregateExprAvg(PhysicalAggregateExpr):
 
 class PhysicalAggregateExprCount(PhysicalAggregateExpr):
     class Accumulator(PhysicalAggregateExpr.Accumulator):
-        _count: Any
+        _counts: list[int]
 
         def __init__(self):
-            self._count = 0
-
-        def accumulate(self, value: Any) -> None:
-            self._count += 1
-
-        def get_value(self) -> Any:
-            return self._count
+            self._counts = []
+
+        def update(
+            self, group_ids: Sequence[int], num_groups: int, values: Column
+        ) -> None:
+            counts = self._counts
+            counts.extend([0] * (num_groups - len(counts)))
+            for group_id in group_ids:
+                counts[group_id] += 1
+
+        def get_values(self) -> list[Any]:
+            return self._counts
+
+        def get_state(self) -> list[Any]:
+            return self._counts
+
+        def merge(
+            self, group_ids: Sequence[int], num_groups: int, states: list[Any]
+        ) -> None:
+            counts = self._counts
+            counts.extend([0] * (num_groups - len(counts)))
+            for group_id, count in zip(group_ids, states):
+                counts[group_id] += count
 
     def __str__(self) -> str:
         return f"COUNT({self._input_expr})"
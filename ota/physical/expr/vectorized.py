@@ -0,0 +1,167 @@
+"""Conversions between columns and NumPy arrays for vectorized evaluation.
+
+NumPy is an optional dependency. When it isn't installed, ``ENABLED`` is False
+and expressions are evaluated row by row instead.
+
+The math functions check that their results fit into int64, as NumPy's integer
+operations wrap around silently, and raise the OverflowError that converting
+an out of range value into a column raises when evaluating row by row.
+"""
+
+from array import array
+from typing import Any
+
+from ota.column import Column, ConstantColumn
+from ota.schema import DataType
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ENABLED = np is not None
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+# The message of the OverflowError that array("q") raises.
+OVERFLOW_MESSAGE = "int too big to convert"
+
+
+def to_ndarray(column: Column) -> Any:
+    """Returns the values of a column as a NumPy array.
+
+    Int columns are wrapped without copying, Bool columns are unpacked from
+    their bitmap and constant columns become a scalar that NumPy broadcasts.
+
+    Args:
+        column: The column.
+    Returns:
+        An int64 or bool array, or a scalar of one of those types.
+    """
+    if isinstance(column, ConstantColumn):
+        match column.get_data_type():
+            case DataType.Int:
+                return np.int64(column.get_value())
+            case DataType.Bool:
+                return np.bool_(column.get_value())
+            case _:
+                raise RuntimeError("Unsupported data type")
+
+    match column.get_data_type():
+        case DataType.Int:
+            if column.size() == 0:
+                return np.empty(0, dtype=np.int64)
+            return np.frombuffer(column.get_buffer(), dtype=np.int64)
+        case DataType.Bool:
+            bitmap = np.frombuffer(column.get_buffer(), dtype=np.uint8)
+            bits = np.unpackbits(bitmap, count=column.size(), bitorder="little")
+            return bits.view(np.bool_)
+        case _:
+            raise RuntimeError("Unsupported data type")
+
+
+def from_ndarray(data_type: DataType, values: Any) -> Column:
+    """Returns a column holding the values of a NumPy array.
+
+    Args:
+        data_type: The data type of the column.
+        values: The array.
+    Returns:
+        A column.
+    """
+    match data_type:
+        case DataType.Int:
+            buffer = array("q", values.astype(np.int64, copy=False).tobytes())
+        case DataType.Bool:
+            buffer = bytearray(np.packbits(values, bitorder="little").tobytes())
+        case _:
+            raise RuntimeError("Unsupported data type")
+    return Column.from_buffer(data_type, buffer, len(values))
+
+
+def add(left_operand: Any, right_operand: Any) -> Any:
+    """Adds int64 values.
+
+    Args:
+        left_operand: An array or a scalar.
+        right_operand: An array or a scalar.
+    Returns:
+        The sums.
+    Raises:
+        OverflowError: When a sum doesn't fit into int64.
+    """
+    result = left_operand + right_operand
+    # The sum overflowed when its sign differs from the signs of both
+    # operands.
+    if np.any((left_operand ^ result) & (right_operand ^ result) < 0):
+        raise OverflowError(OVERFLOW_MESSAGE)
+    return result
+
+
+def subtract(left_operand: Any, right_operand: Any) -> Any:
+    """Subtracts int64 values.
+
+    Args:
+        left_operand: An array or a scalar.
+        right_operand: An array or a scalar.
+    Returns:
+        The differences.
+    Raises:
+        OverflowError: When a difference doesn't fit into int64.
+    """
+    result = left_operand - right_operand
+    # The difference overflowed when the operands have different signs and
+    # the sign of the result differs from the sign of the left operand.
+    if np.any((left_operand ^ right_operand) & (left_operand ^ result) < 0):
+        raise OverflowError(OVERFLOW_MESSAGE)
+    return result
+
+
+def multiply(left_operand: Any, right_operand: Any) -> Any:
+    """Multiplies int64 values.
+
+    Args:
+        left_operand: An array or a scalar.
+        right_operand: An array or a scalar.
+    Returns:
+        The products.
+    Raises:
+        OverflowError: When a product doesn't fit into int64.
+    """
+    result = left_operand * right_operand
+    # Products whose float approximation is close to the int64 range are
+    # checked exactly with Python integers.
+    approximation = np.multiply(left_operand, right_operand, dtype=np.float64)
+    is_close = np.abs(approximation) >= 2.0**62
+    if np.any(is_close):
+        left_values, right_values = np.broadcast_arrays(
+            left_operand, right_operand
+        )
+        for left_value, right_value in zip(
+            left_values[is_close].tolist(), right_values[is_close].tolist()
+        ):
+            if not INT64_MIN <= left_value * right_value <= INT64_MAX:
+                raise OverflowError(OVERFLOW_MESSAGE)
+    return result
+
+
+def divide(left_operand: Any, right_operand: Any) -> Any:
+    """Divides int64 values like int(left / right) does in Python.
+
+    Args:
+        left_operand: An array or a scalar.
+        right_operand: An array or a scalar.
+    Returns:
+        The quotients, truncated to int64 values.
+    Raises:
+        ZeroDivisionError: When a divisor is 0.
+        OverflowError: When a quotient doesn't fit into int64.
+    """
+    if np.any(right_operand == 0):
+        raise ZeroDivisionError("Division by zero")
+    quotients = np.trunc(left_operand / right_operand)
+    # Just the smallest integer divided by -1 leaves the int64 range, as
+    # 2.0**63.
+    if np.any(quotients >= 2.0**63):
+        raise OverflowError(OVERFLOW_MESSAGE)
+    return quotients.astype(np.int64)
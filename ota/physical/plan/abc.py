@@ -15,5 +15,30 @@ class PhysicalPlan(ABC):
     @abstractmethod
     def get_children(self) -> list["PhysicalPlan"]: ...
 
+    @abstractmethod
+    def with_children(self, children: list["PhysicalPlan"]) -> "PhysicalPlan":
+        """Returns a copy of the plan with its children replaced.
+
+        Args:
+            children: The new children, in the order of get_children().
+        Returns:
+            A plan.
+        """
+
     @abstractmethod
     def execute(self) -> Generator[RowBatch, None, None]: ...
+
+    def format(self) -> str:
+        """Formats the plan as text.
+
+        Returns:
+            One line per operator, children indented below their parent.
+        """
+        return _format_plan(self, 0)
+
+
+def _format_plan(plan: PhysicalPlan, depth: int) -> str:
+    plan_str = "\t" * depth + str(plan) + "\n"
+    for child in plan.get_children():
+        plan_str += _format_plan(child, depth + 1)
+    return plan_str
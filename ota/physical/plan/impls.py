@@ -1,35 +1,101 @@
-from typing import Any, Generator
+import heapq
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, BinaryIO, Generator, Iterable, Iterator, Sequence
 
-from ota.column import Column
-from ota.data_loader import DataLoader
+from ota.column import Column, ConstantColumn
+from ota.columnar_file import ColumnarFileWriter
+from ota.data_loader import ColumnarFileLoader, DataLoader, ScanPredicate
+from ota.join_type import JoinType
+from ota.physical.expr import vectorized
 from ota.physical.expr.abc import PhysicalAggregateExpr, PhysicalExpr
+from ota.physical.expr.impls import PhysicalColumnExpr
+from ota.physical.expr.vectorized import np
 from ota.row_batch import RowBatch
-from ota.schema import Schema
+from ota.runtime_filter import RuntimeFilter
+from ota.schema import DataType, Schema
 
 from .abc import PhysicalPlan
+from .metrics import PhysicalMetrics
 
 
 class PhysicalScan(PhysicalPlan):
     _data_loader: DataLoader
     _projection: list[str]
+    _predicate: ScanPredicate | None
 
-    def __init__(self, data_loader: DataLoader, projection: list[str]) -> None:
+    def __init__(
+        self,
+        data_loader: DataLoader,
+        projection: list[str],
+        predicate: ScanPredicate | None = None,
+    ) -> None:
         self._data_loader = data_loader
         self._projection = projection
+        self._predicate = predicate
 
     def __str__(self) -> str:
-        return (
-            f"Scan: schema={self.get_schema()}, projection={self._projection}"
+        scan_str = (
+            f"Scan: schema={_format_list(self.get_schema().get_field_names())}"
+            f", projection={_format_list(self._projection)}"
         )
+        if self._predicate is not None:
+            scan_str += f", predicate={self._predicate.expr}"
+        return scan_str
 
     def get_schema(self) -> Schema:
+        if len(self._projection) == 0:
+            return self._data_loader.get_schema()
         return self._data_loader.get_schema().select(self._projection)
 
     def get_children(self) -> list["PhysicalPlan"]:
         return []
 
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        return self
+
+    def get_partitions(self) -> list["PhysicalScan"]:
+        """Splits the scan by the partitions of the data loader.
+
+        Returns:
+            Scans of the partitions, in source order.
+        """
+        return [
+            PhysicalScan(partition, self._projection, self._predicate)
+            for partition in self._data_loader.get_partitions()
+        ]
+
+    def get_num_workers(self) -> int:
+        return self._data_loader.get_num_workers()
+
+    def execute(self) -> Generator[RowBatch, None, None]:
+        yield from self._data_loader.load(self._projection, self._predicate)
+
+
+class PhysicalEmptyRelation(PhysicalPlan):
+    _schema: Schema
+
+    def __init__(self, schema: Schema) -> None:
+        self._schema = schema
+
+    def __str__(self) -> str:
+        return "EmptyRelation"
+
+    def get_schema(self) -> Schema:
+        return self._schema
+
+    def get_children(self) -> list["PhysicalPlan"]:
+        return []
+
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        return self
+
     def execute(self) -> Generator[RowBatch, None, None]:
-        yield from self._data_loader.load(self._projection)
+        yield from ()
 
 
 class PhysicalProjection(PhysicalPlan):
@@ -48,7 +114,7 @@ class PhysicalProjection(PhysicalPlan):
         self._exprs = exprs
 
     def __str__(self) -> str:
-        return f"Projection: {self._exprs}"
+        return f"Projection: {_format_list(self._exprs)}"
 
     def get_schema(self) -> Schema:
         return self._schema
@@ -56,19 +122,47 @@ class PhysicalProjection(PhysicalPlan):
     def get_children(self) -> list["PhysicalPlan"]:
         return [self._input_plan]
 
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        (input_plan,) = children
+        return PhysicalProjection(input_plan, self._schema, self._exprs)
+
     def execute(self) -> Generator[RowBatch, None, None]:
+        # Projecting just columns keeps the selection vector, other
+        # expressions are evaluated on the selected rows only.
+        passes_columns = all(
+            isinstance(expr, PhysicalColumnExpr) for expr in self._exprs
+        )
         for batch in self._input_plan.execute():
+            if not passes_columns:
+                batch = batch.compact()
             columns = map(lambda expr: expr.evaluate(batch), self._exprs)
-            yield RowBatch(self._schema, list(columns))
+            yield RowBatch(self._schema, list(columns), batch.get_selection())
 
 
 class PhysicalSelection(PhysicalPlan):
+    """Filters rows by setting the selection vector of the batches.
+
+    The filter is evaluated on the compacted batch, which copies just the
+    columns that it reads, and the rows that pass are selected from the
+    columns of the input batch by composing the selection vectors. The output
+    is only compacted, i.e. its columns copied with just the selected rows as
+    they are read, when the fraction of selected rows falls below the
+    compaction threshold.
+    """
+
     _input_plan: PhysicalPlan
     _expr: PhysicalExpr
+    _compaction_threshold: float
 
-    def __init__(self, input_plan: PhysicalPlan, expr: PhysicalExpr) -> None:
+    def __init__(
+        self,
+        input_plan: PhysicalPlan,
+        expr: PhysicalExpr,
+        compaction_threshold: float = 0.25,
+    ) -> None:
         self._input_plan = input_plan
         self._expr = expr
+        self._compaction_threshold = compaction_threshold
 
     def __str__(self) -> str:
         return f"Selection: {self._expr}"
@@ -79,28 +173,145 @@ class PhysicalSelection(PhysicalPlan):
     def get_children(self) -> list["PhysicalPlan"]:
         return [self._input_plan]
 
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        (input_plan,) = children
+        return PhysicalSelection(
+            input_plan, self._expr, self._compaction_threshold
+        )
+
     def execute(self) -> Generator[RowBatch, None, None]:
         for batch in self._input_plan.execute():
-            expr_result = self._expr.evaluate(batch)
+            expr_result = self._expr.evaluate(batch.compact())
+            if isinstance(expr_result, ConstantColumn):
+                if expr_result.get_value():
+                    yield batch
+                continue
 
+            # The result holds a value for each selected row.
             selected_row_indices = [
-                i for i in range(expr_result.size()) if expr_result[i]
+                i
+                for i, is_selected in enumerate(expr_result.to_list())
+                if is_selected
             ]
+            if not selected_row_indices:
+                continue
+
+            filtered_batch = batch.select(selected_row_indices)
+            density = (
+                filtered_batch.num_rows() / filtered_batch.num_physical_rows()
+            )
+            if density < self._compaction_threshold:
+                filtered_batch = filtered_batch.compact()
+            yield filtered_batch
+
 
-            filtered_columns = []
-            for col_index in range(batch.num_columns()):
-                column = batch.get_column(col_index)
-                filtered_values = []
-                for row_index in selected_row_indices:
-                    filtered_values.append(column[row_index])
-                filtered_columns.append(
-                    Column(column.get_data_type(), filtered_values)
+class PhysicalAggregate(PhysicalPlan):
+    """Groups rows and computes aggregates of the groups.
+
+    When the input is a chain of projections and selections over a scan that
+    loads with several workers, the aggregation runs in two phases. Each
+    worker aggregates a partition of the scan into partial states, which are
+    then merged in partition order.
+
+    With a maximum number of groups in memory, groups are spilled to
+    temporary files when there are more, and one batch is emitted per spilled
+    partition.
+    """
+
+    _input_plan: PhysicalPlan
+    _grouping_exprs: list[PhysicalExpr]
+    _aggregation_exprs: list[PhysicalAggregateExpr]
+    _schema: Schema
+    _max_groups_in_memory: int | None
+
+    def __init__(
+        self,
+        input_plan: PhysicalPlan,
+        grouping_exprs: list[PhysicalExpr],
+        aggregation_exprs: list[PhysicalAggregateExpr],
+        schema: Schema,
+        max_groups_in_memory: int | None = None,
+    ) -> None:
+        self._input_plan = input_plan
+        self._grouping_exprs = grouping_exprs
+        self._aggregation_exprs = aggregation_exprs
+        self._schema = schema
+        self._max_groups_in_memory = max_groups_in_memory
+
+    def __str__(self) -> str:
+        return (
+            f"Aggregate: groupingExprs={_format_list(self._grouping_exprs)}, "
+            f"aggregationExprs={_format_list(self._aggregation_exprs)}"
+        )
+
+    def get_schema(self) -> Schema:
+        return self._schema
+
+    def get_children(self) -> list["PhysicalPlan"]:
+        return [self._input_plan]
+
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        (input_plan,) = children
+        return PhysicalAggregate(
+            input_plan,
+            self._grouping_exprs,
+            self._aggregation_exprs,
+            self._schema,
+            self._max_groups_in_memory,
+        )
+
+    def execute(self) -> Generator[RowBatch, None, None]:
+        aggregation = _HashAggregation(
+            len(self._grouping_exprs),
+            self._aggregation_exprs,
+            self._max_groups_in_memory,
+        )
+        partitions, num_workers = _partition(self._input_plan)
+        if num_workers > 1 and len(partitions) > 1:
+            self._merge_partitions(aggregation, partitions, num_workers)
+        else:
+            _aggregate(self._input_plan, self._grouping_exprs, aggregation)
+
+        for aggregate_values in aggregation.get_results():
+            aggregate_columns = [
+                Column(self._schema.get_data_type(column_name), values)
+                for column_name, values in zip(
+                    self._schema.get_field_names(), aggregate_values
                 )
+            ]
+            yield RowBatch(self._schema, aggregate_columns)
 
-            yield RowBatch(batch.get_schema(), filtered_columns)
+    def _merge_partitions(
+        self,
+        aggregation: "_HashAggregation",
+        partitions: list[PhysicalPlan],
+        num_workers: int,
+    ) -> None:
+        with ProcessPoolExecutor(num_workers) as executor:
+            partial_results = executor.map(
+                _aggregate_partition,
+                partitions,
+                repeat(self._grouping_exprs),
+                repeat(self._aggregation_exprs),
+            )
+            for keys, states in partial_results:
+                aggregation.merge(keys, states)
 
 
-class PhysicalAggregate(PhysicalPlan):
+class PhysicalSortedAggregate(PhysicalPlan):
+    """Aggregates input that is sorted by the grouping keys.
+
+    Rows with equal keys arrive one after another, so just the last group of
+    each batch may continue in the next one. The other groups are emitted as
+    soon as their batch is consumed.
+
+    Attributes:
+        _input_plan: The input, sorted by the grouping keys.
+        _grouping_exprs: The grouping key expressions.
+        _aggregation_exprs: The aggregate expressions.
+        _schema: The output schema.
+    """
+
     _input_plan: PhysicalPlan
     _grouping_exprs: list[PhysicalExpr]
     _aggregation_exprs: list[PhysicalAggregateExpr]
@@ -120,8 +331,9 @@ class PhysicalAggregate(PhysicalPlan):
 
     def __str__(self) -> str:
         return (
-            f"Aggregate: groupingExprs={self._grouping_exprs}, "
-            f"aggregationExprs={self._aggregation_exprs}"
+            "SortedAggregate: "
+            f"groupingExprs={_format_list(self._grouping_exprs)}, "
+            f"aggregationExprs={_format_list(self._aggregation_exprs)}"
         )
 
     def get_schema(self) -> Schema:
@@ -130,48 +342,1259 @@ class PhysicalAggregate(PhysicalPlan):
     def get_children(self) -> list["PhysicalPlan"]:
         return [self._input_plan]
 
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        (input_plan,) = children
+        return PhysicalSortedAggregate(
+            input_plan,
+            self._grouping_exprs,
+            self._aggregation_exprs,
+            self._schema,
+        )
+
     def execute(self) -> Generator[RowBatch, None, None]:
-        hash_map: dict[
-            tuple[Any, ...], list[PhysicalAggregateExpr.Accumulator]
-        ] = dict()
+        # The key and the partial state for each aggregate expression of the
+        # group that may continue in the next batch.
+        open_group: tuple[Any, list[Any]] | None = None
 
         for batch in self._input_plan.execute():
-            grouping_keys = list(
-                map(lambda expr: expr.evaluate(batch), self._grouping_exprs)
-            )
+            if batch.num_rows() == 0:
+                continue
+
+            # The open group, if any, gets id 0.
+            group_keys = [] if open_group is None else [open_group[0]]
+            group_ids = []
+            for key in self._get_keys(batch):
+                if not group_keys or key != group_keys[-1]:
+                    group_keys.append(key)
+                group_ids.append(len(group_keys) - 1)
+
+            num_groups = len(group_keys)
+            accumulators = []
+            for index, expr in enumerate(self._aggregation_exprs):
+                accumulator = expr.create_accumulator()
+                values = _evaluate_selected(expr.get_input_expr(), batch)
+                accumulator.update(group_ids, num_groups, values)
+                if open_group is not None:
+                    accumulator.merge([0], num_groups, [open_group[1][index]])
+                accumulators.append(accumulator)
 
-            for row_index in range(batch.num_rows()):
-                row_grouping_key = tuple(
-                    grouping_key[row_index] for grouping_key in grouping_keys
+            open_group = (
+                group_keys[-1],
+                [accumulator.get_state()[-1] for accumulator in accumulators],
+            )
+            if num_groups > 1:
+                yield self._to_row_batch(
+                    group_keys[:-1],
+                    [
+                        accumulator.get_values()[:-1]
+                        for accumulator in accumulators
+                    ],
                 )
-                if row_grouping_key not in hash_map:
-                    hash_map[row_grouping_key] = [
-                        expr.create_accumulator()
-                        for expr in self._aggregation_exprs
-                    ]
 
-                values_to_accumulate = [
-                    expr.get_input_expr().evaluate(batch)
-                    for expr in self._aggregation_exprs
+        if open_group is not None:
+            key, states = open_group
+            accumulators = []
+            for expr, state in zip(self._aggregation_exprs, states):
+                accumulator = expr.create_accumulator()
+                accumulator.merge([0], 1, [state])
+                accumulators.append(accumulator)
+            yield self._to_row_batch(
+                [key],
+                [accumulator.get_values() for accumulator in accumulators],
+            )
+
+    def _get_keys(self, batch: RowBatch) -> Iterable[Any]:
+        key_columns = [
+            _evaluate_selected(expr, batch).to_list()
+            for expr in self._grouping_exprs
+        ]
+        if len(key_columns) == 1:
+            return key_columns[0]
+        return zip(*key_columns)
+
+    def _to_row_batch(
+        self, group_keys: list[Any], aggregate_values: list[list[Any]]
+    ) -> RowBatch:
+        if len(self._grouping_exprs) == 1:
+            key_values = [group_keys]
+        else:
+            key_values = [list(values) for values in zip(*group_keys)]
+        columns = [
+            Column(self._schema.get_data_type(column_name), values)
+            for column_name, values in zip(
+                self._schema.get_field_names(), key_values + aggregate_values
+            )
+        ]
+        return RowBatch(self._schema, columns)
+
+
+class PhysicalSort(PhysicalPlan):
+    """Orders rows by sort keys.
+
+    The input is collected into runs of up to the maximum number of rows in
+    memory. A run is sorted one key column at a time, with stable sorts from
+    the least significant key to the most significant one, so that no tuples
+    of key values are built. When the input takes more than one run, every
+    sorted run is written into a temporary columnar file, and the runs are
+    merged with a heap holding the next row of each run, emitting batches as
+    they fill up. Rows with equal sort keys keep their input order.
+
+    Attributes:
+        _input_plan: The input.
+        _sort_exprs: The sort key expressions, most significant first.
+        _ascending: Whether each sort key is sorted in ascending order.
+        _max_rows_in_memory: The number of rows above which sorted runs are
+            spilled to disk, or None to sort the whole input in memory.
+    """
+
+    _input_plan: PhysicalPlan
+    _sort_exprs: list[PhysicalExpr]
+    _ascending: list[bool]
+    _max_rows_in_memory: int | None
+
+    def __init__(
+        self,
+        input_plan: PhysicalPlan,
+        sort_exprs: list[PhysicalExpr],
+        ascending: list[bool],
+        max_rows_in_memory: int | None = None,
+    ) -> None:
+        self._input_plan = input_plan
+        self._sort_exprs = sort_exprs
+        self._ascending = ascending
+        self._max_rows_in_memory = max_rows_in_memory
+
+    def __str__(self) -> str:
+        return (
+            f"Sort: sortExprs={_format_list(self._sort_exprs)}, "
+            f"ascending={_format_list(self._ascending)}"
+        )
+
+    def get_schema(self) -> Schema:
+        return self._input_plan.get_schema()
+
+    def get_children(self) -> list["PhysicalPlan"]:
+        return [self._input_plan]
+
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        (input_plan,) = children
+        return PhysicalSort(
+            input_plan,
+            self._sort_exprs,
+            self._ascending,
+            self._max_rows_in_memory,
+        )
+
+    def execute(self) -> Generator[RowBatch, None, None]:
+        batches: list[RowBatch] = []
+        num_rows = 0
+        spill_directory: tempfile.TemporaryDirectory[str] | None = None
+        run_paths: list[Path] = []
+        try:
+            for batch in self._input_plan.execute():
+                if batch.num_rows() == 0:
+                    continue
+                batches.append(batch.compact())
+                num_rows += batch.num_rows()
+                if (
+                    self._max_rows_in_memory is None
+                    or num_rows < self._max_rows_in_memory
+                ):
+                    continue
+                if spill_directory is None:
+                    spill_directory = tempfile.TemporaryDirectory()
+                run_path = Path(spill_directory.name) / f"{len(run_paths)}.ota"
+                self._write_run(run_path, self._sort_run(batches))
+                run_paths.append(run_path)
+                batches = []
+                num_rows = 0
+
+            if not run_paths:
+                if batches:
+                    yield self._sort_run(batches)
+                return
+
+            # The last run stays in memory.
+            runs = [self._read_run(run_path) for run_path in run_paths]
+            if batches:
+                runs.append(self._get_rows(self._sort_run(batches)))
+            yield from self._merge_runs(runs)
+        finally:
+            if spill_directory is not None:
+                spill_directory.cleanup()
+
+    def _get_merge_batch_size(self) -> int:
+        # The rows of each run that the merge holds at a time, and the number
+        # of rows in the batches that it emits.
+        assert self._max_rows_in_memory is not None
+        return max(1, min(self._max_rows_in_memory, _MAX_MERGE_BATCH_SIZE))
+
+    def _sort_run(self, batches: list[RowBatch]) -> RowBatch:
+        schema = self.get_schema()
+        if len(batches) == 1:
+            run = batches[0]
+        else:
+            run = RowBatch(
+                schema,
+                [
+                    Column(
+                        field.data_type,
+                        chain.from_iterable(
+                            batch.get_column(index).to_list()
+                            for batch in batches
+                        ),
+                    )
+                    for index, field in enumerate(schema.get_fields())
+                ],
+            )
+
+        order = _get_sorted_row_indices(run, self._sort_exprs, self._ascending)
+        return RowBatch(
+            schema,
+            [
+                run.get_column(index).take(order)
+                for index in range(run.num_columns())
+            ],
+        )
+
+    def _write_run(self, path: Path, run: RowBatch) -> None:
+        schema = run.get_schema()
+        values = [
+            run.get_column(index).to_list()
+            for index in range(run.num_columns())
+        ]
+        batch_size = self._get_merge_batch_size()
+        with ColumnarFileWriter(path, schema, batch_size) as writer:
+            for start in range(0, run.num_rows(), batch_size):
+                columns = [
+                    Column(
+                        field.data_type,
+                        column_values[start : start + batch_size],
+                    )
+                    for field, column_values in zip(schema.get_fields(), values)
                 ]
-                for accumulator_index in range(len(hash_map[row_grouping_key])):
-                    value = values_to_accumulate[accumulator_index][row_index]
-                    hash_map[row_grouping_key][accumulator_index].accumulate(
-                        value
+                writer.write(RowBatch(schema, columns))
+
+    def _read_run(
+        self, path: Path
+    ) -> Generator[tuple[tuple[Any, ...], tuple[Any, ...]], None, None]:
+        for batch in ColumnarFileLoader(path).load([]):
+            yield from self._get_rows(batch)
+
+    def _get_rows(
+        self, batch: RowBatch
+    ) -> Iterator[tuple[tuple[Any, ...], tuple[Any, ...]]]:
+        # Returns the sort key and the values of every row of a batch.
+        keys = _get_sort_keys(batch, self._sort_exprs, self._ascending)
+        rows = zip(
+            *(
+                batch.get_column(index).to_list()
+                for index in range(batch.num_columns())
+            )
+        )
+        return zip(keys, rows)
+
+    def _merge_runs(
+        self, runs: list[Iterator[tuple[tuple[Any, ...], tuple[Any, ...]]]]
+    ) -> Generator[RowBatch, None, None]:
+        # heapq.merge takes rows with equal keys from the runs in the order
+        # that the runs are given, which is their input order.
+        schema = self.get_schema()
+        batch_size = self._get_merge_batch_size()
+        rows: list[tuple[Any, ...]] = []
+        for _, row in heapq.merge(*runs, key=itemgetter(0)):
+            rows.append(row)
+            if len(rows) == batch_size:
+                yield _rows_to_batch(schema, rows)
+                rows = []
+        if rows:
+            yield _rows_to_batch(schema, rows)
+
+
+class PhysicalTopK(PhysicalPlan):
+    """Passes on the first rows of the input by sort keys.
+
+    This is a sort followed by a limit that holds just the rows that are
+    among the first ones seen so far, in a heap of the size of the limit.
+
+    Attributes:
+        _input_plan: The input.
+        _sort_exprs: The sort key expressions, most significant first.
+        _ascending: Whether each sort key is sorted in ascending order.
+        _limit: The maximum number of rows.
+    """
+
+    _input_plan: PhysicalPlan
+    _sort_exprs: list[PhysicalExpr]
+    _ascending: list[bool]
+    _limit: int
+
+    def __init__(
+        self,
+        input_plan: PhysicalPlan,
+        sort_exprs: list[PhysicalExpr],
+        ascending: list[bool],
+        limit: int,
+    ) -> None:
+        self._input_plan = input_plan
+        self._sort_exprs = sort_exprs
+        self._ascending = ascending
+        self._limit = limit
+
+    def __str__(self) -> str:
+        return (
+            f"TopK: sortExprs={_format_list(self._sort_exprs)}, "
+            f"ascending={_format_list(self._ascending)}, limit={self._limit}"
+        )
+
+    def get_schema(self) -> Schema:
+        return self._input_plan.get_schema()
+
+    def get_children(self) -> list["PhysicalPlan"]:
+        return [self._input_plan]
+
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        (input_plan,) = children
+        return PhysicalTopK(
+            input_plan, self._sort_exprs, self._ascending, self._limit
+        )
+
+    def execute(self) -> Generator[RowBatch, None, None]:
+        if self._limit == 0:
+            return
+
+        # heapq keeps the smallest entry at the root, so the sort keys and
+        # positions are negated, by flipping the sort directions, to keep the
+        # row that would be dropped first at the root. The position makes
+        # earlier rows win ties and keeps the rows out of comparisons.
+        descending = [not ascending for ascending in self._ascending]
+        heap: list[tuple[tuple[Any, ...], int, tuple[Any, ...]]] = []
+        position = 0
+        for batch in self._input_plan.execute():
+            if batch.num_rows() == 0:
+                continue
+            columns = [
+                batch.get_column(index) for index in range(batch.num_columns())
+            ]
+            negated_keys = _get_sort_keys(batch, self._sort_exprs, descending)
+            for row_index, negated_key in zip(
+                _get_row_indices(batch), negated_keys
+            ):
+                position -= 1
+                if len(heap) < self._limit:
+                    row = tuple(column[row_index] for column in columns)
+                    heapq.heappush(heap, (negated_key, position, row))
+                elif (negated_key, position) > heap[0][:2]:
+                    row = tuple(column[row_index] for column in columns)
+                    heapq.heapreplace(heap, (negated_key, position, row))
+        if not heap:
+            return
+
+        rows = [row for _, _, row in sorted(heap, reverse=True)]
+        yield _rows_to_batch(self.get_schema(), rows)
+
+
+class PhysicalLimit(PhysicalPlan):
+    """Passes on the first rows of the input.
+
+    The input is closed as soon as the rows have been read, which stops the
+    generators of the operators below it, down to the scan.
+
+    Attributes:
+        _input_plan: The input.
+        _limit: The maximum number of rows.
+    """
+
+    _input_plan: PhysicalPlan
+    _limit: int
+
+    def __init__(self, input_plan: PhysicalPlan, limit: int) -> None:
+        self._input_plan = input_plan
+        self._limit = limit
+
+    def __str__(self) -> str:
+        return f"Limit: {self._limit}"
+
+    def get_schema(self) -> Schema:
+        return self._input_plan.get_schema()
+
+    def get_children(self) -> list["PhysicalPlan"]:
+        return [self._input_plan]
+
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        (input_plan,) = children
+        return PhysicalLimit(input_plan, self._limit)
+
+    def execute(self) -> Generator[RowBatch, None, None]:
+        if self._limit == 0:
+            return
+
+        num_remaining_rows = self._limit
+        batches = self._input_plan.execute()
+        try:
+            for batch in batches:
+                num_rows = batch.num_rows()
+                if num_rows < num_remaining_rows:
+                    num_remaining_rows -= num_rows
+                    yield batch
+                    continue
+
+                # The input is closed before the last batch is passed on, so
+                # the operators and scans below stop and release their files
+                # and workers right away.
+                batches.close()
+                if num_rows > num_remaining_rows:
+                    columns = [
+                        batch.get_column(index)
+                        for index in range(batch.num_columns())
+                    ]
+                    row_indices = _get_row_indices(batch)
+                    batch = RowBatch(
+                        batch.get_schema(),
+                        columns,
+                        list(row_indices[:num_remaining_rows]),
                     )
+                yield batch
+                return
+        finally:
+            batches.close()
+
+
+class PhysicalHashJoin(PhysicalPlan):
+    """Joins two inputs by equal keys with a hash table of the right input.
+
+    The right rows are held as columns and indexed by key. Every left batch is
+    probed against the table and joined by taking the matching left and right
+    rows from the columns, while semi and anti joins just set the selection
+    vector of the left batch. The order of the left rows is kept when the
+    right input fits in memory.
+
+    With a maximum number of right rows in memory, both inputs are
+    hash-partitioned by key into temporary files when the right input has
+    more rows, and the partitions are joined one at a time. A partition with
+    more right rows than the maximum is partitioned again, with the hashes of
+    the keys mixed with the depth of the partitioning, up to a fixed depth, as
+    rows with equal keys can't be split. The output is then produced
+    partition by partition and isn't in the order of the left rows. The
+    runtime filter isn't built either, as the keys of the right input are no
+    longer in memory.
+
+    Attributes:
+        _left_plan: The left input, which probes the table.
+        _right_plan: The right input, which the table is built from.
+        _left_key_exprs: The key expressions of the left input.
+        _right_key_exprs: The key expressions of the right input.
+        _join_type: The join type.
+        _schema: The output schema.
+        _max_build_rows_in_memory: The maximum number of right rows in memory,
+            or None for no limit.
+        _runtime_filter: The filter that is built from the keys of the right
+            input before the left input is read, or None. The left input
+            applies it through a PhysicalRuntimeFilterExpr.
+    """
+
+    _left_plan: PhysicalPlan
+    _right_plan: PhysicalPlan
+    _left_key_exprs: list[PhysicalExpr]
+    _right_key_exprs: list[PhysicalExpr]
+    _join_type: JoinType
+    _schema: Schema
+    _max_build_rows_in_memory: int | None
+    _runtime_filter: RuntimeFilter | None
+
+    def __init__(
+        self,
+        left_plan: PhysicalPlan,
+        right_plan: PhysicalPlan,
+        left_key_exprs: list[PhysicalExpr],
+        right_key_exprs: list[PhysicalExpr],
+        join_type: JoinType,
+        schema: Schema,
+        max_build_rows_in_memory: int | None = None,
+        runtime_filter: RuntimeFilter | None = None,
+    ) -> None:
+        self._left_plan = left_plan
+        self._right_plan = right_plan
+        self._left_key_exprs = left_key_exprs
+        self._right_key_exprs = right_key_exprs
+        self._join_type = join_type
+        self._schema = schema
+        self._max_build_rows_in_memory = max_build_rows_in_memory
+        self._runtime_filter = runtime_filter
+
+    def __str__(self) -> str:
+        return (
+            f"HashJoin: joinType={self._join_type.name}, "
+            f"leftKeys={_format_list(self._left_key_exprs)}, "
+            f"rightKeys={_format_list(self._right_key_exprs)}"
+        )
+
+    def get_schema(self) -> Schema:
+        return self._schema
+
+    def get_children(self) -> list["PhysicalPlan"]:
+        return [self._left_plan, self._right_plan]
+
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        left_plan, right_plan = children
+        return PhysicalHashJoin(
+            left_plan,
+            right_plan,
+            self._left_key_exprs,
+            self._right_key_exprs,
+            self._join_type,
+            self._schema,
+            self._max_build_rows_in_memory,
+            self._runtime_filter,
+        )
+
+    def execute(self) -> Generator[RowBatch, None, None]:
+        if self._runtime_filter is not None:
+            self._runtime_filter.clear()
+        table = _JoinTable(self._right_plan.get_schema())
+        right_batches = self._right_plan.execute()
+        for batch in right_batches:
+            if batch.num_rows() == 0:
+                continue
+            table.add(_get_join_keys(batch, self._right_key_exprs), batch)
+            if (
+                self._max_build_rows_in_memory is not None
+                and table.num_rows() > self._max_build_rows_in_memory
+            ):
+                right_partitions = _JoinPartitions(
+                    self._right_plan.get_schema()
+                )
+                right_partitions.write(*table.get_rows())
+                del table
+                yield from self._join_partitions(
+                    right_partitions, right_batches
+                )
+                return
 
-        aggregate_columns = [
-            Column(
-                self._schema.get_data_type(column_name), [None] * len(hash_map)
+        if table.num_rows() == 0 and self._join_type in (
+            JoinType.Inner,
+            JoinType.Semi,
+        ):
+            return
+        if self._runtime_filter is not None:
+            self._runtime_filter.build(
+                table.get_row_ids_by_key().keys(), len(self._right_key_exprs)
             )
-            for column_name in self._schema.get_field_names()
-        ]
-        for row_index, row_grouping_key in enumerate(hash_map):
-            for index in range(len(self._grouping_exprs)):
-                aggregate_columns[index][row_index] = row_grouping_key[index]
-            for index in range(len(self._aggregation_exprs)):
-                aggregate_columns[len(self._grouping_exprs) + index][
+        for batch in self._left_plan.execute():
+            if batch.num_rows() == 0:
+                continue
+            keys = _get_join_keys(batch, self._left_key_exprs)
+            joined_batch = self._probe(table, keys, batch)
+            if joined_batch is not None:
+                yield joined_batch
+
+    def _join_partitions(
+        self,
+        right_partitions: "_JoinPartitions",
+        right_batches: Iterable[RowBatch],
+    ) -> Generator[RowBatch, None, None]:
+        left_partitions = _JoinPartitions(self._left_plan.get_schema())
+        try:
+            for batch in right_batches:
+                keys = _get_join_keys(batch, self._right_key_exprs)
+                right_partitions.write_batch(keys, batch)
+            for batch in self._left_plan.execute():
+                keys = _get_join_keys(batch, self._left_key_exprs)
+                left_partitions.write_batch(keys, batch)
+            yield from self._join_spilled_partitions(
+                right_partitions, left_partitions
+            )
+        finally:
+            right_partitions.close()
+            left_partitions.close()
+
+    def _join_spilled_partitions(
+        self,
+        right_partitions: "_JoinPartitions",
+        left_partitions: "_JoinPartitions",
+    ) -> Generator[RowBatch, None, None]:
+        # Joins the partitions one at a time, partitioning the ones with too
+        # many right rows again.
+        depth = right_partitions.get_depth()
+        for partition in range(_NUM_SPILL_PARTITIONS):
+            if (
+                self._max_build_rows_in_memory is not None
+                and right_partitions.num_rows(partition)
+                > self._max_build_rows_in_memory
+                and depth + 1 < _MAX_SPILL_DEPTH
+            ):
+                right_subpartitions = _JoinPartitions(
+                    self._right_plan.get_schema(), depth + 1
+                )
+                left_subpartitions = _JoinPartitions(
+                    self._left_plan.get_schema(), depth + 1
+                )
+                try:
+                    for keys, batch in right_partitions.read(partition):
+                        right_subpartitions.write_batch(keys, batch)
+                    for keys, batch in left_partitions.read(partition):
+                        left_subpartitions.write_batch(keys, batch)
+                    yield from self._join_spilled_partitions(
+                        right_subpartitions, left_subpartitions
+                    )
+                finally:
+                    right_subpartitions.close()
+                    left_subpartitions.close()
+                continue
+
+            table = _JoinTable(self._right_plan.get_schema())
+            for keys, batch in right_partitions.read(partition):
+                table.add(keys, batch)
+            for keys, batch in left_partitions.read(partition):
+                joined_batch = self._probe(table, keys, batch)
+                if joined_batch is not None:
+                    yield joined_batch
+
+    def _probe(
+        self, table: "_JoinTable", keys: list[Any], batch: RowBatch
+    ) -> RowBatch | None:
+        # Returns the joined rows of a left batch, or None when there are none.
+        row_ids_by_key = table.get_row_ids_by_key()
+        row_indices = _get_row_indices(batch)
+        match self._join_type:
+            case JoinType.Semi | JoinType.Anti:
+                is_semi_join = self._join_type == JoinType.Semi
+                selection = [
                     row_index
-                ] = hash_map[row_grouping_key][index].get_value()
+                    for row_index, key in zip(row_indices, keys)
+                    if (key in row_ids_by_key) == is_semi_join
+                ]
+                if not selection:
+                    return None
+                columns = [
+                    batch.get_column(index)
+                    for index in range(batch.num_columns())
+                ]
+                return RowBatch(self._schema, columns, selection)
+            case JoinType.Inner | JoinType.Left:
+                # Left rows without a match are joined with the row of default
+                # values that follows the right rows.
+                default_row_id = table.num_rows()
+                is_left_join = self._join_type == JoinType.Left
+                left_row_indices: list[int] = []
+                right_row_ids: list[int] = []
+                for row_index, key in zip(row_indices, keys):
+                    row_ids = row_ids_by_key.get(key)
+                    if row_ids is not None:
+                        left_row_indices.extend(repeat(row_index, len(row_ids)))
+                        right_row_ids.extend(row_ids)
+                    elif is_left_join:
+                        left_row_indices.append(row_index)
+                        right_row_ids.append(default_row_id)
+                if not left_row_indices:
+                    return None
+                columns = [
+                    batch.get_column(index).take(left_row_indices)
+                    for index in range(batch.num_columns())
+                ]
+                columns += [
+                    column.take(right_row_ids) for column in table.get_columns()
+                ]
+                if is_left_join:
+                    columns.append(
+                        Column(
+                            DataType.Bool,
+                            [
+                                row_id != default_row_id
+                                for row_id in right_row_ids
+                            ],
+                        )
+                    )
+                return RowBatch(self._schema, columns)
+            case _:
+                raise RuntimeError("Unsupported join type")
+
+
+def _format_list(values: Iterable[Any]) -> str:
+    # Formats expressions, names and flags by their text, as lists format
+    # their items with repr().
+    return "[" + ", ".join(str(value) for value in values) + "]"
+
+
+def _partition(plan: PhysicalPlan) -> tuple[list[PhysicalPlan], int]:
+    # Splits a chain of projections and selections over a scan by the
+    # partitions of the scan. Returns the partitions and the number of workers
+    # of the scan.
+    match plan:
+        case PhysicalScan():
+            return list(plan.get_partitions()), plan.get_num_workers()
+        case PhysicalProjection() | PhysicalSelection():
+            partitions, num_workers = _partition(plan.get_children()[0])
+            return [
+                plan.with_children([partition]) for partition in partitions
+            ], num_workers
+        case PhysicalMetrics():
+            partitions, num_workers = _partition(plan.get_plan())
+            return [
+                PhysicalMetrics(partition) for partition in partitions
+            ], num_workers
+        case _:
+            return [plan], 1
+
+
+def _aggregate(
+    input_plan: PhysicalPlan,
+    grouping_exprs: list[PhysicalExpr],
+    aggregation: "_HashAggregation",
+) -> None:
+    for batch in input_plan.execute():
+        if batch.num_rows() == 0:
+            continue
+        key_columns = [
+            _evaluate_selected(expr, batch) for expr in grouping_exprs
+        ]
+        aggregation.update(batch, key_columns)
+
+
+def _aggregate_partition(
+    input_plan: PhysicalPlan,
+    grouping_exprs: list[PhysicalExpr],
+    aggregation_exprs: list[PhysicalAggregateExpr],
+) -> tuple[list[Any], list[list[Any]]]:
+    # Runs in a worker process. Returns the keys and partial states of the
+    # groups of the partition. The number of groups is bounded by the size of
+    # the partition, so the partition isn't spilled.
+    aggregation = _HashAggregation(len(grouping_exprs), aggregation_exprs)
+    _aggregate(input_plan, grouping_exprs, aggregation)
+    return aggregation.get_partial_result()
+
+
+def _evaluate_selected(expr: PhysicalExpr, batch: RowBatch) -> Column:
+    return expr.evaluate(batch.compact())
+
+
+def _get_row_indices(batch: RowBatch) -> Sequence[int]:
+    selection = batch.get_selection()
+    if selection is None:
+        return range(batch.num_physical_rows())
+    return selection
+
+
+def _rows_to_batch(schema: Schema, rows: list[tuple[Any, ...]]) -> RowBatch:
+    columns = [
+        Column(field.data_type, list(column_values))
+        for field, column_values in zip(schema.get_fields(), zip(*rows))
+    ]
+    return RowBatch(schema, columns)
+
+
+def _get_sorted_row_indices(
+    batch: RowBatch, sort_exprs: list[PhysicalExpr], ascending: list[bool]
+) -> list[int]:
+    # Returns the indices of the rows of a batch without a selection vector in
+    # sort order. The rows are sorted by one key column at a time, from the
+    # least significant one, relying on the sorts being stable. Descending
+    # NumPy keys are inverted bitwise, which reverses their order without
+    # overflowing like negation does for the smallest integer.
+    key_columns = [expr.evaluate(batch) for expr in sort_exprs]
+    if vectorized.ENABLED:
+        keys = []
+        for column, is_ascending in zip(key_columns, ascending):
+            values = vectorized.to_ndarray(column)
+            if np.ndim(values) == 0:
+                continue
+            values = values.astype(np.int64, copy=False)
+            keys.append(values if is_ascending else ~values)
+        if keys:
+            # np.lexsort sorts by the last key first.
+            return np.lexsort(keys[::-1]).tolist()
+        return list(range(batch.num_rows()))
+
+    order = list(range(batch.num_rows()))
+    for column, is_ascending in reversed(list(zip(key_columns, ascending))):
+        order.sort(key=column.to_list().__getitem__, reverse=not is_ascending)
+    return order
+
+
+def _get_join_keys(batch: RowBatch, key_exprs: list[PhysicalExpr]) -> list[Any]:
+    # Returns the key of each selected row, a single value for a single key
+    # expression and a tuple of values otherwise.
+    key_columns = [
+        _evaluate_selected(expr, batch).to_list() for expr in key_exprs
+    ]
+    if len(key_columns) == 1:
+        return key_columns[0]
+    return list(zip(*key_columns))
+
+
+def _get_sort_keys(
+    batch: RowBatch, sort_exprs: list[PhysicalExpr], ascending: list[bool]
+) -> list[tuple[Any, ...]]:
+    # Returns the sort key of each selected row as a tuple that orders like
+    # the row. Values of descending keys are negated, which works for Bool
+    # values too, as they order like the integers 0 and 1.
+    if not sort_exprs:
+        return [()] * batch.num_rows()
+    key_columns = []
+    for expr, is_ascending in zip(sort_exprs, ascending):
+        values = _evaluate_selected(expr, batch).to_list()
+        if not is_ascending:
+            values = [-value for value in values]
+        key_columns.append(values)
+    return list(zip(*key_columns))
+
+
+def _get_spill_partition(key: Any, depth: int) -> int:
+    # Mixes the hash of a key with the depth of the partitioning, with the
+    # finalizer of SplitMix64, so that the keys of a partition are spread over
+    # all partitions at the next depth. Salting the key itself, e.g. hashing
+    # (depth, key), keeps keys together, as tuple hashes combine the hashes of
+    # their items linearly.
+    value = (hash(key) + depth * 0x9E3779B97F4A7C15) & _MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return (value ^ (value >> 31)) % _NUM_SPILL_PARTITIONS
+
+
+class _GroupTable:
+    """Assigns dense ids to grouping keys in the order they are first seen.
+
+    Attributes:
+        _group_ids: The group id of each key. A key is a single value when
+            grouping by one expression and a tuple of values otherwise.
+    """
+
+    _group_ids: dict[Any, int]
+
+    def __init__(self) -> None:
+        self._group_ids = {}
+
+    def get_group_ids(
+        self, key_columns: list[Column], num_rows: int
+    ) -> list[int]:
+        """Returns the group ids of the keys in the columns, adding new ones.
+
+        Args:
+            key_columns: The grouping key columns. With no columns, all rows
+                belong to a single group.
+            num_rows: The number of rows in the columns.
+        Returns:
+            The group id of each row.
+        """
+        if len(key_columns) == 0:
+            return [self._group_ids.setdefault((), 0)] * num_rows
+        if len(key_columns) == 1:
+            keys: Any = key_columns[0].to_list()
+        else:
+            keys = zip(*(column.to_list() for column in key_columns))
+        return self.get_group_ids_of_keys(keys)
+
+    def get_group_ids_of_keys(self, keys: Iterable[Any]) -> list[int]:
+        """Returns the group ids of keys, adding new ones.
+
+        Args:
+            keys: The keys, as returned by get_keys().
+        Returns:
+            The group id of each key.
+        """
+        group_ids = self._group_ids
+        return [group_ids.setdefault(key, len(group_ids)) for key in keys]
+
+    def get_keys(self) -> list[Any]:
+        """Returns the keys of the groups.
+
+        Returns:
+            The keys, indexed by group id.
+        """
+        return list(self._group_ids)
+
+    def num_groups(self) -> int:
+        return len(self._group_ids)
+
+    def get_key_values(self, num_key_columns: int) -> list[list[Any]]:
+        """Returns the keys of the groups as columns of values.
+
+        Args:
+            num_key_columns: The number of grouping key columns.
+        Returns:
+            The values of each key column, indexed by group id.
+        """
+        if num_key_columns == 1:
+            return [list(self._group_ids)]
+        key_columns: list[list[Any]] = [[] for _ in range(num_key_columns)]
+        for key in self._group_ids:
+            for index, value in enumerate(key):
+                key_columns[index].append(value)
+        return key_columns
+
+
+class _HashAggregation:
+    """Accumulates rows into groups, spilling groups to disk when needed.
+
+    When the number of groups in memory exceeds the maximum, the partial
+    states of the groups are hash-partitioned by key into temporary files and
+    the groups are cleared. At the end the spilled partitions are merged one
+    at a time. A partition with more groups than the maximum is partitioned
+    again while merging it, with the hashes of the keys mixed with the depth
+    of the partitioning, so that it splits differently. Keys whose hashes are
+    equal can't be split, so partitions at the maximum depth are merged in
+    memory regardless of their number of groups.
+
+    Attributes:
+        _num_key_columns: The number of grouping key columns.
+        _aggregation_exprs: The aggregate expressions.
+        _max_groups: The maximum number of groups in memory, or None for no
+            limit.
+        _depth: The number of times that the groups have been partitioned.
+        _group_table: The keys of the groups in memory.
+        _accumulators: The states of the groups in memory, one accumulator
+            per aggregate expression.
+        _spill_files: The temporary file of each partition, or an empty list
+            before the first spill.
+    """
+
+    _num_key_columns: int
+    _aggregation_exprs: list[PhysicalAggregateExpr]
+    _max_groups: int | None
+    _depth: int
+    _group_table: _GroupTable
+    _accumulators: list[PhysicalAggregateExpr.Accumulator]
+    _spill_files: list[BinaryIO]
+
+    def __init__(
+        self,
+        num_key_columns: int,
+        aggregation_exprs: list[PhysicalAggregateExpr],
+        max_groups: int | None = None,
+        depth: int = 0,
+    ) -> None:
+        self._num_key_columns = num_key_columns
+        self._aggregation_exprs = aggregation_exprs
+        self._max_groups = max_groups
+        self._depth = depth
+        self._spill_files = []
+        self._reset()
+
+    def update(self, batch: RowBatch, key_columns: list[Column]) -> None:
+        """Accumulates the selected rows of a batch.
+
+        Args:
+            batch: The batch.
+            key_columns: The grouping key values of the selected rows.
+        """
+        group_ids = self._group_table.get_group_ids(
+            key_columns, batch.num_rows()
+        )
+        num_groups = self._group_table.num_groups()
+        for expr, accumulator in zip(
+            self._aggregation_exprs, self._accumulators
+        ):
+            values = _evaluate_selected(expr.get_input_expr(), batch)
+            accumulator.update(group_ids, num_groups, values)
+        self._spill_if_full()
+
+    def merge(self, keys: list[Any], states: list[list[Any]]) -> None:
+        """Merges partial states of groups.
+
+        Args:
+            keys: The keys of the groups, as returned by _GroupTable.get_keys().
+            states: The states of the groups for each aggregate expression.
+        """
+        self._merge(keys, states)
+        self._spill_if_full()
+
+    def get_partial_result(self) -> tuple[list[Any], list[list[Any]]]:
+        """Returns the keys and partial states of the groups in memory.
+
+        Returns:
+            The keys and the states for each aggregate expression.
+        """
+        return self._group_table.get_keys(), [
+            accumulator.get_state() for accumulator in self._accumulators
+        ]
+
+    def get_results(self) -> Generator[list[list[Any]], None, None]:
+        """Returns the grouping keys and aggregate values of the groups.
+
+        Returns:
+            A generator of the values of the key columns followed by the
+            aggregate values, one item per spilled partition, or a single
+            item when nothing was spilled.
+        """
+        if not self._spill_files:
+            yield self._get_values()
+            return
+
+        self._spill()
+        try:
+            for spill_file in self._spill_files:
+                if spill_file.tell() == 0:
+                    continue
+                partition = _HashAggregation(
+                    self._num_key_columns,
+                    self._aggregation_exprs,
+                    self._max_groups
+                    if self._depth + 1 < _MAX_SPILL_DEPTH
+                    else None,
+                    self._depth + 1,
+                )
+                spill_file.seek(0)
+                while True:
+                    try:
+                        keys, states = pickle.load(spill_file)
+                    except EOFError:
+                        break
+                    partition.merge(keys, states)
+                yield from partition.get_results()
+        finally:
+            for spill_file in self._spill_files:
+                spill_file.close()
+
+    def _merge(self, keys: list[Any], states: list[list[Any]]) -> None:
+        group_ids = self._group_table.get_group_ids_of_keys(keys)
+        num_groups = self._group_table.num_groups()
+        for accumulator, accumulator_states in zip(self._accumulators, states):
+            accumulator.merge(group_ids, num_groups, accumulator_states)
+
+    def _get_values(self) -> list[list[Any]]:
+        values = self._group_table.get_key_values(self._num_key_columns)
+        values += [
+            accumulator.get_values() for accumulator in self._accumulators
+        ]
+        return values
+
+    def _reset(self) -> None:
+        self._group_table = _GroupTable()
+        self._accumulators = [
+            expr.create_accumulator() for expr in self._aggregation_exprs
+        ]
+
+    def _spill_if_full(self) -> None:
+        if (
+            self._max_groups is not None
+            and self._group_table.num_groups() > self._max_groups
+        ):
+            self._spill()
+
+    def _spill(self) -> None:
+        if not self._spill_files:
+            self._spill_files = [
+                tempfile.TemporaryFile() for _ in range(_NUM_SPILL_PARTITIONS)
+            ]
+        keys, states = self.get_partial_result()
+        partition_group_ids: list[list[int]] = [
+            [] for _ in range(_NUM_SPILL_PARTITIONS)
+        ]
+        for group_id, key in enumerate(keys):
+            partition = _get_spill_partition(key, self._depth)
+            partition_group_ids[partition].append(group_id)
+        for spill_file, group_ids in zip(
+            self._spill_files, partition_group_ids
+        ):
+            if group_ids:
+                pickle.dump(
+                    (
+                        [keys[group_id] for group_id in group_ids],
+                        [
+                            [accumulator_states[i] for i in group_ids]
+                            for accumulator_states in states
+                        ],
+                    ),
+                    spill_file,
+                )
+        self._reset()
+
+
+class _JoinTable:
+    """The rows of the right input of a join, indexed by key.
+
+    Attributes:
+        _schema: The schema of the rows.
+        _row_ids_by_key: The ids of the rows with each key, in input order.
+        _values: The values of each column, indexed by row id.
+        _columns: The columns of the values followed by a row of default
+            values, or None when they haven't been created since rows were
+            added.
+    """
+
+    _schema: Schema
+    _row_ids_by_key: dict[Any, list[int]]
+    _values: list[list[Any]]
+    _columns: list[Column] | None
+
+    def __init__(self, schema: Schema) -> None:
+        self._schema = schema
+        self._row_ids_by_key = {}
+        self._values = [[] for _ in schema.get_field_names()]
+        self._columns = None
+
+    def add(self, keys: list[Any], batch: RowBatch) -> None:
+        """Adds the selected rows of a batch.
+
+        Args:
+            keys: The keys of the selected rows.
+            batch: The batch.
+        """
+        row_ids_by_key = self._row_ids_by_key
+        for row_id, key in enumerate(keys, self.num_rows()):
+            row_ids = row_ids_by_key.get(key)
+            if row_ids is None:
+                row_ids_by_key[key] = [row_id]
+            else:
+                row_ids.append(row_id)
+        batch = batch.compact()
+        for index, values in enumerate(self._values):
+            values += batch.get_column(index).to_list()
+        self._columns = None
+
+    def num_rows(self) -> int:
+        return len(self._values[0])
+
+    def get_row_ids_by_key(self) -> dict[Any, list[int]]:
+        return self._row_ids_by_key
+
+    def get_columns(self) -> list[Column]:
+        """Returns the rows as columns, followed by a row of default values.
+
+        The default values are 0 and False, and the id of their row is the
+        number of rows.
+
+        Returns:
+            The columns.
+        """
+        if self._columns is None:
+            self._columns = []
+            for field, values in zip(self._schema.get_fields(), self._values):
+                match field.data_type:
+                    case DataType.Int:
+                        default_value: Any = 0
+                    case DataType.Bool:
+                        default_value = False
+                    case _:
+                        raise RuntimeError("Unsupported data type")
+                self._columns.append(
+                    Column(field.data_type, values + [default_value])
+                )
+        return self._columns
+
+    def get_rows(self) -> tuple[list[Any], list[list[Any]]]:
+        """Returns the keys and values of the rows.
+
+        Returns:
+            The key of each row and the values of each column.
+        """
+        keys: list[Any] = [None] * self.num_rows()
+        for key, row_ids in self._row_ids_by_key.items():
+            for row_id in row_ids:
+                keys[row_id] = key
+        return keys, self._values
+
+
+class _JoinPartitions:
+    """Rows of a join input, hash-partitioned by key into temporary files.
+
+    Attributes:
+        _schema: The schema of the rows.
+        _depth: The number of times that the rows have been partitioned
+            before, which the partitions of the keys depend on.
+        _files: The temporary file of each partition.
+        _num_rows: The number of rows in each partition.
+    """
+
+    _schema: Schema
+    _depth: int
+    _files: list[BinaryIO]
+    _num_rows: list[int]
+
+    def __init__(self, schema: Schema, depth: int = 0) -> None:
+        self._schema = schema
+        self._depth = depth
+        self._files = [
+            tempfile.TemporaryFile() for _ in range(_NUM_SPILL_PARTITIONS)
+        ]
+        self._num_rows = [0] * _NUM_SPILL_PARTITIONS
+
+    def get_depth(self) -> int:
+        return self._depth
+
+    def num_rows(self, partition: int) -> int:
+        return self._num_rows[partition]
+
+    def write(self, keys: list[Any], values: list[list[Any]]) -> None:
+        """Writes rows into the partitions of their keys.
+
+        Args:
+            keys: The key of each row.
+            values: The values of each column.
+        """
+        partition_row_ids: list[list[int]] = [
+            [] for _ in range(_NUM_SPILL_PARTITIONS)
+        ]
+        for row_id, key in enumerate(keys):
+            partition = _get_spill_partition(key, self._depth)
+            partition_row_ids[partition].append(row_id)
+        for partition, row_ids in enumerate(partition_row_ids):
+            if row_ids:
+                self._num_rows[partition] += len(row_ids)
+                pickle.dump(
+                    (
+                        [keys[row_id] for row_id in row_ids],
+                        [
+                            [column_values[row_id] for row_id in row_ids]
+                            for column_values in values
+                        ],
+                    ),
+                    self._files[partition],
+                )
+
+    def write_batch(self, keys: list[Any], batch: RowBatch) -> None:
+        """Writes the selected rows of a batch into the partitions of their keys.
+
+        Args:
+            keys: The keys of the selected rows.
+            batch: The batch.
+        """
+        batch = batch.compact()
+        self.write(
+            keys,
+            [
+                batch.get_column(index).to_list()
+                for index in range(batch.num_columns())
+            ],
+        )
+
+    def read(
+        self, partition: int
+    ) -> Generator[tuple[list[Any], RowBatch], None, None]:
+        """Reads the rows of a partition.
+
+        Args:
+            partition: The partition.
+        Returns:
+            A generator of keys and batches of the rows with these keys.
+        """
+        partition_file = self._files[partition]
+        partition_file.seek(0)
+        while True:
+            try:
+                keys, values = pickle.load(partition_file)
+            except EOFError:
+                return
+            columns = [
+                Column(field.data_type, column_values)
+                for field, column_values in zip(
+                    self._schema.get_fields(), values
+                )
+            ]
+            yield keys, RowBatch(self._schema, columns)
+
+    def close(self) -> None:
+        for partition_file in self._files:
+            partition_file.close()
+
 
-        yield RowBatch(self._schema, aggregate_columns)
+# The number of partitions that groups and join inputs are spilled into.
+_NUM_SPILL_PARTITIONS = 16
+# The maximum number of times that spilled groups and join inputs are
+# partitioned. Keys with equal hashes end up in the same partition at every
+# depth, so partitioning stops at this depth.
+_MAX_SPILL_DEPTH = 4
+_MASK_64 = (1 << 64) - 1
+# The maximum number of rows that a sort reads from each spilled run at a time
+# and emits in a batch while merging the runs.
+_MAX_MERGE_BATCH_SIZE = 4096
@@ -0,0 +1,141 @@
+"""Runtime metrics of physical plans, as shown by EXPLAIN ANALYZE."""
+
+import time
+from dataclasses import dataclass
+from typing import Generator
+
+from ota.row_batch import RowBatch
+from ota.schema import Schema
+
+from .abc import PhysicalPlan
+
+
+@dataclass()
+class OperatorMetrics:
+    """What an operator did while executing.
+
+    Attributes:
+        elapsed_ns: The time spent producing batches, including the time that
+            the inputs spent producing theirs.
+        rows_out: The number of rows produced.
+        batches_out: The number of batches produced.
+        peak_batch_rows: The number of rows in the largest batch produced.
+    """
+
+    elapsed_ns: int = 0
+    rows_out: int = 0
+    batches_out: int = 0
+    peak_batch_rows: int = 0
+
+
+class PhysicalMetrics(PhysicalPlan):
+    """Records the metrics of the plan that it wraps.
+
+    Operators that run in worker processes, like the partitions of a parallel
+    aggregation, aren't recorded.
+
+    Attributes:
+        _plan: The wrapped plan. Its children are wrapped as well.
+        _metrics: The metrics recorded so far.
+    """
+
+    _plan: PhysicalPlan
+    _metrics: OperatorMetrics
+
+    def __init__(self, plan: PhysicalPlan) -> None:
+        self._plan = plan
+        self._metrics = OperatorMetrics()
+
+    def __str__(self) -> str:
+        return str(self._plan)
+
+    def get_schema(self) -> Schema:
+        return self._plan.get_schema()
+
+    def get_children(self) -> list[PhysicalPlan]:
+        return self._plan.get_children()
+
+    def with_children(self, children: list[PhysicalPlan]) -> PhysicalPlan:
+        return PhysicalMetrics(self._plan.with_children(children))
+
+    def get_plan(self) -> PhysicalPlan:
+        return self._plan
+
+    def get_metrics(self) -> OperatorMetrics:
+        return self._metrics
+
+    def execute(self) -> Generator[RowBatch, None, None]:
+        metrics = self._metrics
+        batches = self._plan.execute()
+        try:
+            while True:
+                start = time.perf_counter_ns()
+                batch = next(batches, None)
+                metrics.elapsed_ns += time.perf_counter_ns() - start
+                if batch is None:
+                    return
+                num_rows = batch.num_rows()
+                metrics.rows_out += num_rows
+                metrics.batches_out += 1
+                metrics.peak_batch_rows = max(metrics.peak_batch_rows, num_rows)
+                yield batch
+        finally:
+            batches.close()
+
+
+def instrument(plan: PhysicalPlan) -> PhysicalMetrics:
+    """Wraps every operator of a plan to record its metrics.
+
+    Args:
+        plan: The plan.
+    Returns:
+        The wrapped plan.
+    """
+    children = [instrument(child) for child in plan.get_children()]
+    return PhysicalMetrics(plan.with_children(children))
+
+
+def format_metrics(plan: PhysicalMetrics) -> str:
+    """Formats an executed plan with the metrics of every operator.
+
+    Args:
+        plan: The plan returned by instrument().
+    Returns:
+        One line per operator, children indented below their parent.
+    """
+    return "\n".join(_format_metrics(plan, 0)) + "\n"
+
+
+def _format_metrics(plan: PhysicalMetrics, depth: int) -> list[str]:
+    metrics = plan.get_metrics()
+    children = [
+        child
+        for child in plan.get_children()
+        if isinstance(child, PhysicalMetrics)
+    ]
+    child_metrics = [child.get_metrics() for child in children]
+    exclusive_ns = metrics.elapsed_ns - sum(
+        child.elapsed_ns for child in child_metrics
+    )
+    annotations = [
+        f"time={_format_ns(metrics.elapsed_ns)}",
+        f"self_time={_format_ns(exclusive_ns)}",
+    ]
+    if children:
+        annotations += [
+            f"rows_in={sum(child.rows_out for child in child_metrics)}",
+            f"batches_in={sum(child.batches_out for child in child_metrics)}",
+        ]
+    annotations += [
+        f"rows_out={metrics.rows_out}",
+        f"batches_out={metrics.batches_out}",
+        f"peak_batch_rows={metrics.peak_batch_rows}",
+    ]
+    lines = ["\t" * depth + f"{plan} [{', '.join(annotations)}]"]
+    for child in children:
+        lines += _format_metrics(child, depth + 1)
+    return lines
+
+
+def _format_ns(ns: int) -> str:
+    return f"{ns / 1_000_000:.3f}ms"
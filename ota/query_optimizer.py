@@ -0,0 +1,38 @@
+from ota.logical.optimizer.abc import OptimizerRule
+from ota.logical.optimizer.impls import (
+    ConstantFoldingRule,
+    PredicatePushdownRule,
+    ProjectionPushdownRule,
+)
+from ota.logical.plan.abc import LogicalPlan
+
+
+def get_default_rules() -> list[OptimizerRule]:
+    """Returns the rules applied when none are given, in application order.
+
+    Returns:
+        The rules.
+    """
+    return [
+        ConstantFoldingRule(),
+        PredicatePushdownRule(),
+        ProjectionPushdownRule(),
+    ]
+
+
+def optimize(
+    logical_plan: LogicalPlan, rules: list[OptimizerRule] | None = None
+) -> LogicalPlan:
+    """Rewrites a logical plan by applying optimizer rules in order.
+
+    Args:
+        logical_plan: The plan.
+        rules: The rules. The default rules are used when not given.
+    Returns:
+        The optimized plan.
+    """
+    if rules is None:
+        rules = get_default_rules()
+    for rule in rules:
+        logical_plan = rule.optimize(logical_plan)
+    return logical_plan
@@ -1,5 +1,7 @@
 from typing import cast
 
+from ota.data_loader import ScanPredicate
+from ota.join_type import JoinType
 from ota.logical.expr.abc import LogicalBinaryExpr, LogicalExpr
 from ota.logical.expr.impls import (
     LogicalAggregateExprAvg,
@@ -7,6 +9,7 @@ from ota.logical.expr.impls import (
     LogicalAggregateExprMax,
     LogicalAggregateExprMin,
     LogicalAggregateExprSum,
+    LogicalAliasExpr,
     LogicalBooleanExprAnd,
     LogicalBooleanExprEq,
     LogicalBooleanExprGt,
@@ -16,6 +19,7 @@ from ota.logical.expr.impls import (
     LogicalBooleanExprNeq,
     LogicalBooleanExprOr,
     LogicalColumnExpr,
+    LogicalLiteralBoolExpr,
     LogicalLiteralIntExpr,
     LogicalMathExprAdd,
     LogicalMathExprDivide,
@@ -26,11 +30,16 @@ from ota.logical.expr.impls import (
 from ota.logical.plan.abc import LogicalPlan
 from ota.logical.plan.impls import (
     LogicalAggregate,
+    LogicalEmptyRelation,
+    LogicalJoin,
+    LogicalLimit,
     LogicalProjection,
     LogicalScan,
     LogicalSelection,
+    LogicalSort,
 )
 from ota.physical.expr.abc import PhysicalBinaryExpr, PhysicalExpr
+from ota.physical.expr.compiler import compile_expr
 from ota.physical.expr.impls import (
     PhysicalAggregateExprAvg,
     PhysicalAggregateExprCount,
@@ -46,20 +55,29 @@ from ota.physical.expr.impls import (
     PhysicalBooleanExprNeq,
     PhysicalBooleanExprOr,
     PhysicalColumnExpr,
+    PhysicalLiteralBoolExpr,
     PhysicalLiteralIntExpr,
     PhysicalMathExprAdd,
     PhysicalMathExprDivide,
     PhysicalMathExprModulo,
     PhysicalMathExprMultiply,
     PhysicalMathExprSubtract,
+    PhysicalRuntimeFilterExpr,
 )
 from ota.physical.plan.abc import PhysicalPlan
 from ota.physical.plan.impls import (
     PhysicalAggregate,
+    PhysicalEmptyRelation,
+    PhysicalHashJoin,
+    PhysicalLimit,
     PhysicalProjection,
     PhysicalScan,
     PhysicalSelection,
+    PhysicalSort,
+    PhysicalSortedAggregate,
+    PhysicalTopK,
 )
+from ota.runtime_filter import RuntimeFilter
 from ota.schema import Schema
 
 
@@ -67,9 +85,7 @@ def create_physical_plan(logical_plan: LogicalPlan) -> PhysicalPlan:
     match logical_plan:
         case LogicalScan():
             logical_plan = cast(LogicalScan, logical_plan)
-            return PhysicalScan(
-                logical_plan.get_data_loader(), logical_plan.get_projection()
-            )
+            return _create_physical_scan(logical_plan)
         case LogicalProjection():
             logical_plan = cast(LogicalProjection, logical_plan)
             return _create_physical_projection(logical_plan)
@@ -79,10 +95,71 @@ def create_physical_plan(logical_plan: LogicalPlan) -> PhysicalPlan:
         case LogicalAggregate():
             logical_plan = cast(LogicalAggregate, logical_plan)
             return _create_physical_aggregate(logical_plan)
+        case LogicalSort():
+            logical_plan = cast(LogicalSort, logical_plan)
+            return _create_physical_sort(logical_plan)
+        case LogicalLimit():
+            logical_plan = cast(LogicalLimit, logical_plan)
+            return _create_physical_limit(logical_plan)
+        case LogicalJoin():
+            logical_plan = cast(LogicalJoin, logical_plan)
+            return _create_physical_join(logical_plan)
+        case LogicalEmptyRelation():
+            return PhysicalEmptyRelation(logical_plan.get_schema())
         case _:
             raise RuntimeError(f"Unsupported plan: {logical_plan}")
 
 
+def _create_physical_scan(
+    logical_plan: LogicalScan,
+    runtime_filter: RuntimeFilter | None = None,
+    runtime_filter_keys: list[LogicalExpr] | None = None,
+) -> PhysicalScan:
+    # The runtime filter of a join, if any, is applied to the keys while
+    # loading, along with the predicate.
+    logical_predicate = logical_plan.get_predicate()
+    predicate_column_names: set[str] = set()
+    if logical_predicate is not None:
+        predicate_column_names |= logical_predicate.get_column_names()
+    for key_expr in runtime_filter_keys or []:
+        predicate_column_names |= key_expr.get_column_names()
+    if not predicate_column_names:
+        return PhysicalScan(
+            logical_plan.get_data_loader(), logical_plan.get_projection()
+        )
+
+    loader_schema = logical_plan.get_data_loader().get_schema()
+    column_names = [
+        column_name
+        for column_name in loader_schema.get_field_names()
+        if column_name in predicate_column_names
+    ]
+    predicate_schema = loader_schema.select(column_names)
+    predicate_exprs = []
+    if logical_predicate is not None:
+        predicate_exprs.append(
+            _create_physical_expr(logical_predicate, predicate_schema)
+        )
+    if runtime_filter is not None and runtime_filter_keys is not None:
+        predicate_exprs.append(
+            PhysicalRuntimeFilterExpr(
+                [
+                    _create_physical_expr(expr, predicate_schema)
+                    for expr in runtime_filter_keys
+                ],
+                runtime_filter,
+            )
+        )
+    predicate_expr = predicate_exprs[0]
+    if len(predicate_exprs) == 2:
+        predicate_expr = PhysicalBooleanExprAnd(*predicate_exprs)
+    return PhysicalScan(
+        logical_plan.get_data_loader(),
+        logical_plan.get_projection(),
+        ScanPredicate(column_names, predicate_expr),
+    )
+
+
 def _create_physical_projection(
     logical_plan: LogicalProjection,
 ) -> PhysicalProjection:
@@ -95,8 +172,10 @@ def _create_physical_projection(
     )
     projection_exprs = list(
         map(
-            lambda expr: _create_physical_expr(
-                expr, logical_plan.get_input_plan()
+            lambda expr: compile_expr(
+                _create_physical_expr(
+                    expr, logical_plan.get_input_plan().get_schema()
+                )
             ),
             logical_plan.get_exprs(),
         )
@@ -109,17 +188,18 @@ def _create_physical_selection(
 ) -> PhysicalSelection:
     input_plan = create_physical_plan(logical_plan.get_input_plan())
     filter_expr = _create_physical_expr(
-        logical_plan.get_expr(), logical_plan.get_input_plan()
+        logical_plan.get_expr(), logical_plan.get_input_plan().get_schema()
     )
-    return PhysicalSelection(input_plan, filter_expr)
+    return PhysicalSelection(input_plan, compile_expr(filter_expr))
 
 
 def _create_physical_aggregate(
     logical_plan: LogicalAggregate,
-) -> PhysicalAggregate:
+) -> PhysicalAggregate | PhysicalSortedAggregate:
     input_plan = create_physical_plan(logical_plan.get_input_plan())
+    input_schema = logical_plan.get_input_plan().get_schema()
     grouping_exprs = [
-        _create_physical_expr(expr, logical_plan.get_input_plan())
+        _create_physical_expr(expr, input_schema)
         for expr in logical_plan.get_grouping_exprs()
     ]
     aggregation_exprs = []
@@ -138,43 +218,189 @@ def _create_physical_aggregate(
             case _:
                 raise RuntimeError("Unsupported aggregate expr")
         aggregation_exprs.append(
-            physical_cls(
-                _create_physical_expr(
-                    expr.get_expr(),
-                    logical_plan.get_input_plan(),
-                )
-            )
+            physical_cls(_create_physical_expr(expr.get_expr(), input_schema))
+        )
+    if _is_grouped_by_sort_order(logical_plan):
+        return PhysicalSortedAggregate(
+            input_plan,
+            grouping_exprs,
+            aggregation_exprs,
+            logical_plan.get_schema(),
         )
     return PhysicalAggregate(
         input_plan,
         grouping_exprs,
         aggregation_exprs,
         logical_plan.get_schema(),
+        logical_plan.get_max_groups_in_memory(),
+    )
+
+
+def _create_physical_sort(logical_plan: LogicalSort) -> PhysicalSort:
+    input_plan = create_physical_plan(logical_plan.get_input_plan())
+    input_schema = logical_plan.get_input_plan().get_schema()
+    sort_exprs = [
+        _create_physical_expr(expr, input_schema)
+        for expr in logical_plan.get_sort_exprs()
+    ]
+    return PhysicalSort(
+        input_plan,
+        sort_exprs,
+        logical_plan.get_ascending(),
+        logical_plan.get_max_rows_in_memory(),
+    )
+
+
+def _create_physical_limit(
+    logical_plan: LogicalLimit,
+) -> PhysicalLimit | PhysicalTopK:
+    sort = logical_plan.get_input_plan()
+    if not isinstance(sort, LogicalSort):
+        input_plan = create_physical_plan(sort)
+        return PhysicalLimit(input_plan, logical_plan.get_limit())
+
+    # A limit over a sort only needs to hold the first rows.
+    input_plan = create_physical_plan(sort.get_input_plan())
+    input_schema = sort.get_input_plan().get_schema()
+    sort_exprs = [
+        _create_physical_expr(expr, input_schema)
+        for expr in sort.get_sort_exprs()
+    ]
+    return PhysicalTopK(
+        input_plan,
+        sort_exprs,
+        sort.get_ascending(),
+        logical_plan.get_limit(),
+    )
+
+
+def _create_physical_join(logical_plan: LogicalJoin) -> PhysicalHashJoin:
+    left_plan = logical_plan.get_left_plan()
+    right_plan = logical_plan.get_right_plan()
+    left_keys = logical_plan.get_left_keys()
+    for left_key, right_key in zip(left_keys, logical_plan.get_right_keys()):
+        left_data_type = left_key.to_schema_field(left_plan).data_type
+        right_data_type = right_key.to_schema_field(right_plan).data_type
+        if left_data_type != right_data_type:
+            raise RuntimeError("Type mismatch in join keys")
+    left_key_exprs = [
+        _create_physical_expr(expr, left_plan.get_schema())
+        for expr in left_keys
+    ]
+    right_key_exprs = [
+        _create_physical_expr(expr, right_plan.get_schema())
+        for expr in logical_plan.get_right_keys()
+    ]
+
+    # Left rows without a match are dropped by inner and semi joins, so the
+    # left input can drop them early, as soon as their keys are known.
+    runtime_filter = None
+    if logical_plan.get_join_type() in (JoinType.Inner, JoinType.Semi) and all(
+        expr.get_column_names() for expr in left_keys
+    ):
+        runtime_filter = RuntimeFilter()
+        if isinstance(left_plan, LogicalScan):
+            physical_left_plan: PhysicalPlan = _create_physical_scan(
+                left_plan, runtime_filter, left_keys
+            )
+        else:
+            physical_left_plan = PhysicalSelection(
+                create_physical_plan(left_plan),
+                PhysicalRuntimeFilterExpr(left_key_exprs, runtime_filter),
+            )
+    else:
+        physical_left_plan = create_physical_plan(left_plan)
+
+    return PhysicalHashJoin(
+        physical_left_plan,
+        create_physical_plan(right_plan),
+        left_key_exprs,
+        right_key_exprs,
+        logical_plan.get_join_type(),
+        logical_plan.get_schema(),
+        logical_plan.get_max_build_rows_in_memory(),
+        runtime_filter,
     )
 
 
+def _is_grouped_by_sort_order(logical_plan: LogicalAggregate) -> bool:
+    # Checks whether the grouping keys are columns that the input is sorted by,
+    # so that rows of a group are adjacent.
+    grouping_exprs = logical_plan.get_grouping_exprs()
+    if not grouping_exprs or not all(
+        isinstance(expr, LogicalColumnExpr) for expr in grouping_exprs
+    ):
+        return False
+    grouping_column_names = {
+        cast(LogicalColumnExpr, expr).get_column_name()
+        for expr in grouping_exprs
+    }
+    sort_order = _get_sort_order(logical_plan.get_input_plan())
+    return grouping_column_names == set(sort_order[: len(grouping_exprs)])
+
+
+def _get_sort_order(logical_plan: LogicalPlan) -> list[str]:
+    # Returns the columns that the output of the plan is known to be sorted
+    # by, most significant first.
+    match logical_plan:
+        case LogicalScan():
+            return logical_plan.get_data_loader().get_sort_order()
+        case LogicalSelection() | LogicalLimit():
+            return _get_sort_order(logical_plan.get_input_plan())
+        case LogicalSort():
+            sort_order = []
+            for expr, ascending in zip(
+                logical_plan.get_sort_exprs(), logical_plan.get_ascending()
+            ):
+                if not isinstance(expr, LogicalColumnExpr) or not ascending:
+                    break
+                sort_order.append(expr.get_column_name())
+            return sort_order
+        case LogicalProjection():
+            # Sort columns stay sorted as long as they are projected as is.
+            projected_column_names = {
+                expr.get_column_name()
+                for expr in logical_plan.get_exprs()
+                if isinstance(expr, LogicalColumnExpr)
+            }
+            sort_order = []
+            for column_name in _get_sort_order(logical_plan.get_input_plan()):
+                if column_name not in projected_column_names:
+                    break
+                sort_order.append(column_name)
+            return sort_order
+        case _:
+            return []
+
+
 def _create_physical_expr(
-    logical_expr: LogicalExpr, input_plan: LogicalPlan
+    logical_expr: LogicalExpr, input_schema: Schema
 ) -> PhysicalExpr:
     match logical_expr:
         case LogicalColumnExpr():
             column_expr = cast(LogicalColumnExpr, logical_expr)
-            return _create_physical_column_expr(column_expr, input_plan)
+            return _create_physical_column_expr(column_expr, input_schema)
         case LogicalBinaryExpr():
             binary_expr = cast(LogicalBinaryExpr, logical_expr)
-            return _create_physical_binary_expr(binary_expr, input_plan)
+            return _create_physical_binary_expr(binary_expr, input_schema)
         case LogicalLiteralIntExpr():
             literal_int_expr = cast(LogicalLiteralIntExpr, logical_expr)
             return PhysicalLiteralIntExpr(literal_int_expr.get_value())
+        case LogicalLiteralBoolExpr():
+            literal_bool_expr = cast(LogicalLiteralBoolExpr, logical_expr)
+            return PhysicalLiteralBoolExpr(literal_bool_expr.get_value())
+        case LogicalAliasExpr():
+            alias_expr = cast(LogicalAliasExpr, logical_expr)
+            return _create_physical_expr(alias_expr.get_expr(), input_schema)
         case _:
             raise RuntimeError(f"Unsupported expr: {logical_expr}")
 
 
 def _create_physical_column_expr(
-    logical_expr: LogicalColumnExpr, input_plan: LogicalPlan
+    logical_expr: LogicalColumnExpr, input_schema: Schema
 ) -> PhysicalColumnExpr:
     column_name = logical_expr.get_column_name()
-    column_names = input_plan.get_schema().get_field_names()
+    column_names = input_schema.get_field_names()
     try:
         index = column_names.index(column_name)
     except ValueError:
@@ -183,13 +409,13 @@ def _create_physical_column_expr(
 
 
 def _create_physical_binary_expr(
-    logical_expr: LogicalBinaryExpr, input_plan: LogicalPlan
+    logical_expr: LogicalBinaryExpr, input_schema: Schema
 ) -> PhysicalBinaryExpr:
     left_expr = _create_physical_expr(
-        logical_expr.get_left_operand(), input_plan
+        logical_expr.get_left_operand(), input_schema
     )
     right_expr = _create_physical_expr(
-        logical_expr.get_right_operand(), input_plan
+        logical_expr.get_right_operand(), input_schema
     )
     match logical_expr:
         case LogicalMathExprAdd():
@@ -0,0 +1,193 @@
+"""A cache of query results."""
+
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from pathlib import PurePath
+from typing import Any, Hashable
+
+from ota.column_cache import get_num_column_bytes
+from ota.data_loader import DataLoader
+from ota.logical.expr.abc import LogicalExpr
+from ota.logical.plan.abc import LogicalPlan
+from ota.logical.plan.impls import LogicalScan
+from ota.row_batch import RowBatch
+from ota.schema import Schema
+
+
+class ResultCache:
+    """Holds the results of the most recently used plans.
+
+    Results are keyed by the structure of the plan and the state of the files
+    that it scans, so a result is no longer used once a file changes. Plans
+    scanning sources without a known state, or holding values that can't be
+    described by their contents, aren't cached.
+
+    The cache holds up to a number of results and a total size of their column
+    buffers, evicting the least recently used results. Results larger than the
+    size budget aren't cached.
+
+    Attributes:
+        _max_entries: The maximum number of cached results.
+        _max_bytes: The maximum total size of the column buffers of the cached
+            results.
+        _num_bytes: The total size of the column buffers of the cached
+            results.
+        _results: The cached results and their sizes, least recently used
+            first.
+        _num_hits: The number of lookups that found a result.
+        _num_misses: The number of lookups that didn't.
+    """
+
+    _max_entries: int
+    _max_bytes: int
+    _num_bytes: int
+    _results: OrderedDict[Hashable, tuple[list[RowBatch], int]]
+    _num_hits: int
+    _num_misses: int
+
+    def __init__(
+        self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024
+    ) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._num_bytes = 0
+        self._results = OrderedDict()
+        self._num_hits = 0
+        self._num_misses = 0
+
+    def get_key(self, logical_plan: LogicalPlan) -> Hashable | None:
+        """Returns the key of the result of a plan.
+
+        Args:
+            logical_plan: The plan.
+        Returns:
+            The key, or None when the result can't be cached.
+        """
+        source_states = []
+        for data_loader in _get_data_loaders(logical_plan):
+            source_state = data_loader.get_source_state()
+            if source_state is None:
+                return None
+            source_states.append(source_state)
+        try:
+            fingerprint = _fingerprint(logical_plan)
+        except _NotFingerprintableError:
+            return None
+        return fingerprint, tuple(source_states)
+
+    def get(self, key: Hashable) -> list[RowBatch] | None:
+        """Returns a cached result and marks it as most recently used.
+
+        Args:
+            key: The key returned by get_key().
+        Returns:
+            The batches of the result, or None when it isn't cached.
+        """
+        result = self._results.get(key)
+        if result is None:
+            self._num_misses += 1
+            return None
+        self._num_hits += 1
+        self._results.move_to_end(key)
+        return result[0]
+
+    def put(self, key: Hashable, batches: list[RowBatch]) -> None:
+        """Caches a result, evicting the least recently used ones when full.
+
+        Results larger than the size budget aren't cached.
+
+        Args:
+            key: The key returned by get_key().
+            batches: The batches of the result.
+        """
+        num_bytes = sum(map(get_num_batch_bytes, batches))
+        if num_bytes > self._max_bytes:
+            return
+        previous_result = self._results.pop(key, None)
+        if previous_result is not None:
+            self._num_bytes -= previous_result[1]
+        self._results[key] = (batches, num_bytes)
+        self._num_bytes += num_bytes
+        while (
+            len(self._results) > self._max_entries
+            or self._num_bytes > self._max_bytes
+        ):
+            _, (_, evicted_num_bytes) = self._results.popitem(last=False)
+            self._num_bytes -= evicted_num_bytes
+
+    def clear(self) -> None:
+        self._results.clear()
+        self._num_bytes = 0
+
+    def num_entries(self) -> int:
+        return len(self._results)
+
+    def get_max_bytes(self) -> int:
+        return self._max_bytes
+
+    def get_num_bytes(self) -> int:
+        return self._num_bytes
+
+    def get_num_hits(self) -> int:
+        return self._num_hits
+
+    def get_num_misses(self) -> int:
+        return self._num_misses
+
+
+def get_num_batch_bytes(batch: RowBatch) -> int:
+    """Returns the size of the column buffers of a batch.
+
+    Args:
+        batch: The batch.
+    Returns:
+        The size in bytes, including the rows that aren't selected.
+    """
+    return sum(
+        get_num_column_bytes(batch.get_column(index))
+        for index in range(batch.num_columns())
+    )
+
+
+def _get_data_loaders(logical_plan: LogicalPlan) -> list[DataLoader]:
+    if isinstance(logical_plan, LogicalScan):
+        return [logical_plan.get_data_loader()]
+    return [
+        data_loader
+        for child in logical_plan.get_children()
+        for data_loader in _get_data_loaders(child)
+    ]
+
+
+class _NotFingerprintableError(Exception):
+    """Raised for values whose fingerprint would depend on their identity."""
+
+
+def _fingerprint(value: Any) -> str:
+    # Describes plans, expressions, loaders, schemas and dataclasses by their
+    # type and attributes, so that structurally equal plans get the same
+    # fingerprint. Other objects are rejected instead of falling back to a
+    # repr() that may contain their address and never match again.
+    match value:
+        case LogicalPlan() | LogicalExpr() | DataLoader() | Schema():
+            attributes = sorted(vars(value).items())
+        case _ if is_dataclass(value) and not isinstance(value, type):
+            attributes = [
+                (field.name, getattr(value, field.name))
+                for field in fields(value)
+            ]
+        case list() | tuple():
+            return "[" + ", ".join(map(_fingerprint, value)) + "]"
+        case None | bool() | int() | float() | str() | Enum() | PurePath():
+            return repr(value)
+        case _:
+            raise _NotFingerprintableError()
+    return (
+        f"{type(value).__name__}("
+        + ", ".join(
+            f"{name}={_fingerprint(attribute)}"
+            for name, attribute in attributes
+        )
+        + ")"
+    )
@@ -1,33 +1,144 @@
+from typing import Sequence
+
 from ota.column import Column
 from ota.schema import Schema
 
 
 class RowBatch:
+    """Columns of equal size, optionally with a selection vector.
+
+    A selection vector holds the indices of the rows of the columns that
+    belong to the batch. It lets a filter drop rows without copying the
+    columns. Expressions must only see the selected rows, as the others may
+    hold values that a filter dropped, like divisors that are 0, so they are
+    evaluated on compact(). Operators that pass rows on use get_selection().
+
+    A compacted batch copies the selected rows of a column when the column is
+    first read, so that evaluating an expression copies just the columns that
+    it reads.
+
+    Attributes:
+        _schema: The schema of the columns.
+        _columns: The columns. In a compacted batch, columns that haven't
+            been read yet are None.
+        _selection: The indices of the selected rows in ascending order, or
+            None when all rows are selected.
+        _compacted: The batch returned by compact(), once it has been called.
+        _uncompacted: The columns and the selection that a compacted batch
+            takes the rows of its columns from, or None.
+    """
+
     _schema: Schema
-    _columns: list[Column]
+    _columns: list[Column | None]
+    _selection: Sequence[int] | None
+    _compacted: "RowBatch | None"
+    _uncompacted: tuple[list[Column | None], Sequence[int]] | None
 
-    def __init__(self, schema: Schema, columns: list[Column]) -> None:
+    def __init__(
+        self,
+        schema: Schema,
+        columns: list[Column],
+        selection: Sequence[int] | None = None,
+    ) -> None:
         self._schema = schema
-        self._columns = columns
+        self._columns = list(columns)
+        self._selection = selection
+        self._compacted = None
+        self._uncompacted = None
 
     def get_schema(self) -> Schema:
         return self._schema
 
     def get_column(self, index) -> Column:
-        return self._columns[index]
+        column = self._columns[index]
+        if column is None:
+            assert self._uncompacted is not None
+            columns, selection = self._uncompacted
+            uncompacted_column = columns[index]
+            assert uncompacted_column is not None
+            column = uncompacted_column.take(selection)
+            self._columns[index] = column
+        return column
+
+    def get_selection(self) -> Sequence[int] | None:
+        return self._selection
 
     def num_columns(self) -> int:
         return len(self._columns)
 
     def num_rows(self) -> int:
-        return self._columns[0].size()
+        """Returns the number of selected rows.
+
+        Returns:
+            The number of rows.
+        """
+        if self._selection is not None:
+            return len(self._selection)
+        return self.num_physical_rows()
+
+    def num_physical_rows(self) -> int:
+        """Returns the number of rows in the columns, selected or not.
+
+        Returns:
+            The number of rows.
+        """
+        if self._uncompacted is not None:
+            return len(self._uncompacted[1])
+        return self.get_column(0).size()
+
+    def compact(self) -> "RowBatch":
+        """Returns a batch with just the selected rows and no selection vector.
+
+        The selected rows of a column are copied when the column is first
+        read from the returned batch, which is the same on every call, so that
+        operators evaluating several expressions on the same batch share the
+        copies.
+
+        Returns:
+            A batch.
+        """
+        if self._selection is None:
+            return self
+        if self._compacted is None:
+            compacted = RowBatch(self._schema, [])
+            compacted._columns = [None] * len(self._columns)
+            compacted._uncompacted = (self._columns, self._selection)
+            self._compacted = compacted
+        return self._compacted
+
+    def select(self, row_indices: Sequence[int]) -> "RowBatch":
+        """Returns a batch with some of the selected rows, sharing the columns.
+
+        The selection vector of the batch is composed with the row indices,
+        and a compacted batch selects from the columns it was compacted from,
+        so that no column is copied.
+
+        Args:
+            row_indices: The indices of the rows among the selected rows, in
+                ascending order.
+        Returns:
+            A batch.
+        """
+        if self._uncompacted is not None:
+            columns, selection = self._uncompacted
+        else:
+            columns, selection = self._columns, self._selection
+        if selection is not None:
+            row_indices = [selection[row_index] for row_index in row_indices]
+        selected = RowBatch(self._schema, [], row_indices)
+        selected._columns = columns
+        return selected
 
     def to_csv(self) -> str:
         csv_str = ""
-        for row_index in range(self.num_rows()):
+        if self._selection is not None:
+            row_indices: Sequence[int] = self._selection
+        else:
+            row_indices = range(self.num_rows())
+        for row_index in row_indices:
             for col_index in range(self.num_columns()):
                 if col_index:
                     csv_str += ","
-                csv_str += str(self._columns[col_index][row_index])
+                csv_str += str(self.get_column(col_index)[row_index])
             csv_str += "\n"
         return csv_str
@@ -0,0 +1,156 @@
+"""Filters on the join keys of the right input, applied to the left input."""
+
+from typing import Any, Collection
+
+from ota.column import Column, ConstantColumn
+from ota.physical.expr import vectorized
+from ota.physical.expr.vectorized import np
+from ota.schema import DataType
+
+# Multipliers of the multiplicative hash functions of the Bloom filter.
+_HASH_MULTIPLIERS = (
+    0x9E3779B97F4A7C15,
+    0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9,
+)
+_HASH_MASK = (1 << 64) - 1
+_BITS_PER_KEY = 8
+
+
+class RuntimeFilter:
+    """A summary of the keys of the right input of a join.
+
+    A join builds the filter from its hash table before it reads its left
+    input, so that left rows whose keys have no match can be dropped while
+    they are loaded. The filter holds the range of every Int key column and a
+    Bloom filter of the keys. Rows with a match always pass, some rows without
+    one may pass too. Before the filter is built, every row passes.
+
+    Attributes:
+        _ranges: The smallest and largest value of each key column, or None
+            for Bool columns, or None before the filter is built.
+        _bits: The bitmap of the Bloom filter, or None before the filter is
+            built.
+        _shift: The shift that turns a 64-bit hash into a bit index.
+    """
+
+    _ranges: list[tuple[int, int] | None] | None
+    _bits: bytearray | None
+    _shift: int
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def build(self, keys: Collection[Any], num_key_columns: int) -> None:
+        """Builds the filter from the distinct keys of the right input.
+
+        Args:
+            keys: The keys, single values for a single key column and tuples
+                of values otherwise.
+            num_key_columns: The number of key columns.
+        """
+        num_bits = 64
+        while num_bits < _BITS_PER_KEY * len(keys):
+            num_bits *= 2
+        self._shift = 64 - num_bits.bit_length() + 1
+        self._bits = bytearray(num_bits // 8)
+        for key in keys:
+            hash_input = _get_hash_input(key)
+            for multiplier in _HASH_MULTIPLIERS:
+                index = ((hash_input * multiplier) & _HASH_MASK) >> self._shift
+                self._bits[index >> 3] |= 1 << (index & 7)
+
+        key_columns = [keys] if num_key_columns == 1 else list(zip(*keys))
+        self._ranges = [
+            (min(values), max(values))
+            if values and all(type(value) is int for value in values)
+            else None
+            for values in map(list, key_columns)
+        ]
+
+    def clear(self) -> None:
+        """Makes every row pass until the filter is built again."""
+        self._ranges = None
+        self._bits = None
+        self._shift = 0
+
+    def is_built(self) -> bool:
+        return self._bits is not None
+
+    def get_ranges(self) -> list[tuple[int, int] | None] | None:
+        """Returns the range of the values of each key column.
+
+        Returns:
+            The smallest and largest value of each Int key column and None for
+            Bool columns, or None when the filter isn't built.
+        """
+        return self._ranges
+
+    def may_contain(self, key_columns: list[Column]) -> Column:
+        """Checks which rows may have a match.
+
+        Args:
+            key_columns: The key columns of the rows.
+        Returns:
+            A Bool column that is False for the rows without a match.
+        """
+        size = key_columns[0].size()
+        if self._bits is None or self._ranges is None:
+            return ConstantColumn(DataType.Bool, True, size)
+
+        if (
+            vectorized.ENABLED
+            and len(key_columns) == 1
+            and key_columns[0].get_data_type() == DataType.Int
+            and not isinstance(key_columns[0], ConstantColumn)
+        ):
+            return self._may_contain_vectorized(key_columns[0])
+
+        if len(key_columns) == 1:
+            keys: list[Any] = key_columns[0].to_list()
+        else:
+            keys = list(zip(*(column.to_list() for column in key_columns)))
+        return Column(DataType.Bool, [self._may_contain(key) for key in keys])
+
+    def _may_contain(self, key: Any) -> bool:
+        assert self._bits is not None and self._ranges is not None
+        values = key if type(key) is tuple else (key,)
+        for value, value_range in zip(values, self._ranges):
+            if value_range is not None and not (
+                value_range[0] <= value <= value_range[1]
+            ):
+                return False
+        hash_input = _get_hash_input(key)
+        for multiplier in _HASH_MULTIPLIERS:
+            index = ((hash_input * multiplier) & _HASH_MASK) >> self._shift
+            if not self._bits[index >> 3] >> (index & 7) & 1:
+                return False
+        return True
+
+    def _may_contain_vectorized(self, key_column: Column) -> Column:
+        assert self._bits is not None and self._ranges is not None
+        values = vectorized.to_ndarray(key_column)
+        selected = np.ones(len(values), dtype=np.bool_)
+        if self._ranges[0] is not None:
+            min_value, max_value = self._ranges[0]
+            selected &= (values >= min_value) & (values <= max_value)
+
+        # Multiplying unsigned 64-bit integers wraps around like the masked
+        # multiplication of the pure Python hash.
+        hash_inputs = values.view(np.uint64)
+        bitmap = np.frombuffer(self._bits, dtype=np.uint8)
+        for multiplier in _HASH_MULTIPLIERS:
+            indices = (hash_inputs * np.uint64(multiplier)) >> np.uint64(
+                self._shift
+            )
+            bits = bitmap[indices >> np.uint64(3)] >> (indices & np.uint64(7))
+            selected &= (bits & 1).astype(np.bool_)
+        return vectorized.from_ndarray(DataType.Bool, selected)
+
+
+def _get_hash_input(key: Any) -> int:
+    # Int and Bool keys are hashed by value, keys of several columns by their
+    # Python hash, which doesn't vary between processes for these values.
+    if type(key) is tuple:
+        return hash(key)
+    return int(key)
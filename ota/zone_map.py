@@ -0,0 +1,196 @@
+"""Minimum and maximum values of columns, used to skip data in scans."""
+
+from dataclasses import dataclass
+from typing import Any
+
+from ota.column import Column
+from ota.physical.expr.abc import PhysicalBinaryExpr, PhysicalExpr
+from ota.physical.expr.impls import (
+    PhysicalBooleanExprAnd,
+    PhysicalBooleanExprEq,
+    PhysicalBooleanExprGt,
+    PhysicalBooleanExprGtEq,
+    PhysicalBooleanExprLt,
+    PhysicalBooleanExprLtEq,
+    PhysicalBooleanExprNeq,
+    PhysicalBooleanExprOr,
+    PhysicalColumnExpr,
+    PhysicalLiteralBoolExpr,
+    PhysicalLiteralIntExpr,
+    PhysicalMathExprAdd,
+    PhysicalMathExprMultiply,
+    PhysicalMathExprSubtract,
+    PhysicalRuntimeFilterExpr,
+)
+from ota.schema import DataType
+
+
+@dataclass()
+class ColumnStatistics:
+    """The smallest and largest value in a part of a column.
+
+    Attributes:
+        min_value: The smallest value.
+        max_value: The largest value.
+    """
+
+    min_value: Any
+    max_value: Any
+
+
+def compute_statistics(column: Column) -> ColumnStatistics:
+    """Computes the statistics of a non-empty column.
+
+    Args:
+        column: The column.
+    Returns:
+        The statistics.
+    """
+    if column.get_data_type() == DataType.Int:
+        values = column.get_buffer()
+    else:
+        values = column.to_list()
+    return ColumnStatistics(min(values), max(values))
+
+
+def may_match(expr: PhysicalExpr, statistics: list[ColumnStatistics]) -> bool:
+    """Checks whether any row may pass a filter, judging by statistics.
+
+    Args:
+        expr: The filter expression.
+        statistics: The statistics of the columns that the expression reads,
+            by column index.
+    Returns:
+        False when no row can pass the filter, True when some rows may.
+    """
+    match expr:
+        case PhysicalBooleanExprAnd():
+            return _may_match_operand(
+                expr.get_left_expr(), statistics
+            ) and _may_match_operand(expr.get_right_expr(), statistics)
+        case PhysicalBooleanExprOr():
+            return _may_match_operand(
+                expr.get_left_expr(), statistics
+            ) or _may_match_operand(expr.get_right_expr(), statistics)
+        case (
+            PhysicalBooleanExprEq()
+            | PhysicalBooleanExprNeq()
+            | PhysicalBooleanExprGt()
+            | PhysicalBooleanExprGtEq()
+            | PhysicalBooleanExprLt()
+            | PhysicalBooleanExprLtEq()
+        ):
+            ranges = _get_operand_ranges(expr, statistics)
+            if ranges is None:
+                return True
+            return _may_compare(expr, *ranges)
+        case PhysicalColumnExpr():
+            # A column used as a filter is a Bool column, or an Int column
+            # whose rows pass when they aren't 0.
+            column_statistics = statistics[expr.get_index()]
+            if type(column_statistics.max_value) is bool:
+                return column_statistics.max_value
+            return not (
+                column_statistics.min_value == column_statistics.max_value == 0
+            )
+        case PhysicalLiteralBoolExpr():
+            return expr.get_value()
+        case PhysicalRuntimeFilterExpr():
+            key_ranges = expr.get_runtime_filter().get_ranges()
+            if key_ranges is None:
+                return True
+            for key_expr, key_range in zip(expr.get_key_exprs(), key_ranges):
+                value_range = _get_range(key_expr, statistics)
+                if key_range is None or value_range is None:
+                    continue
+                if (
+                    value_range[1] < key_range[0]
+                    or key_range[1] < value_range[0]
+                ):
+                    return False
+            return True
+        case _:
+            return True
+
+
+def _may_match_operand(
+    expr: PhysicalExpr, statistics: list[ColumnStatistics]
+) -> bool:
+    # AND and OR, unlike filters, take Int values as true when they are 1.
+    if isinstance(expr, PhysicalColumnExpr):
+        column_statistics = statistics[expr.get_index()]
+        if type(column_statistics.max_value) is not bool:
+            return (
+                column_statistics.min_value <= 1 <= column_statistics.max_value
+            )
+    return may_match(expr, statistics)
+
+
+def _may_compare(
+    expr: PhysicalExpr,
+    left_range: tuple[Any, Any],
+    right_range: tuple[Any, Any],
+) -> bool:
+    left_min, left_max = left_range
+    right_min, right_max = right_range
+    match expr:
+        case PhysicalBooleanExprEq():
+            return left_min <= right_max and right_min <= left_max
+        case PhysicalBooleanExprNeq():
+            return not (left_min == left_max == right_min == right_max)
+        case PhysicalBooleanExprGt():
+            return left_max > right_min
+        case PhysicalBooleanExprGtEq():
+            return left_max >= right_min
+        case PhysicalBooleanExprLt():
+            return left_min < right_max
+        case PhysicalBooleanExprLtEq():
+            return left_min <= right_max
+        case _:
+            return True
+
+
+def _get_range(
+    expr: PhysicalExpr, statistics: list[ColumnStatistics]
+) -> tuple[Any, Any] | None:
+    # Returns the smallest and largest value that the expression can take, or
+    # None when they are unknown.
+    match expr:
+        case PhysicalColumnExpr():
+            column_statistics = statistics[expr.get_index()]
+            return column_statistics.min_value, column_statistics.max_value
+        case PhysicalLiteralIntExpr() | PhysicalLiteralBoolExpr():
+            return expr.get_value(), expr.get_value()
+        case PhysicalMathExprAdd():
+            ranges = _get_operand_ranges(expr, statistics)
+            if ranges is None:
+                return None
+            (left_min, left_max), (right_min, right_max) = ranges
+            return left_min + right_min, left_max + right_max
+        case PhysicalMathExprSubtract():
+            ranges = _get_operand_ranges(expr, statistics)
+            if ranges is None:
+                return None
+            (left_min, left_max), (right_min, right_max) = ranges
+            return left_min - right_max, left_max - right_min
+        case PhysicalMathExprMultiply():
+            ranges = _get_operand_ranges(expr, statistics)
+            if ranges is None:
+                return None
+            left_range, right_range = ranges
+            products = [
+                left * right for left in left_range for right in right_range
+            ]
+            return min(products), max(products)
+        case _:
+            return None
+
+
+def _get_operand_ranges(
+    expr: PhysicalBinaryExpr, statistics: list[ColumnStatistics]
+) -> tuple[tuple[Any, Any], tuple[Any, Any]] | None:
+    left_range = _get_range(expr.get_left_expr(), statistics)
+    right_range = _get_range(expr.get_right_expr(), statistics)
+    if left_range is None or right_range is None:
+        return None
+    return left_range, right_range
@@ -0,0 +1,39 @@
+import json
+
+from benchmarks.data import sorted_ints, uniform_ints, zipf_ints
+from benchmarks.run import run_benchmarks
+
+
+def test_data_generators():
+    assert uniform_ints(100, 10, seed=3) == uniform_ints(100, 10, seed=3)
+    assert uniform_ints(100, 10, seed=3) != uniform_ints(100, 10, seed=4)
+    assert all(1 <= value <= 10 for value in uniform_ints(100, 10))
+
+    values = zipf_ints(1_000, 100)
+    assert values == zipf_ints(1_000, 100)
+    assert all(1 <= value <= 100 for value in values)
+    assert values.count(1) > values.count(50)
+
+    values = sorted_ints(100, 10)
+    assert values == sorted(values)
+
+
+def test_run_benchmarks():
+    results = run_benchmarks(num_rows=200, batch_size=64, repeat=1)
+    json.dumps(results)
+
+    names = {result["name"] for result in results}
+    assert names == {
+        "csv_scan",
+        "csv_scan_cached",
+        "kernel",
+        "compiled_expr",
+        "selection",
+        "aggregation",
+    }
+    kernels = [r["params"]["expr"] for r in results if r["name"] == "kernel"]
+    assert len(kernels) == 13
+    for result in results:
+        assert result["num_rows"] == 200
+        assert result["rows_per_second"] > 0
+        assert result["peak_memory_bytes"] > 0
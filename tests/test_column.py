@@ -0,0 +1,82 @@
+from array import array
+
+import pytest
+
+from ota.column import Column, ConstantColumn
+from ota.row_batch import RowBatch
+from ota.schema import DataType, Schema
+
+
+def test_int_column():
+    column = Column(DataType.Int, ["1", "-2", "3"])
+    assert isinstance(column.get_buffer(), array)
+    assert column.size() == 3
+    assert column[1] == -2
+    assert column.to_list() == [1, -2, 3]
+    assert column.take([2, 0]).to_list() == [3, 1]
+
+
+def test_bool_column():
+    values = [i % 3 == 0 for i in range(20)]
+    column = Column(DataType.Bool, values)
+    assert len(column.get_buffer()) == 3
+    assert column.size() == 20
+    assert column.to_list() == values
+    assert [column[i] for i in range(20)] == values
+    assert column.take([1, 3]).to_list() == [False, True]
+
+    column[1] = True
+    column[0] = False
+    assert column.to_list()[:2] == [False, True]
+
+    with pytest.raises(IndexError):
+        column[20]
+
+
+def test_column_conversion_error():
+    with pytest.raises(RuntimeError):
+        Column(DataType.Bool, [1, 2])
+
+
+def test_constant_column():
+    column = ConstantColumn(DataType.Int, 7, 3)
+    assert column.size() == 3
+    assert column[2] == 7
+    assert column.to_list() == [7, 7, 7]
+    assert column.get_buffer() == array("q", [7, 7, 7])
+    assert column.take([0, 1]).to_list() == [7, 7]
+
+
+def test_row_batch_compact_and_select(monkeypatch):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int, "c": DataType.Bool})
+    columns = [
+        Column(DataType.Int, list(range(10))),
+        Column(DataType.Int, list(range(10, 20))),
+        Column(DataType.Bool, [i % 2 == 0 for i in range(10)]),
+    ]
+    batch = RowBatch(schema, columns, [1, 3, 5, 7])
+    taken_columns = []
+    take = Column.take
+
+    def record_take(self, indices):
+        taken_columns.append(self)
+        return take(self, indices)
+
+    monkeypatch.setattr(Column, "take", record_take)
+
+    # Just the columns that are read are copied, once.
+    compacted = batch.compact()
+    assert compacted is batch.compact()
+    assert compacted.num_rows() == compacted.num_physical_rows() == 4
+    assert compacted.get_column(1).to_list() == [11, 13, 15, 17]
+    assert compacted.get_column(1).to_list() == [11, 13, 15, 17]
+    assert taken_columns == [columns[1]]
+
+    # Selecting from a batch composes the selection vectors.
+    for selected in (batch.select([0, 2]), compacted.select([0, 2])):
+        assert selected.get_selection() == [1, 5]
+        assert selected.get_column(0) is columns[0]
+    assert (
+        batch.compact().to_csv()
+        == "1,11,False\n3,13,False\n5,15,False\n7,17,False\n"
+    )
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from ota.column import Column
+from ota.column_cache import ColumnCache, get_column_cache
+from ota.data_loader import CsvLoader
+from ota.schema import DataType, Schema
+
+
+@pytest.fixture
+def column_cache():
+    column_cache = get_column_cache()
+    column_cache.clear()
+    yield column_cache
+    column_cache.clear()
+
+
+def test_column_cache_eviction():
+    column_cache = ColumnCache(max_bytes=24)
+    state = ("test.csv", 10, 1)
+    for key in ("a", "b", "c"):
+        column_cache.put(state, key, Column(DataType.Int, [1]))
+    assert column_cache.get(state, "a") is not None
+    column_cache.put(state, "d", Column(DataType.Int, [1, 2]))
+    # b and c are the least recently used columns.
+    assert column_cache.get(state, "b") is None
+    assert column_cache.get(state, "c") is None
+    assert column_cache.get(state, "a") is not None
+    assert column_cache.get_num_bytes() == 24
+
+
+def test_column_cache_invalidation():
+    column_cache = ColumnCache(max_bytes=1024)
+    column_cache.put(("test.csv", 10, 1), "a", Column(DataType.Int, [1]))
+    assert column_cache.get(("test.csv", 12, 2), "a") is None
+    assert column_cache.get(("test.csv", 10, 1), "a") is None
+    assert column_cache.get_num_bytes() == 0
+
+
+def test_csv_loader_column_cache(tmp_path, column_cache):
+    path = tmp_path / "test.csv"
+    with open(path, "w") as csv_file:
+        csv_file.write("a,b,c\n")
+        for i in range(25):
+            csv_file.write(f"{i},{2 * i},{3 * i}\n")
+    schema = Schema({"a": DataType.Int, "b": DataType.Int, "c": DataType.Int})
+    loader = CsvLoader(path, schema, batch_size=10)
+
+    list(loader.load(["a", "b"]))
+    assert column_cache.get_num_misses() == 6
+    batches = list(loader.load(["b", "c"]))
+    assert column_cache.get_num_hits() == 3
+    assert column_cache.get_num_misses() == 9
+    assert [v for b in batches for v in b.get_column(1).to_list()] == [
+        3 * i for i in range(25)
+    ]
+
+    with open(path, "a") as csv_file:
+        csv_file.write("25,50,75\n")
+    stat_result = os.stat(path)
+    os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1))
+    batches = list(loader.load(["c"]))
+    assert column_cache.get_num_hits() == 3
+    assert batches[-1].get_column(0).to_list() == [60, 63, 66, 69, 72, 75]
@@ -0,0 +1,145 @@
+import json
+
+import pytest
+
+from ota.column import Column
+from ota.columnar_file import (
+    FORMAT_VERSION,
+    MAGIC,
+    read_metadata,
+    write_columnar_file,
+)
+from ota.data_loader import ColumnarFileLoader, ScanPredicate
+from ota.physical.expr.impls import (
+    PhysicalBooleanExprGt,
+    PhysicalColumnExpr,
+    PhysicalLiteralIntExpr,
+)
+from ota.row_batch import RowBatch
+from ota.schema import DataType, Schema
+
+
+@pytest.fixture
+def columnar_file(tmp_path):
+    path = tmp_path / "test.ota"
+    schema = Schema({"a": DataType.Int, "even": DataType.Bool})
+    batches = [
+        RowBatch(
+            schema,
+            [
+                Column(DataType.Int, list(range(start, start + 10))),
+                Column(
+                    DataType.Bool,
+                    [i % 2 == 0 for i in range(start, start + 10)],
+                ),
+            ],
+        )
+        for start in range(0, 100, 10)
+    ]
+    write_columnar_file(path, schema, batches, row_group_size=25)
+    return path
+
+
+def test_columnar_file_metadata(columnar_file):
+    metadata = read_metadata(columnar_file.read_bytes())
+    assert metadata.schema.get_field_names() == ["a", "even"]
+    assert [row_group.num_rows for row_group in metadata.row_groups] == [
+        30,
+        30,
+        30,
+        10,
+    ]
+    for row_group in metadata.row_groups:
+        for offset, _ in row_group.column_chunks:
+            assert offset % 8 == 0
+    a_statistics = metadata.row_groups[1].statistics[0]
+    assert (a_statistics.min_value, a_statistics.max_value) == (30, 59)
+    even_statistics = metadata.row_groups[1].statistics[1]
+    assert (even_statistics.min_value, even_statistics.max_value) == (
+        False,
+        True,
+    )
+
+
+def test_columnar_file_not_columnar(tmp_path):
+    with pytest.raises(RuntimeError):
+        read_metadata(b"a,b\n1,2\n")
+
+
+def test_columnar_file_loader(columnar_file):
+    loader = ColumnarFileLoader(columnar_file)
+    batches = list(loader.load(["even", "a"]))
+    assert isinstance(batches[0].get_column(1).get_buffer(), memoryview)
+    assert [v for b in batches for v in b.get_column(1).to_list()] == list(
+        range(100)
+    )
+    assert [v for b in batches for v in b.get_column(0).to_list()] == [
+        i % 2 == 0 for i in range(100)
+    ]
+
+
+def test_columnar_file_loader_predicate(columnar_file):
+    loader = ColumnarFileLoader(columnar_file)
+    predicate = ScanPredicate(
+        ["a"],
+        PhysicalBooleanExprGt(
+            PhysicalColumnExpr(0), PhysicalLiteralIntExpr(84)
+        ),
+    )
+    batches = list(loader.load(["even"], predicate))
+    assert len(batches) == 2
+    assert batches[0].get_selection() == list(range(25, 30))
+    assert batches[1].get_selection() is None
+    values = [v for b in batches for v in b.compact().get_column(0).to_list()]
+    assert values == [i % 2 == 0 for i in range(85, 100)]
+
+
+def _rewrite_footer(path, rewrite):
+    data = path.read_bytes()
+    trailer_size = 8 + len(MAGIC)
+    footer_length = int.from_bytes(data[-trailer_size : -len(MAGIC)], "little")
+    footer_start = len(data) - trailer_size - footer_length
+    footer = json.loads(data[footer_start:-trailer_size])
+    rewrite(footer)
+    new_footer = json.dumps(footer).encode()
+    path.write_bytes(
+        data[:footer_start]
+        + new_footer
+        + len(new_footer).to_bytes(8, "little")
+        + MAGIC
+    )
+
+
+def test_columnar_file_version_1(columnar_file):
+    def to_version_1(footer):
+        del footer["version"]
+        footer["row_groups"] = [
+            [num_rows, column_chunks]
+            for num_rows, column_chunks, _ in footer["row_groups"]
+        ]
+
+    _rewrite_footer(columnar_file, to_version_1)
+    metadata = read_metadata(columnar_file.read_bytes())
+    assert all(
+        row_group.statistics is None for row_group in metadata.row_groups
+    )
+
+    loader = ColumnarFileLoader(columnar_file)
+    predicate = ScanPredicate(
+        ["a"],
+        PhysicalBooleanExprGt(
+            PhysicalColumnExpr(0), PhysicalLiteralIntExpr(84)
+        ),
+    )
+    batches = list(loader.load(["a"], predicate))
+    values = [v for b in batches for v in b.compact().get_column(0).to_list()]
+    assert values == list(range(85, 100))
+
+
+def test_columnar_file_newer_version(columnar_file):
+    def to_newer_version(footer):
+        footer["version"] = FORMAT_VERSION + 1
+
+    _rewrite_footer(columnar_file, to_newer_version)
+    with pytest.raises(RuntimeError, match="Unsupported columnar file version"):
+        read_metadata(columnar_file.read_bytes())
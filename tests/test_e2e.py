@@ -1,9 +1,23 @@
 import csv
+import random
 
 import pytest
 
+from ota.columnar_file import write_columnar_file
+from ota.data_loader import CsvLoader
 from ota.execution_context import ExecutionContext
+from ota.join_type import JoinType
 from ota.logical.expr.impls import (
+    LogicalAggregateExprAvg,
+    LogicalAggregateExprCount,
+    LogicalAggregateExprMax,
+    LogicalAggregateExprMin,
+    LogicalAggregateExprSum,
+    LogicalBooleanExprAnd,
+    LogicalBooleanExprEq,
+    LogicalBooleanExprGt,
+    LogicalBooleanExprNeq,
+    LogicalBooleanExprOr,
     LogicalColumnExpr,
     LogicalLiteralIntExpr,
     LogicalMathExprAdd,
@@ -12,6 +26,12 @@ from ota.logical.expr.impls import (
     LogicalMathExprMultiply,
     LogicalMathExprSubtract,
 )
+from ota.logical.plan.builder import LogicalPlanBuilder
+from ota.logical.plan.impls import LogicalScan
+from ota.physical.expr import vectorized
+from ota.physical.plan.impls import PhysicalHashJoin
+from ota.query_optimizer import optimize
+from ota.query_planner import create_physical_plan
 from ota.schema import DataType, Schema
 
 
@@ -70,3 +90,867 @@ def test_e2e(test_csv_file):
         assert batch.get_column(4)[i] == i * 23
         assert batch.get_column(5)[i] == int(i / (i + 1))
         assert batch.get_column(6)[i] == i % (i + 1)
+
+
+@pytest.fixture
+def readme_csv_file(tmp_path):
+    test_csv_path = tmp_path / "readme.csv"
+    test_csv_path.write_text(
+        "a,b,c\n1,2,5\n1,4,6\n2,6,9\n3,8,10\n2,10,8\n1,2,5\n1,4,4\n3,6,1\n"
+        "3,8,4\n3,10,5\n1,2,6\n2,4,4\n"
+    )
+    return test_csv_path
+
+
+def test_e2e_aggregate(readme_csv_file):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int, "c": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(readme_csv_file, schema)
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("a"), LogicalLiteralIntExpr(1)
+            )
+        )
+        .aggregate(
+            [LogicalColumnExpr("a"), LogicalColumnExpr("b")],
+            [
+                LogicalAggregateExprSum(LogicalColumnExpr("c")),
+                LogicalAggregateExprMin(LogicalColumnExpr("c")),
+                LogicalAggregateExprMax(LogicalColumnExpr("c")),
+                LogicalAggregateExprAvg(LogicalColumnExpr("c")),
+                LogicalAggregateExprCount(LogicalColumnExpr("c")),
+            ],
+        )
+        .get_logical_plan()
+    )
+
+    output = "".join(batch.to_csv() for batch in ctx.execute(plan))
+    assert output == (
+        "2,6,9,9,9,9,1\n"
+        "3,8,14,4,10,7,2\n"
+        "2,10,8,8,8,8,1\n"
+        "3,6,1,1,1,1,1\n"
+        "3,10,5,5,5,5,1\n"
+        "2,4,4,4,4,4,1\n"
+    )
+
+
+def test_e2e_aggregate_without_grouping(readme_csv_file):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int, "c": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(readme_csv_file, schema)
+        .aggregate([], [LogicalAggregateExprSum(LogicalColumnExpr("c"))])
+        .get_logical_plan()
+    )
+
+    output = "".join(batch.to_csv() for batch in ctx.execute(plan))
+    assert output == "67\n"
+
+
+def test_e2e_predicate_pushdown(test_csv_file):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(test_csv_file, schema)
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("a"), LogicalLiteralIntExpr(500)
+            )
+        )
+        .select(
+            LogicalBooleanExprEq(
+                LogicalMathExprModulo(
+                    LogicalColumnExpr("a"), LogicalLiteralIntExpr(100)
+                ),
+                LogicalLiteralIntExpr(0),
+            )
+        )
+        .project([LogicalColumnExpr("b")])
+        .get_logical_plan()
+    )
+
+    output = "".join(batch.to_csv() for batch in ctx.execute(plan))
+    assert output == "601\n701\n801\n901\n"
+
+
+@pytest.mark.parametrize("optimizer_rules", [None, []], ids=["opt", "no-opt"])
+def test_e2e_chained_selections(test_csv_file, optimizer_rules):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+
+    ctx = ExecutionContext(optimizer_rules)
+    builder = (
+        ctx.csv(test_csv_file, schema)
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("a"), LogicalLiteralIntExpr(100)
+            )
+        )
+        .project(
+            [
+                LogicalColumnExpr("a"),
+                LogicalMathExprModulo(
+                    LogicalColumnExpr("b"), LogicalLiteralIntExpr(3)
+                ),
+            ]
+        )
+        .select(
+            LogicalBooleanExprEq(
+                LogicalColumnExpr("%"), LogicalLiteralIntExpr(0)
+            )
+        )
+    )
+
+    batches = list(ctx.execute(builder.get_logical_plan()))
+    assert all(batch.get_selection() is None for batch in batches)
+    a_values = [v for batch in batches for v in batch.get_column(0).to_list()]
+    assert a_values == [a for a in range(101, 1000) if (a + 1) % 3 == 0]
+
+    plan = builder.aggregate(
+        [LogicalColumnExpr("%")],
+        [LogicalAggregateExprCount(LogicalColumnExpr("a"))],
+    ).get_logical_plan()
+    output = "".join(batch.to_csv() for batch in ctx.execute(plan))
+    assert output == f"0,{len(a_values)}\n"
+
+
+@pytest.mark.parametrize("optimizer_rules", [None, []], ids=["opt", "no-opt"])
+def test_e2e_expressions_see_only_selected_rows(tmp_path, optimizer_rules):
+    csv_path = tmp_path / "divisors.csv"
+    csv_path.write_text("a,b\n" + "".join(f"{i},{i % 3}\n" for i in range(30)))
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+    rows = [(i, i % 3) for i in range(30) if i % 3 != 0]
+
+    ctx = ExecutionContext(optimizer_rules)
+    filtered = (
+        ctx.csv(csv_path, schema)
+        .project([LogicalColumnExpr("a"), LogicalColumnExpr("b")])
+        .select(
+            LogicalBooleanExprNeq(
+                LogicalColumnExpr("b"), LogicalLiteralIntExpr(0)
+            )
+        )
+    )
+    quotient = LogicalMathExprDivide(
+        LogicalColumnExpr("a"), LogicalColumnExpr("b")
+    )
+
+    plan = filtered.project([quotient]).get_logical_plan()
+    assert _get_rows(ctx.execute(plan)) == [(int(a / b),) for a, b in rows]
+
+    plan = filtered.select(
+        LogicalBooleanExprGt(quotient, LogicalLiteralIntExpr(10))
+    ).get_logical_plan()
+    assert _get_rows(ctx.execute(plan)) == [
+        (a, b) for a, b in rows if int(a / b) > 10
+    ]
+
+    plan = filtered.aggregate(
+        [LogicalColumnExpr("b")], [LogicalAggregateExprSum(quotient)]
+    ).get_logical_plan()
+    assert _get_rows(ctx.execute(plan)) == [
+        (1, sum(a for a, b in rows if b == 1)),
+        (2, sum(int(a / 2) for a, b in rows if b == 2)),
+    ]
+
+    plan = filtered.order_by([quotient], False).get_logical_plan()
+    assert _get_rows(ctx.execute(plan)) == sorted(
+        rows, key=lambda row: -int(row[0] / row[1])
+    )
+
+
+def test_e2e_missing_csv_column(test_csv_file):
+    schema = Schema({"a": DataType.Int, "c": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = ctx.csv(test_csv_file, schema).get_logical_plan()
+    with pytest.raises(KeyError):
+        list(ctx.execute(plan))
+
+
+@pytest.mark.parametrize("preserve_order", [True, False])
+def test_e2e_parallel_scan(test_csv_file, preserve_order):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(
+            test_csv_file,
+            schema,
+            num_workers=3,
+            preserve_order=preserve_order,
+        )
+        .select(
+            LogicalBooleanExprEq(
+                LogicalMathExprModulo(
+                    LogicalColumnExpr("a"), LogicalLiteralIntExpr(2)
+                ),
+                LogicalLiteralIntExpr(0),
+            )
+        )
+        .get_logical_plan()
+    )
+
+    batches = list(ctx.execute(plan))
+    assert len(batches) > 1
+    a_values = [v for batch in batches for v in batch.get_column(0).to_list()]
+    b_values = [v for batch in batches for v in batch.get_column(1).to_list()]
+    if not preserve_order:
+        a_values.sort()
+        b_values.sort()
+    assert a_values == list(range(0, 1000, 2))
+    assert b_values == list(range(1, 1001, 2))
+
+
+def test_e2e_columnar_file(test_csv_file, tmp_path):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+    columnar_path = tmp_path / "test.ota"
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(test_csv_file, schema)
+        .project(
+            [
+                LogicalColumnExpr("a"),
+                LogicalBooleanExprEq(
+                    LogicalMathExprModulo(
+                        LogicalColumnExpr("b"), LogicalLiteralIntExpr(2)
+                    ),
+                    LogicalLiteralIntExpr(0),
+                ),
+            ]
+        )
+        .get_logical_plan()
+    )
+    ctx.write_columnar(plan, columnar_path)
+
+    plan = (
+        ctx.columnar(columnar_path)
+        .select(LogicalColumnExpr("="))
+        .aggregate([], [LogicalAggregateExprSum(LogicalColumnExpr("a"))])
+        .get_logical_plan()
+    )
+    output = "".join(batch.to_csv() for batch in ctx.execute(plan))
+    assert output == f"{sum(range(1, 1000, 2))}\n"
+
+
+@pytest.mark.parametrize("optimizer_rules", [None, []], ids=["opt", "no-opt"])
+@pytest.mark.parametrize(
+    "condition",
+    [
+        LogicalColumnExpr("a"),
+        LogicalColumnExpr("b"),
+        LogicalBooleanExprAnd(LogicalColumnExpr("a"), LogicalColumnExpr("a")),
+        LogicalBooleanExprAnd(LogicalColumnExpr("b"), LogicalColumnExpr("b")),
+        LogicalBooleanExprOr(LogicalColumnExpr("a"), LogicalColumnExpr("c")),
+        LogicalBooleanExprGt(LogicalColumnExpr("a"), LogicalLiteralIntExpr(2)),
+    ],
+    ids=["a", "b", "a-and-a", "b-and-b", "a-or-c", "a-gt-2"],
+)
+def test_e2e_columnar_file_int_condition(tmp_path, optimizer_rules, condition):
+    # Every row group of 20 rows holds a single value of a, from 0 to 4.
+    csv_path = tmp_path / "test.csv"
+    csv_path.write_text(
+        "a,b,c\n" + "".join(f"{i // 20},1,{i % 3}\n" for i in range(100))
+    )
+    schema = Schema({"a": DataType.Int, "b": DataType.Int, "c": DataType.Int})
+    columnar_path = tmp_path / "test.ota"
+
+    ctx = ExecutionContext(optimizer_rules)
+    csv_loader = CsvLoader(csv_path, schema, batch_size=20)
+    write_columnar_file(
+        columnar_path,
+        schema,
+        ctx.execute(LogicalScan(csv_loader, [])),
+        row_group_size=20,
+    )
+
+    csv_plan = ctx.csv(csv_path, schema).select(condition).get_logical_plan()
+    columnar_plan = (
+        ctx.columnar(columnar_path).select(condition).get_logical_plan()
+    )
+    csv_rows = _get_rows(ctx.execute(csv_plan))
+    assert csv_rows
+    assert _get_rows(ctx.execute(columnar_plan)) == csv_rows
+
+
+def test_e2e_parallel_aggregate(test_csv_file):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(test_csv_file, schema, num_workers=3)
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("a"), LogicalLiteralIntExpr(99)
+            )
+        )
+        .project(
+            [
+                LogicalMathExprModulo(
+                    LogicalColumnExpr("a"), LogicalLiteralIntExpr(3)
+                ),
+                LogicalColumnExpr("b"),
+            ]
+        )
+        .aggregate(
+            [LogicalColumnExpr("%")],
+            [
+                LogicalAggregateExprAvg(LogicalColumnExpr("b")),
+                LogicalAggregateExprCount(LogicalColumnExpr("b")),
+                LogicalAggregateExprMax(LogicalColumnExpr("b")),
+            ],
+        )
+        .get_logical_plan()
+    )
+
+    output = "".join(batch.to_csv() for batch in ctx.execute(plan))
+    expected = ""
+    for remainder in (1, 2, 0):
+        b_values = [a + 1 for a in range(100, 1000) if a % 3 == remainder]
+        expected += (
+            f"{remainder},{int(sum(b_values) / len(b_values))},"
+            f"{len(b_values)},{max(b_values)}\n"
+        )
+    assert output == expected
+
+
+@pytest.mark.parametrize("num_workers", [1, 3])
+# With 2 groups in memory, the spilled partitions are partitioned again.
+@pytest.mark.parametrize("max_groups", [10, 2])
+def test_e2e_spilling_aggregate(test_csv_file, num_workers, max_groups):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(test_csv_file, schema, num_workers=num_workers)
+        .project(
+            [
+                LogicalMathExprModulo(
+                    LogicalColumnExpr("a"), LogicalLiteralIntExpr(100)
+                ),
+                LogicalColumnExpr("b"),
+            ]
+        )
+        .aggregate(
+            [LogicalColumnExpr("%")],
+            [
+                LogicalAggregateExprSum(LogicalColumnExpr("b")),
+                LogicalAggregateExprAvg(LogicalColumnExpr("b")),
+            ],
+            max_groups_in_memory=max_groups,
+        )
+        .get_logical_plan()
+    )
+
+    batches = list(ctx.execute(plan))
+    assert len(batches) > 1
+    assert all(batch.num_rows() <= max_groups for batch in batches)
+    rows = sorted(
+        row
+        for batch in batches
+        for row in zip(*(batch.get_column(i).to_list() for i in range(3)))
+    )
+    expected = []
+    for remainder in range(100):
+        b_values = [a + 1 for a in range(1000) if a % 100 == remainder]
+        expected.append(
+            (remainder, sum(b_values), int(sum(b_values) / len(b_values)))
+        )
+    assert rows == expected
+
+
+@pytest.fixture
+def sorted_csv_file(tmp_path):
+    sorted_csv_path = tmp_path / "sorted.csv"
+
+    with open(sorted_csv_path, "w", newline="") as csv_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=["k", "v"])
+        csv_writer.writeheader()
+        for i in range(1000):
+            csv_writer.writerow({"k": i // 7, "v": i})
+
+    return sorted_csv_path
+
+
+@pytest.mark.parametrize("num_workers", [1, 3])
+def test_e2e_sorted_aggregate(sorted_csv_file, num_workers):
+    schema = Schema({"k": DataType.Int, "v": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(
+            sorted_csv_file, schema, num_workers=num_workers, sorted_by=["k"]
+        )
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("v"), LogicalLiteralIntExpr(3)
+            )
+        )
+        .aggregate(
+            [LogicalColumnExpr("k")],
+            [
+                LogicalAggregateExprSum(LogicalColumnExpr("v")),
+                LogicalAggregateExprAvg(LogicalColumnExpr("v")),
+            ],
+        )
+        .get_logical_plan()
+    )
+    physical_plan = create_physical_plan(optimize(plan))
+    assert str(physical_plan).startswith("SortedAggregate")
+
+    batches = list(ctx.execute(plan))
+    assert len(batches) > 1
+    rows = [
+        row
+        for batch in batches
+        for row in zip(*(batch.get_column(i).to_list() for i in range(3)))
+    ]
+    expected = []
+    for k in range(1000 // 7 + 1):
+        v_values = [v for v in range(7 * k, min(7 * k + 7, 1000)) if v > 3]
+        expected.append((k, sum(v_values), int(sum(v_values) / len(v_values))))
+    assert rows == expected
+
+
+def test_e2e_explain(test_csv_file):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(test_csv_file, schema)
+        .project(
+            [
+                LogicalMathExprModulo(
+                    LogicalColumnExpr("a"), LogicalLiteralIntExpr(10)
+                ),
+            ]
+        )
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("%"), LogicalLiteralIntExpr(6)
+            )
+        )
+        .aggregate(
+            [LogicalColumnExpr("%")],
+            [LogicalAggregateExprCount(LogicalColumnExpr("%"))],
+        )
+        .get_logical_plan()
+    )
+
+    lines = ctx.explain(plan).splitlines()
+    assert lines == [
+        "Aggregate: groupingExprs=[#0], aggregationExprs=[COUNT(#0)]",
+        "\tSelection: #0 > 6",
+        "\t\tProjection: [#0%10]",
+        "\t\t\tScan: schema=[a], projection=[a]",
+    ]
+
+    lines = ctx.explain(plan, analyze=True).splitlines()
+    assert len(lines) == 4
+    assert lines[0].startswith(
+        "Aggregate: groupingExprs=[#0], aggregationExprs=[COUNT(#0)] ["
+    )
+    assert "rows_in=300, batches_in=1, rows_out=3, batches_out=1" in lines[0]
+    assert "rows_in=1000, batches_in=1, rows_out=300" in lines[1]
+    assert "rows_out=1000, batches_out=1, peak_batch_rows=1000" in lines[3]
+    assert "rows_in" not in lines[3]
+
+
+@pytest.fixture
+def shuffled_csv_file(tmp_path):
+    shuffled_csv_path = tmp_path / "shuffled.csv"
+    rng = random.Random(0)
+
+    with open(shuffled_csv_path, "w", newline="") as csv_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=["a", "b"])
+        csv_writer.writeheader()
+        for i in range(1000):
+            csv_writer.writerow({"a": rng.randrange(50), "b": i})
+
+    return shuffled_csv_path
+
+
+def _scan_in_small_batches(path, schema):
+    data_loader = CsvLoader(path, schema, batch_size=64)
+    return LogicalPlanBuilder(LogicalScan(data_loader, []))
+
+
+def _get_rows(batches):
+    rows = []
+    for batch in batches:
+        batch = batch.compact()
+        columns = [
+            batch.get_column(i).to_list() for i in range(batch.num_columns())
+        ]
+        rows += zip(*columns)
+    return rows
+
+
+@pytest.fixture(params=[False, True], ids=["python", "numpy"])
+def backend(request, monkeypatch):
+    if request.param and vectorized.np is None:
+        pytest.skip("NumPy is not installed")
+    monkeypatch.setattr(vectorized, "ENABLED", request.param)
+
+
+@pytest.mark.parametrize("max_rows_in_memory", [None, 100])
+@pytest.mark.parametrize("limit", [None, 0, 1, 25, 2000])
+def test_e2e_order_by(shuffled_csv_file, backend, limit, max_rows_in_memory):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+    with open(shuffled_csv_file, newline="") as csv_file:
+        csv_rows = [
+            (int(row["a"]), int(row["b"])) for row in csv.DictReader(csv_file)
+        ]
+
+    ctx = ExecutionContext()
+    builder = _scan_in_small_batches(shuffled_csv_file, schema).order_by(
+        [LogicalColumnExpr("a"), LogicalColumnExpr("b")],
+        [False, True],
+        max_rows_in_memory,
+    )
+    if limit is not None:
+        builder = builder.limit(limit)
+    plan = builder.get_logical_plan()
+    physical_plan = create_physical_plan(optimize(plan))
+    assert str(physical_plan).startswith("Sort" if limit is None else "TopK")
+
+    expected = sorted(csv_rows, key=lambda row: (-row[0], row[1]))
+    batches = list(ctx.execute(plan))
+    assert _get_rows(batches) == expected[:limit]
+    if limit is None:
+        # Merged runs are emitted in batches of up to max_rows_in_memory rows.
+        assert len(batches) == (1 if max_rows_in_memory is None else 10)
+
+
+@pytest.mark.parametrize("max_rows_in_memory", [None, 100, 1])
+def test_e2e_order_by_expression_is_stable(
+    shuffled_csv_file, backend, max_rows_in_memory
+):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+    with open(shuffled_csv_file, newline="") as csv_file:
+        csv_rows = [
+            (int(row["a"]), int(row["b"])) for row in csv.DictReader(csv_file)
+        ]
+
+    ctx = ExecutionContext()
+    key = LogicalMathExprModulo(
+        LogicalColumnExpr("a"), LogicalLiteralIntExpr(3)
+    )
+    builder = _scan_in_small_batches(shuffled_csv_file, schema).order_by(
+        [key], max_rows_in_memory=max_rows_in_memory
+    )
+
+    expected = sorted(csv_rows, key=lambda row: row[0] % 3)
+    plan = builder.get_logical_plan()
+    assert _get_rows(ctx.execute(plan)) == expected
+    plan = builder.limit(100).get_logical_plan()
+    assert _get_rows(ctx.execute(plan)) == expected[:100]
+
+
+@pytest.mark.parametrize("limit", [0, 10, 64, 100, 2000])
+def test_e2e_limit(test_csv_file, limit):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        _scan_in_small_batches(test_csv_file, schema)
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("a"), LogicalLiteralIntExpr(500)
+            )
+        )
+        .limit(limit)
+        .project([LogicalColumnExpr("b")])
+        .get_logical_plan()
+    )
+    expected = [(a + 1,) for a in range(501, 1000)][:limit]
+    assert _get_rows(ctx.execute(plan)) == expected
+
+
+class _RecordingCsvLoader(CsvLoader):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_batches = 0
+        self.closed = False
+
+    def load(self, projection, predicate=None):
+        try:
+            for batch in super().load(projection, predicate):
+                self.num_batches += 1
+                yield batch
+        finally:
+            self.closed = True
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_e2e_limit_closes_scan(test_csv_file, num_workers):
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+    data_loader = _RecordingCsvLoader(
+        test_csv_file, schema, batch_size=64, num_workers=num_workers
+    )
+
+    ctx = ExecutionContext()
+    plan = (
+        LogicalPlanBuilder(LogicalScan(data_loader, []))
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("a"), LogicalLiteralIntExpr(500)
+            )
+        )
+        .project([LogicalColumnExpr("b")])
+        .limit(10)
+        .get_logical_plan()
+    )
+    batches = ctx.execute(plan)
+    batch = next(batches)
+    # The filter is pushed into the scan, which skips the batches without
+    # matching rows. The batch of rows 448 to 511 has enough rows.
+    assert data_loader.closed
+    assert data_loader.num_batches == 1
+    assert _get_rows([batch]) == [(a + 1,) for a in range(501, 511)]
+    assert next(batches, None) is None
+
+
+@pytest.fixture
+def join_csv_files(tmp_path):
+    rng = random.Random(0)
+    orders_csv_path = tmp_path / "orders.csv"
+    with open(orders_csv_path, "w", newline="") as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(["order_id", "customer_id", "amount"])
+        for order_id in range(500):
+            csv_writer.writerow(
+                [order_id, rng.randrange(40), rng.randrange(1000)]
+            )
+
+    # Customers 30 to 49 have no orders, customers 0 to 9 are missing and
+    # customers 10 to 14 appear twice.
+    customers_csv_path = tmp_path / "customers.csv"
+    with open(customers_csv_path, "w", newline="") as csv_file:
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(["id", "region"])
+        for customer_id in [*range(10, 50), *range(10, 15)]:
+            csv_writer.writerow([customer_id, customer_id % 4])
+
+    return orders_csv_path, customers_csv_path
+
+
+def _read_csv_rows(path):
+    with open(path, newline="") as csv_file:
+        reader = csv.reader(csv_file)
+        next(reader)
+        return [tuple(map(int, row)) for row in reader]
+
+
+@pytest.mark.parametrize("max_build_rows_in_memory", [None, 7, 2])
+@pytest.mark.parametrize("join_type", list(JoinType))
+def test_e2e_join(join_csv_files, join_type, max_build_rows_in_memory):
+    orders_csv_path, customers_csv_path = join_csv_files
+    orders_schema = Schema(
+        {
+            "order_id": DataType.Int,
+            "customer_id": DataType.Int,
+            "amount": DataType.Int,
+        }
+    )
+    customers_schema = Schema({"id": DataType.Int, "region": DataType.Int})
+
+    ctx = ExecutionContext()
+    customers = ctx.csv(customers_csv_path, customers_schema)
+    plan = (
+        _scan_in_small_batches(orders_csv_path, orders_schema)
+        .join(
+            customers,
+            [LogicalColumnExpr("customer_id")],
+            [LogicalColumnExpr("id")],
+            join_type,
+            max_build_rows_in_memory,
+        )
+        .get_logical_plan()
+    )
+    rows = _get_rows(ctx.execute(plan))
+
+    orders = _read_csv_rows(orders_csv_path)
+    customers = _read_csv_rows(customers_csv_path)
+    expected = []
+    for order in orders:
+        matches = [
+            customer for customer in customers if customer[0] == order[1]
+        ]
+        match join_type:
+            case JoinType.Inner:
+                expected += [order + customer for customer in matches]
+            case JoinType.Left:
+                expected += [order + customer + (True,) for customer in matches]
+                if not matches:
+                    expected.append(order + (0, 0, False))
+            case JoinType.Semi:
+                expected += [order] if matches else []
+            case JoinType.Anti:
+                expected += [] if matches else [order]
+    assert expected
+    if max_build_rows_in_memory is None:
+        assert rows == expected
+    else:
+        assert sorted(rows) == sorted(expected)
+
+
+def test_e2e_join_repartitions(join_csv_files, monkeypatch):
+    orders_csv_path, customers_csv_path = join_csv_files
+    orders_schema = Schema(
+        {
+            "order_id": DataType.Int,
+            "customer_id": DataType.Int,
+            "amount": DataType.Int,
+        }
+    )
+    customers_schema = Schema({"id": DataType.Int, "region": DataType.Int})
+    table_sizes = []
+    probe = PhysicalHashJoin._probe
+
+    def record_table_size(self, table, keys, batch):
+        table_sizes.append(table.num_rows())
+        return probe(self, table, keys, batch)
+
+    monkeypatch.setattr(PhysicalHashJoin, "_probe", record_table_size)
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(orders_csv_path, orders_schema)
+        .join(
+            ctx.csv(customers_csv_path, customers_schema),
+            [LogicalColumnExpr("customer_id")],
+            [LogicalColumnExpr("id")],
+            JoinType.Semi,
+            2,
+        )
+        .get_logical_plan()
+    )
+    rows = _get_rows(ctx.execute(plan))
+    # The 45 customers hash into partitions of more than 2 rows, which are
+    # partitioned again. Customers 10 to 14 have 2 rows with equal keys.
+    assert max(table_sizes) == 2
+    assert len(rows) == sum(
+        10 <= customer_id < 50
+        for _, customer_id, _ in _read_csv_rows(orders_csv_path)
+    )
+
+
+def test_e2e_join_with_several_keys(join_csv_files):
+    orders_csv_path, customers_csv_path = join_csv_files
+    orders_schema = Schema(
+        {
+            "order_id": DataType.Int,
+            "customer_id": DataType.Int,
+            "amount": DataType.Int,
+        }
+    )
+    customers_schema = Schema({"id": DataType.Int, "region": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(orders_csv_path, orders_schema)
+        .join(
+            ctx.csv(customers_csv_path, customers_schema),
+            [
+                LogicalColumnExpr("customer_id"),
+                LogicalMathExprModulo(
+                    LogicalColumnExpr("amount"), LogicalLiteralIntExpr(4)
+                ),
+            ],
+            [LogicalColumnExpr("id"), LogicalColumnExpr("region")],
+        )
+        .project([LogicalColumnExpr("order_id"), LogicalColumnExpr("region")])
+        .get_logical_plan()
+    )
+    physical_plan = create_physical_plan(optimize(plan))
+    (join,) = physical_plan.get_children()
+    left_scan, right_scan = join.get_children()
+    assert left_scan.get_schema().get_field_names() == [
+        "order_id",
+        "customer_id",
+        "amount",
+    ]
+    assert right_scan.get_schema().get_field_names() == ["id", "region"]
+
+    customers = _read_csv_rows(customers_csv_path)
+    expected = [
+        (order_id, region)
+        for order_id, customer_id, amount in _read_csv_rows(orders_csv_path)
+        for id_, region in customers
+        if (id_, region) == (customer_id, amount % 4)
+    ]
+    assert _get_rows(ctx.execute(plan)) == expected
+
+
+def test_e2e_join_runtime_filter(join_csv_files):
+    orders_csv_path, customers_csv_path = join_csv_files
+    orders_schema = Schema(
+        {
+            "order_id": DataType.Int,
+            "customer_id": DataType.Int,
+            "amount": DataType.Int,
+        }
+    )
+    customers_schema = Schema({"id": DataType.Int, "region": DataType.Int})
+
+    ctx = ExecutionContext()
+    plan = (
+        ctx.csv(orders_csv_path, orders_schema)
+        .join(
+            ctx.csv(customers_csv_path, customers_schema),
+            [LogicalColumnExpr("customer_id")],
+            [LogicalColumnExpr("id")],
+        )
+        .get_logical_plan()
+    )
+    lines = ctx.explain(plan, analyze=True).splitlines()
+    assert lines[1].startswith("\tScan")
+    assert "predicate=RUNTIME_FILTER(" in lines[1]
+
+    # The orders of customers 0 to 9 are dropped by the scan.
+    orders = _read_csv_rows(orders_csv_path)
+    num_matching_orders = sum(
+        1 for _, customer_id, _ in orders if customer_id >= 10
+    )
+    assert num_matching_orders < len(orders)
+    assert f"rows_out={num_matching_orders}," in lines[1]
+
+
+def test_e2e_join_errors(join_csv_files):
+    orders_csv_path, _ = join_csv_files
+    schema = Schema(
+        {
+            "order_id": DataType.Int,
+            "customer_id": DataType.Int,
+            "amount": DataType.Int,
+        }
+    )
+
+    ctx = ExecutionContext()
+    orders = ctx.csv(orders_csv_path, schema)
+    with pytest.raises(RuntimeError, match="Duplicate column"):
+        orders.join(
+            orders,
+            [LogicalColumnExpr("order_id")],
+            [LogicalColumnExpr("order_id")],
+        )
+    plan = orders.join(
+        orders.project(
+            [
+                LogicalBooleanExprEq(
+                    LogicalColumnExpr("amount"), LogicalLiteralIntExpr(0)
+                )
+            ]
+        ),
+        [LogicalColumnExpr("order_id")],
+        [LogicalColumnExpr("=")],
+        JoinType.Semi,
+    ).get_logical_plan()
+    with pytest.raises(RuntimeError, match="Type mismatch"):
+        create_physical_plan(plan)
@@ -0,0 +1,246 @@
+import pickle
+
+import pytest
+
+from ota.column import Column, ConstantColumn
+from ota.physical.expr import vectorized
+from ota.physical.expr.compiler import PhysicalCompiledExpr, compile_expr
+from ota.physical.expr.impls import (
+    PhysicalAggregateExprAvg,
+    PhysicalAggregateExprCount,
+    PhysicalAggregateExprMax,
+    PhysicalAggregateExprMin,
+    PhysicalAggregateExprSum,
+    PhysicalBooleanExprAnd,
+    PhysicalBooleanExprEq,
+    PhysicalBooleanExprGt,
+    PhysicalBooleanExprLtEq,
+    PhysicalBooleanExprOr,
+    PhysicalColumnExpr,
+    PhysicalLiteralIntExpr,
+    PhysicalMathExprAdd,
+    PhysicalMathExprDivide,
+    PhysicalMathExprModulo,
+    PhysicalMathExprMultiply,
+    PhysicalMathExprSubtract,
+)
+from ota.row_batch import RowBatch
+from ota.schema import DataType, Schema
+
+
+@pytest.fixture(params=[False, True], ids=["python", "numpy"])
+def backend(request, monkeypatch):
+    if request.param and vectorized.np is None:
+        pytest.skip("NumPy is not installed")
+    monkeypatch.setattr(vectorized, "ENABLED", request.param)
+
+
+@pytest.fixture
+def batch():
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+    a = [-7, -3, 0, 4, 9, 12]
+    b = [2, -2, 5, 3, 9, -5]
+    return RowBatch(schema, [Column(DataType.Int, a), Column(DataType.Int, b)])
+
+
+def test_math_exprs(backend, batch):
+    a = PhysicalColumnExpr(0)
+    b = PhysicalColumnExpr(1)
+    a_list = batch.get_column(0).to_list()
+    b_list = batch.get_column(1).to_list()
+
+    result = PhysicalMathExprSubtract(a, b).evaluate(batch)
+    assert result.to_list() == [x - y for x, y in zip(a_list, b_list)]
+    result = PhysicalMathExprDivide(a, b).evaluate(batch)
+    assert result.to_list() == [int(x / y) for x, y in zip(a_list, b_list)]
+    result = PhysicalMathExprModulo(a, b).evaluate(batch)
+    assert result.to_list() == [x % y for x, y in zip(a_list, b_list)]
+
+
+def test_boolean_exprs(backend, batch):
+    a = PhysicalColumnExpr(0)
+    b = PhysicalColumnExpr(1)
+    gt = PhysicalBooleanExprGt(a, b)
+    lt_eq = PhysicalBooleanExprLtEq(a, b)
+
+    assert gt.evaluate(batch).get_data_type() == DataType.Bool
+    expected = [False, False, False, True, False, True]
+    assert gt.evaluate(batch).to_list() == expected
+    assert (
+        PhysicalBooleanExprAnd(gt, lt_eq).evaluate(batch).to_list()
+        == [False] * 6
+    )
+    assert (
+        PhysicalBooleanExprOr(gt, lt_eq).evaluate(batch).to_list() == [True] * 6
+    )
+
+
+def test_division_by_zero(backend):
+    schema = Schema({"a": DataType.Int})
+    batch = RowBatch(schema, [Column(DataType.Int, [1, 0])])
+    expr = PhysicalMathExprDivide(PhysicalColumnExpr(0), PhysicalColumnExpr(0))
+    with pytest.raises(ZeroDivisionError):
+        expr.evaluate(batch)
+
+
+def test_overflow(backend):
+    schema = Schema({"a": DataType.Int})
+    a = PhysicalColumnExpr(0)
+    int64_min, int64_max = -(2**63), 2**63 - 1
+
+    def evaluate(expr, values):
+        batch = RowBatch(schema, [Column(DataType.Int, values)])
+        return [
+            expr.evaluate(batch).to_list(),
+            compile_expr(expr).evaluate(batch).to_list(),
+        ]
+
+    def literal(value):
+        return PhysicalLiteralIntExpr(value)
+
+    overflowing = [
+        (PhysicalMathExprMultiply(a, literal(4)), [1, 2**62]),
+        (PhysicalMathExprAdd(a, literal(1)), [0, int64_max]),
+        (PhysicalMathExprSubtract(a, literal(1)), [0, int64_min]),
+        (PhysicalMathExprDivide(a, literal(-1)), [1, int64_min]),
+        # The product overflows within the tree.
+        (
+            PhysicalMathExprDivide(
+                PhysicalMathExprMultiply(a, literal(4)), literal(4)
+            ),
+            [1, 2**62],
+        ),
+    ]
+    for expr, values in overflowing:
+        batch = RowBatch(schema, [Column(DataType.Int, values)])
+        with pytest.raises(OverflowError):
+            expr.evaluate(batch)
+        with pytest.raises(OverflowError):
+            compile_expr(expr).evaluate(batch)
+
+    assert (
+        evaluate(PhysicalMathExprMultiply(a, literal(-2)), [2**62, 3])
+        == [[int64_min, -6]] * 2
+    )
+    assert (
+        evaluate(
+            PhysicalMathExprAdd(a, literal(-1)), [int64_max, int64_min + 1]
+        )
+        == [[int64_max - 1, int64_min]] * 2
+    )
+    assert (
+        evaluate(PhysicalMathExprSubtract(literal(-1), a), [int64_max, -5])
+        == [[int64_min, 4]] * 2
+    )
+
+
+def test_literal_exprs(backend, batch):
+    a = PhysicalColumnExpr(0)
+    five = PhysicalLiteralIntExpr(5)
+
+    result = PhysicalBooleanExprGt(a, five).evaluate(batch)
+    assert result.to_list() == [False, False, False, False, True, True]
+    result = PhysicalMathExprSubtract(five, a).evaluate(batch)
+    assert result.to_list() == [12, 8, 5, 1, -4, -7]
+
+    result = PhysicalMathExprAdd(five, five).evaluate(batch)
+    assert isinstance(result, ConstantColumn)
+    assert result.size() == 6
+    assert result.to_list() == [10] * 6
+
+
+def test_compiled_exprs(backend, batch):
+    a = PhysicalColumnExpr(0)
+    b = PhysicalColumnExpr(1)
+    exprs = [
+        PhysicalMathExprModulo(
+            PhysicalMathExprAdd(
+                PhysicalMathExprDivide(a, PhysicalLiteralIntExpr(2)),
+                PhysicalMathExprMultiply(b, a),
+            ),
+            PhysicalLiteralIntExpr(7),
+        ),
+        PhysicalBooleanExprOr(
+            PhysicalBooleanExprAnd(
+                PhysicalBooleanExprGt(a, b),
+                PhysicalBooleanExprLtEq(b, PhysicalLiteralIntExpr(3)),
+            ),
+            PhysicalBooleanExprEq(
+                PhysicalMathExprSubtract(a, PhysicalColumnExpr(0)),
+                PhysicalLiteralIntExpr(1),
+            ),
+        ),
+        PhysicalBooleanExprAnd(a, PhysicalLiteralIntExpr(1)),
+    ]
+    for expr in exprs:
+        compiled = compile_expr(expr)
+        assert isinstance(compiled, PhysicalCompiledExpr)
+        assert str(compiled) == str(expr)
+        result = compiled.evaluate(batch)
+        expected = expr.evaluate(batch)
+        assert result.get_data_type() == expected.get_data_type()
+        assert result.to_list() == expected.to_list()
+        compiled = pickle.loads(pickle.dumps(compiled))
+        assert compiled.evaluate(batch).to_list() == expected.to_list()
+
+    assert compile_expr(a) is a
+
+    # Functions are shared by trees that differ just in literals and columns.
+    gt = compile_expr(PhysicalBooleanExprGt(a, PhysicalLiteralIntExpr(0)))
+    other_gt = compile_expr(PhysicalBooleanExprGt(b, PhysicalLiteralIntExpr(3)))
+    data_types = (DataType.Int,)
+    assert gt.get_source(data_types, vectorized.ENABLED) == (
+        other_gt.get_source(data_types, vectorized.ENABLED)
+    )
+    assert other_gt.evaluate(batch).to_list() == [
+        x > 3 for x in [2, -2, 5, 3, 9, -5]
+    ]
+
+
+def test_compiled_expr_fallback(backend):
+    schema = Schema({"a": DataType.Int, "b": DataType.Bool})
+    batch = RowBatch(
+        schema,
+        [Column(DataType.Int, [1, 0]), Column(DataType.Bool, [True, False])],
+    )
+    a = PhysicalColumnExpr(0)
+    b = PhysicalColumnExpr(1)
+
+    expr = compile_expr(PhysicalMathExprAdd(a, b))
+    assert expr.get_source((DataType.Int, DataType.Bool), False) is None
+    with pytest.raises(RuntimeError, match="Type mismatch"):
+        expr.evaluate(batch)
+    with pytest.raises(ZeroDivisionError):
+        compile_expr(PhysicalMathExprDivide(a, a)).evaluate(batch)
+
+    five = PhysicalLiteralIntExpr(5)
+    result = compile_expr(PhysicalMathExprAdd(five, five)).evaluate(batch)
+    assert isinstance(result, ConstantColumn)
+    assert result.to_list() == [10, 10]
+
+
+@pytest.mark.parametrize(
+    "expr_cls,expected",
+    [
+        (PhysicalAggregateExprSum, [5, 10]),
+        (PhysicalAggregateExprMin, [1, 2]),
+        (PhysicalAggregateExprMax, [4, 5]),
+        (PhysicalAggregateExprAvg, [2, 3]),
+        (PhysicalAggregateExprCount, [2, 3]),
+    ],
+)
+def test_accumulator_merge(expr_cls, expected):
+    expr = expr_cls(PhysicalColumnExpr(0))
+    partial = expr.create_accumulator()
+    partial.update([0, 1], 2, Column(DataType.Int, [1, 3]))
+    other_partial = expr.create_accumulator()
+    other_partial.update([0, 1, 0], 2, Column(DataType.Int, [5, 4, 2]))
+
+    accumulator = expr.create_accumulator()
+    accumulator.merge(
+        [0, 1], 2, pickle.loads(pickle.dumps(partial.get_state()))
+    )
+    # The groups of the second partial are swapped, so the merged group 0
+    # holds 1 and 4 and group 1 holds 3, 5 and 2.
+    accumulator.merge([1, 0], 2, other_partial.get_state())
+    assert accumulator.get_values() == expected
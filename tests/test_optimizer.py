@@ -0,0 +1,219 @@
+from pathlib import Path
+
+from ota.data_loader import CsvLoader
+from ota.join_type import JoinType
+from ota.logical.expr.impls import (
+    LogicalAggregateExprSum,
+    LogicalBooleanExprAnd,
+    LogicalBooleanExprEq,
+    LogicalBooleanExprGt,
+    LogicalBooleanExprOr,
+    LogicalColumnExpr,
+    LogicalLiteralIntExpr,
+    LogicalMathExprAdd,
+    LogicalMathExprMultiply,
+)
+from ota.logical.plan.builder import LogicalPlanBuilder
+from ota.logical.plan.impls import LogicalEmptyRelation, LogicalScan
+from ota.query_optimizer import optimize
+from ota.schema import DataType, Schema
+
+SCHEMA = Schema({name: DataType.Int for name in ["a", "b", "c", "d", "e"]})
+
+
+def _builder() -> LogicalPlanBuilder:
+    data_loader = CsvLoader(Path("unused.csv"), SCHEMA)
+    return LogicalPlanBuilder(LogicalScan(data_loader, []))
+
+
+def _get_scan(plan):
+    while plan.get_children():
+        (plan,) = plan.get_children()
+    return plan
+
+
+def test_projection_pushdown():
+    plan = (
+        _builder()
+        .project(
+            [
+                LogicalColumnExpr("d"),
+                LogicalMathExprAdd(
+                    LogicalColumnExpr("b"), LogicalLiteralIntExpr(1)
+                ),
+            ]
+        )
+        .get_logical_plan()
+    )
+    optimized_plan = optimize(plan)
+    assert _get_scan(optimized_plan).get_projection() == ["b", "d"]
+    assert optimized_plan.get_schema().get_field_names() == ["d", "+"]
+
+
+def test_projection_pushdown_through_selection_and_aggregate():
+    plan = (
+        _builder()
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("e"), LogicalLiteralIntExpr(1)
+            )
+        )
+        .aggregate(
+            [LogicalColumnExpr("a")],
+            [LogicalAggregateExprSum(LogicalColumnExpr("c"))],
+        )
+        .get_logical_plan()
+    )
+    assert _get_scan(optimize(plan)).get_projection() == ["a", "c", "e"]
+
+
+def test_projection_pushdown_without_columns():
+    plan = _builder().project([LogicalLiteralIntExpr(1)]).get_logical_plan()
+    assert _get_scan(optimize(plan)).get_projection() == ["a"]
+
+
+def test_no_projection_pushdown_without_projection():
+    plan = _builder().get_logical_plan()
+    assert optimize(plan) is plan
+
+
+def test_predicate_pushdown():
+    plan = (
+        _builder()
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("a"), LogicalLiteralIntExpr(1)
+            )
+        )
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("b"), LogicalLiteralIntExpr(2)
+            )
+        )
+        .project([LogicalColumnExpr("c")])
+        .get_logical_plan()
+    )
+    optimized_plan = optimize(plan)
+    scan = optimized_plan.get_children()[0]
+    assert isinstance(scan, LogicalScan)
+    assert str(scan.get_predicate()) == "#a > 1 AND #b > 2"
+    assert scan.get_projection() == ["a", "b", "c"]
+
+
+def test_constant_folding():
+    plan = (
+        _builder()
+        .project(
+            [
+                LogicalMathExprAdd(
+                    LogicalColumnExpr("a"),
+                    LogicalMathExprMultiply(
+                        LogicalLiteralIntExpr(2), LogicalLiteralIntExpr(3)
+                    ),
+                ),
+                LogicalMathExprMultiply(
+                    LogicalColumnExpr("b"), LogicalLiteralIntExpr(1)
+                ),
+            ]
+        )
+        .get_logical_plan()
+    )
+    optimized_plan = optimize(plan)
+    assert [str(expr) for expr in optimized_plan.get_exprs()] == [
+        "#a + 6",
+        "#b AS *",
+    ]
+    assert optimized_plan.get_schema().get_field_names() == ["+", "*"]
+
+
+def test_constant_folding_removes_always_true_filter():
+    plan = (
+        _builder()
+        .select(
+            LogicalBooleanExprAnd(
+                LogicalBooleanExprGt(
+                    LogicalColumnExpr("a"), LogicalLiteralIntExpr(1)
+                ),
+                LogicalBooleanExprEq(
+                    LogicalLiteralIntExpr(1), LogicalLiteralIntExpr(1)
+                ),
+            )
+        )
+        .select(
+            LogicalBooleanExprOr(
+                LogicalBooleanExprEq(
+                    LogicalLiteralIntExpr(1), LogicalLiteralIntExpr(1)
+                ),
+                LogicalBooleanExprGt(
+                    LogicalColumnExpr("b"), LogicalLiteralIntExpr(1)
+                ),
+            )
+        )
+        .get_logical_plan()
+    )
+    optimized_plan = optimize(plan)
+    assert isinstance(optimized_plan, LogicalScan)
+    assert str(optimized_plan.get_predicate()) == "#a > 1"
+
+
+def test_constant_folding_replaces_always_false_filter():
+    plan = (
+        _builder()
+        .select(
+            LogicalBooleanExprAnd(
+                LogicalBooleanExprGt(
+                    LogicalColumnExpr("a"), LogicalLiteralIntExpr(1)
+                ),
+                LogicalBooleanExprGt(
+                    LogicalLiteralIntExpr(1), LogicalLiteralIntExpr(2)
+                ),
+            )
+        )
+        .project([LogicalColumnExpr("a")])
+        .get_logical_plan()
+    )
+    optimized_plan = optimize(plan)
+    assert isinstance(optimized_plan.get_input_plan(), LogicalEmptyRelation)
+
+
+def test_projection_pushdown_through_sort_and_limit():
+    plan = (
+        _builder()
+        .order_by([LogicalColumnExpr("c")], ascending=False)
+        .limit(10)
+        .project([LogicalColumnExpr("a")])
+        .get_logical_plan()
+    )
+    assert _get_scan(optimize(plan)).get_projection() == ["a", "c"]
+
+
+def test_projection_pushdown_through_join():
+    right_schema = Schema({"x": DataType.Int, "y": DataType.Int})
+    right_data_loader = CsvLoader(Path("unused.csv"), right_schema)
+    right = LogicalPlanBuilder(LogicalScan(right_data_loader, []))
+
+    plan = (
+        _builder()
+        .join(right, [LogicalColumnExpr("a")], [LogicalColumnExpr("x")])
+        .project([LogicalColumnExpr("b"), LogicalColumnExpr("y")])
+        .get_logical_plan()
+    )
+    join = optimize(plan).get_children()[0]
+    left_scan, right_scan = join.get_children()
+    assert left_scan.get_projection() == ["a", "b"]
+    # All columns of the right scan are required.
+    assert right_scan.get_projection() == []
+
+    plan = (
+        _builder()
+        .join(
+            right,
+            [LogicalColumnExpr("a")],
+            [LogicalColumnExpr("x")],
+            JoinType.Semi,
+        )
+        .get_logical_plan()
+    )
+    left_scan, right_scan = optimize(plan).get_children()
+    assert left_scan.get_projection() == []
+    assert right_scan.get_projection() == ["x"]
@@ -0,0 +1,132 @@
+import os
+
+from ota.execution_context import ExecutionContext
+from ota.logical.expr.impls import (
+    LogicalBooleanExprGt,
+    LogicalColumnExpr,
+    LogicalLiteralIntExpr,
+)
+from ota.result_cache import ResultCache
+from ota.schema import DataType, Schema
+
+SCHEMA = Schema({"a": DataType.Int, "b": DataType.Int})
+
+
+def _write_csv(path, num_rows):
+    with open(path, "w") as csv_file:
+        csv_file.write("a,b\n")
+        for i in range(num_rows):
+            csv_file.write(f"{i},{i + 1}\n")
+
+
+def _build_plan(ctx, path, limit):
+    return (
+        ctx.csv(path, SCHEMA)
+        .select(
+            LogicalBooleanExprGt(
+                LogicalColumnExpr("a"), LogicalLiteralIntExpr(limit)
+            )
+        )
+        .project([LogicalColumnExpr("b")])
+        .get_logical_plan()
+    )
+
+
+def _to_csv(ctx, plan):
+    return "".join(batch.to_csv() for batch in ctx.execute(plan))
+
+
+def test_result_cache_hits(tmp_path):
+    path = tmp_path / "test.csv"
+    _write_csv(path, 10)
+    result_cache = ResultCache()
+    ctx = ExecutionContext(result_cache=result_cache)
+
+    assert _to_csv(ctx, _build_plan(ctx, path, 7)) == "9\n10\n"
+    # A structurally equal plan built anew hits the cache.
+    assert _to_csv(ctx, _build_plan(ctx, path, 7)) == "9\n10\n"
+    assert _to_csv(ctx, _build_plan(ctx, path, 8)) == "10\n"
+    assert result_cache.get_num_hits() == 1
+    assert result_cache.get_num_misses() == 2
+    assert result_cache.num_entries() == 2
+
+
+def test_result_cache_columnar_hits(tmp_path):
+    csv_path = tmp_path / "test.csv"
+    _write_csv(csv_path, 10)
+    columnar_path = tmp_path / "test.ota"
+    ExecutionContext().write_columnar(
+        ExecutionContext().csv(csv_path, SCHEMA).get_logical_plan(),
+        columnar_path,
+    )
+    result_cache = ResultCache()
+    ctx = ExecutionContext(result_cache=result_cache)
+
+    for _ in range(2):
+        plan = ctx.columnar(columnar_path).project([LogicalColumnExpr("b")])
+        assert _to_csv(ctx, plan.get_logical_plan()) == "".join(
+            f"{i + 1}\n" for i in range(10)
+        )
+    assert result_cache.get_num_hits() == 1
+    assert result_cache.get_num_misses() == 1
+
+
+def test_result_cache_file_change(tmp_path):
+    path = tmp_path / "test.csv"
+    _write_csv(path, 10)
+    result_cache = ResultCache()
+    ctx = ExecutionContext(result_cache=result_cache)
+    plan = _build_plan(ctx, path, 7)
+    assert _to_csv(ctx, plan) == "9\n10\n"
+
+    _write_csv(path, 11)
+    stat_result = os.stat(path)
+    os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 1))
+    assert _to_csv(ctx, plan) == "9\n10\n11\n"
+    assert result_cache.get_num_hits() == 0
+
+
+def test_result_cache_eviction(tmp_path):
+    path = tmp_path / "test.csv"
+    _write_csv(path, 10)
+    result_cache = ResultCache(max_entries=2)
+    ctx = ExecutionContext(result_cache=result_cache)
+
+    for limit in (1, 2, 1, 3, 1, 2):
+        _to_csv(ctx, _build_plan(ctx, path, limit))
+    # 2 is evicted by 3 as the least recently used plan, 1 stays cached.
+    assert result_cache.get_num_hits() == 2
+    assert result_cache.get_num_misses() == 4
+
+
+def test_result_cache_partially_consumed(tmp_path):
+    path = tmp_path / "test.csv"
+    _write_csv(path, 10)
+    result_cache = ResultCache()
+    ctx = ExecutionContext(result_cache=result_cache)
+
+    next(ctx.execute(_build_plan(ctx, path, 7)))
+    assert result_cache.num_entries() == 0
+
+
+def test_result_cache_max_bytes(tmp_path):
+    path = tmp_path / "test.csv"
+    _write_csv(path, 20)
+    # The results hold 8 bytes per Int value.
+    result_cache = ResultCache(max_bytes=100)
+    ctx = ExecutionContext(result_cache=result_cache)
+
+    _to_csv(ctx, _build_plan(ctx, path, 11))
+    assert result_cache.get_num_bytes() == 64
+    # Caching a second result evicts the first one.
+    _to_csv(ctx, _build_plan(ctx, path, 12))
+    assert result_cache.num_entries() == 1
+    assert result_cache.get_num_bytes() == 56
+    _to_csv(ctx, _build_plan(ctx, path, 11))
+    assert result_cache.get_num_hits() == 0
+
+    # A result larger than the budget is neither buffered nor cached.
+    result_cache.clear()
+    expected = "".join(f"{i + 1}\n" for i in range(20))
+    assert _to_csv(ctx, _build_plan(ctx, path, -1)) == expected
+    assert result_cache.num_entries() == 0
@@ -0,0 +1,77 @@
+import pickle
+
+import pytest
+
+from ota.column import Column, ConstantColumn
+from ota.physical.expr import vectorized
+from ota.physical.expr.impls import (
+    PhysicalColumnExpr,
+    PhysicalRuntimeFilterExpr,
+)
+from ota.row_batch import RowBatch
+from ota.runtime_filter import RuntimeFilter
+from ota.schema import DataType, Schema
+from ota.zone_map import ColumnStatistics, may_match
+
+
+@pytest.fixture(params=[False, True], ids=["python", "numpy"])
+def backend(request, monkeypatch):
+    if request.param and vectorized.np is None:
+        pytest.skip("NumPy is not installed")
+    monkeypatch.setattr(vectorized, "ENABLED", request.param)
+
+
+def test_runtime_filter(backend):
+    runtime_filter = RuntimeFilter()
+    column = Column(DataType.Int, list(range(-5000, 5000)))
+    assert runtime_filter.may_contain([column]).to_list() == [True] * 10_000
+
+    keys = set(range(-1000, 1000, 7))
+    runtime_filter.build(keys, 1)
+    assert runtime_filter.get_ranges() == [(-1000, 995)]
+    contained = runtime_filter.may_contain([column]).to_list()
+    values = column.to_list()
+    assert all(contained[values.index(key)] for key in keys)
+    # Values out of the range never pass, the Bloom filter drops most others.
+    assert not any(contained[:4000]) and not any(contained[5996:])
+    num_false_positives = sum(contained) - len(keys)
+    assert num_false_positives < 0.1 * (1996 - len(keys))
+
+    # The filter is evaluated in the worker processes of parallel scans.
+    copied_filter = pickle.loads(pickle.dumps(runtime_filter))
+    assert copied_filter.may_contain([column]).to_list() == contained
+
+    runtime_filter.clear()
+    assert runtime_filter.may_contain([column]).to_list() == [True] * 10_000
+
+
+def test_runtime_filter_with_several_keys(backend):
+    runtime_filter = RuntimeFilter()
+    runtime_filter.build({(1, True), (3, False), (5, True)}, 2)
+    assert runtime_filter.get_ranges() == [(1, 5), None]
+
+    key_columns = [
+        Column(DataType.Int, [1, 3, 5, 0, 6]),
+        ConstantColumn(DataType.Bool, True, 5),
+    ]
+    contained = runtime_filter.may_contain(key_columns).to_list()
+    assert contained[0] and contained[2]
+    assert not contained[3] and not contained[4]
+
+
+def test_runtime_filter_expr():
+    runtime_filter = RuntimeFilter()
+    expr = PhysicalRuntimeFilterExpr([PhysicalColumnExpr(1)], runtime_filter)
+    schema = Schema({"a": DataType.Int, "b": DataType.Int})
+    batch = RowBatch(
+        schema,
+        [Column(DataType.Int, [1, 2, 3]), Column(DataType.Int, [10, 20, 30])],
+    )
+    assert str(expr) == "RUNTIME_FILTER(#1)"
+    assert expr.evaluate(batch).to_list() == [True, True, True]
+    assert may_match(expr, [None, ColumnStatistics(40, 50)])
+
+    runtime_filter.build({20}, 1)
+    assert expr.evaluate(batch).to_list() == [False, True, False]
+    assert may_match(expr, [None, ColumnStatistics(20, 25)])
+    assert not may_match(expr, [None, ColumnStatistics(40, 50)])
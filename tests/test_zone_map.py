@@ -0,0 +1,126 @@
+import pytest
+
+from ota.column import Column
+from ota.physical.expr.impls import (
+    PhysicalBooleanExprAnd,
+    PhysicalBooleanExprEq,
+    PhysicalBooleanExprGt,
+    PhysicalBooleanExprLtEq,
+    PhysicalBooleanExprNeq,
+    PhysicalBooleanExprOr,
+    PhysicalColumnExpr,
+    PhysicalLiteralIntExpr,
+    PhysicalMathExprModulo,
+    PhysicalMathExprSubtract,
+)
+from ota.schema import DataType
+from ota.zone_map import ColumnStatistics, compute_statistics, may_match
+
+# Column 0 holds values from 10 to 20, column 1 the value 5.
+STATISTICS = [ColumnStatistics(10, 20), ColumnStatistics(5, 5)]
+
+
+def test_compute_statistics():
+    column = Column(DataType.Int, [3, -1, 7])
+    assert compute_statistics(column) == ColumnStatistics(-1, 7)
+    column = Column(DataType.Bool, [True, True])
+    assert compute_statistics(column) == ColumnStatistics(True, True)
+
+
+@pytest.mark.parametrize(
+    "expr,expected",
+    [
+        (
+            PhysicalBooleanExprGt(
+                PhysicalColumnExpr(0), PhysicalLiteralIntExpr(19)
+            ),
+            True,
+        ),
+        (
+            PhysicalBooleanExprGt(
+                PhysicalColumnExpr(0), PhysicalLiteralIntExpr(20)
+            ),
+            False,
+        ),
+        (
+            PhysicalBooleanExprLtEq(
+                PhysicalColumnExpr(0), PhysicalLiteralIntExpr(9)
+            ),
+            False,
+        ),
+        (
+            PhysicalBooleanExprEq(
+                PhysicalColumnExpr(1), PhysicalLiteralIntExpr(5)
+            ),
+            True,
+        ),
+        (
+            PhysicalBooleanExprNeq(
+                PhysicalColumnExpr(1), PhysicalLiteralIntExpr(5)
+            ),
+            False,
+        ),
+        (
+            PhysicalBooleanExprGt(
+                PhysicalMathExprSubtract(
+                    PhysicalColumnExpr(0), PhysicalColumnExpr(1)
+                ),
+                PhysicalLiteralIntExpr(15),
+            ),
+            False,
+        ),
+        (
+            PhysicalBooleanExprEq(
+                PhysicalMathExprModulo(
+                    PhysicalColumnExpr(0), PhysicalLiteralIntExpr(7)
+                ),
+                PhysicalLiteralIntExpr(100),
+            ),
+            True,
+        ),
+        (
+            PhysicalBooleanExprAnd(
+                PhysicalBooleanExprGt(
+                    PhysicalColumnExpr(0), PhysicalLiteralIntExpr(15)
+                ),
+                PhysicalBooleanExprGt(
+                    PhysicalColumnExpr(1), PhysicalLiteralIntExpr(5)
+                ),
+            ),
+            False,
+        ),
+        (
+            PhysicalBooleanExprOr(
+                PhysicalBooleanExprGt(
+                    PhysicalColumnExpr(0), PhysicalLiteralIntExpr(15)
+                ),
+                PhysicalBooleanExprGt(
+                    PhysicalColumnExpr(1), PhysicalLiteralIntExpr(5)
+                ),
+            ),
+            True,
+        ),
+    ],
+)
+def test_may_match(expr, expected):
+    assert may_match(expr, STATISTICS) == expected
+
+
+def test_may_match_column_conditions():
+    # Column 0 holds Int values from 1 to 3, column 1 Int values from 2 to 9,
+    # column 2 just False and column 3 just 0.
+    statistics = [
+        ColumnStatistics(1, 3),
+        ColumnStatistics(2, 9),
+        ColumnStatistics(False, False),
+        ColumnStatistics(0, 0),
+    ]
+    a, b, c, d = map(PhysicalColumnExpr, range(4))
+    # Filters pass the rows of Int columns that aren't 0.
+    assert may_match(b, statistics)
+    assert not may_match(c, statistics)
+    assert not may_match(d, statistics)
+    assert may_match(PhysicalBooleanExprAnd(a, a), statistics)
+    assert not may_match(PhysicalBooleanExprAnd(a, b), statistics)
+    assert may_match(PhysicalBooleanExprOr(b, a), statistics)
+    assert not may_match(PhysicalBooleanExprOr(b, c), statistics)